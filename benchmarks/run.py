@@ -0,0 +1,238 @@
+"""
+End-to-end ragstrap benchmarks against synthetic repositories.
+
+Generates a repository of the chosen shape, serves it from a local GitHub
+stand-in and measures fetch, update, generate_index and harvest_examples.
+Each stage runs in a fresh interpreter so peak RSS is per stage. Results are
+compared against benchmarks/baseline.json.
+
+    python benchmarks/run.py --shape small [--runs 3] [--save-baseline]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, replace
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from server import start_server  # noqa: E402
+from synth import SHAPES, generate_repo, mutate_repo  # noqa: E402
+
+BASELINE = Path(__file__).resolve().parent / "baseline.json"
+
+STAGES = ["fetch", "update", "generate_index", "harvest_examples"]
+
+# Allowed growth over the baseline before a metric counts as a regression
+TOLERANCE = {"seconds": 0.25, "peak_rss_bytes": 0.15, "bytes_written": 0.05}
+# Ignore differences below these; they are noise at small shapes
+MIN_DELTA = {"seconds": 0.05, "peak_rss_bytes": 1024 * 1024, "bytes_written": 64 * 1024}
+
+OWNER = "bench"
+REPO = "synth"
+
+
+def bytes_written() -> int | None:
+    # wchar counts every byte passed to write(), whether or not it hit disk
+    try:
+        with open("/proc/self/io") as fh:
+            for line in fh:
+                if line.startswith("wchar:"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+def run_stage(stage: str, workspace: Path, out: Path):
+    """
+    Executed in a child interpreter: run one stage and write its metrics.
+    """
+    os.chdir(workspace)
+    reference = workspace / "references" / REPO
+
+    started_bytes = bytes_written()
+    started = time.perf_counter()
+
+    if stage in ("fetch", "update"):
+        from ragstrap.cli import app
+
+        args = (
+            ["fetch", f"https://github.com/{OWNER}/{REPO}"]
+            if stage == "fetch"
+            else ["update", REPO]
+        )
+        app([*args, "--no-capture-cli", "--jobs", "1"], standalone_mode=False)
+    elif stage == "generate_index":
+        from ragstrap.index.generate import generate_index
+
+        generate_index(reference)
+    elif stage == "harvest_examples":
+        from ragstrap.examples.harvest import harvest_examples
+
+        examples = reference / "examples"
+        shutil.rmtree(examples, ignore_errors=True)
+        harvest_examples(reference / "raw", examples, jobs=1)
+    else:
+        raise ValueError(f"Unknown stage: {stage}")
+
+    seconds = time.perf_counter() - started
+    finished_bytes = bytes_written()
+
+    from ragstrap.util.memory import peak_rss_bytes
+
+    metrics = {
+        "seconds": seconds,
+        "peak_rss_bytes": peak_rss_bytes(),
+        "bytes_written": None
+        if started_bytes is None or finished_bytes is None
+        else finished_bytes - started_bytes,
+    }
+    out.write_text(json.dumps(metrics))
+
+
+def measure(stage: str, workspace: Path, env: dict) -> dict:
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as fh:
+        out = Path(fh.name)
+    try:
+        subprocess.run(
+            [sys.executable, __file__, "--stage", stage, str(workspace), str(out)],
+            env=env,
+            stdout=subprocess.DEVNULL,
+            check=True,
+        )
+        return json.loads(out.read_text())
+    finally:
+        out.unlink(missing_ok=True)
+
+
+def run_once(shape_name: str, files: int | None, tmp: Path) -> dict:
+    shape = SHAPES[shape_name]
+    if files:
+        shape = replace(shape, files=files)
+
+    repos = tmp / "repos"
+    generate_repo(repos / OWNER / REPO, shape)
+    workspace = tmp / "workspace"
+    workspace.mkdir()
+
+    server, url = start_server(repos)
+    env = {
+        **os.environ,
+        "GITHUB_API_URL": url,
+        "GITHUB_RAW_URL": f"{url}/raw",
+        "RAGSTRAP_CACHE_DIR": str(tmp / "cache"),
+        # Measure the download path, not the archive cache
+        "RAGSTRAP_CACHE_SIZE": "0",
+    }
+    try:
+        results = {"fetch": measure("fetch", workspace, env)}
+        mutate_repo(repos / OWNER / REPO)
+        for stage in STAGES[1:]:
+            results[stage] = measure(stage, workspace, env)
+    finally:
+        server.shutdown()
+    return results
+
+
+def median_results(runs: list[dict]) -> dict:
+    merged = {}
+    for stage in STAGES:
+        merged[stage] = {}
+        for metric in TOLERANCE:
+            values = [r[stage][metric] for r in runs if r[stage][metric] is not None]
+            merged[stage][metric] = statistics.median(values) if values else None
+    return merged
+
+
+def compare(results: dict, baseline: dict) -> list[str]:
+    regressions = []
+    for stage, metrics in results.items():
+        for metric, value in metrics.items():
+            base = baseline.get(stage, {}).get(metric)
+            if value is None or base is None:
+                continue
+            limit = max(base * (1 + TOLERANCE[metric]), base + MIN_DELTA[metric])
+            if value > limit:
+                regressions.append(
+                    f"{stage} {metric}: {_fmt(metric, value)} "
+                    f"(baseline {_fmt(metric, base)})"
+                )
+    return regressions
+
+
+def _fmt(metric: str, value: float) -> str:
+    if metric == "seconds":
+        return f"{value:.3f}s"
+    return f"{value / 1024 / 1024:.1f} MiB"
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--stage":
+        run_stage(sys.argv[2], Path(sys.argv[3]), Path(sys.argv[4]))
+        return
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--shape", choices=sorted(SHAPES), default="small")
+    parser.add_argument("--files", type=int, help="Override the shape's file count")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Record these results as the baseline for the shape",
+    )
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    runs = []
+    for _ in range(args.runs):
+        with tempfile.TemporaryDirectory() as tmp:
+            runs.append(run_once(args.shape, args.files, Path(tmp)))
+    results = median_results(runs)
+
+    baselines = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    key = args.shape if not args.files else f"{args.shape}-{args.files}"
+
+    if args.save_baseline:
+        shape = SHAPES[args.shape]
+        baselines[key] = {
+            "shape": asdict(replace(shape, files=args.files or shape.files)),
+            "python": sys.version.split()[0],
+            "stages": results,
+        }
+        args.baseline.write_text(json.dumps(baselines, indent=2) + "\n")
+
+    baseline = baselines.get(key, {}).get("stages", {})
+    regressions = [] if args.save_baseline else compare(results, baseline)
+
+    if args.json:
+        print(json.dumps({"results": results, "regressions": regressions}, indent=2))
+    else:
+        print(f"{'stage':<18} {'seconds':>9} {'peak RSS':>10} {'written':>10}")
+        for stage, m in results.items():
+            rss = m["peak_rss_bytes"]
+            written = m["bytes_written"]
+            print(
+                f"{stage:<18} {m['seconds']:>8.3f}s "
+                f"{(rss or 0) / 1024 / 1024:>6.1f} MiB "
+                f"{(written or 0) / 1024 / 1024:>6.1f} MiB"
+            )
+        if not baseline and not args.save_baseline:
+            print(f"No baseline for '{key}'; record one with --save-baseline")
+        for line in regressions:
+            print(f"REGRESSION {line}")
+
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
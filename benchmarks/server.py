@@ -0,0 +1,150 @@
+"""
+Local stand-in for the parts of the GitHub API ragstrap uses.
+
+Serves every directory <root>/<owner>/<repo> as a repository whose commit SHA
+is a hash of its contents:
+
+    GET /repos/<owner>/<repo>/commits/HEAD        SHA (ETag, If-None-Match)
+    GET /repos/<owner>/<repo>/tarball[/<ref>]     gzipped tarball
+    GET /repos/<owner>/<repo>/git/trees/<ref>     recursive tree listing
+    GET /raw/<owner>/<repo>/<ref>/<path>          file contents
+
+Point ragstrap at it with GITHUB_API_URL=<url> GITHUB_RAW_URL=<url>/raw.
+
+    python benchmarks/server.py ROOT [--port 8765]
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import tarfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+RATE_LIMIT_HEADERS = {
+    "X-RateLimit-Limit": "5000",
+    "X-RateLimit-Remaining": "4999",
+    "X-RateLimit-Reset": "4102444800",
+}
+
+
+def repo_files(repo: Path) -> list[Path]:
+    return sorted(p for p in repo.rglob("*") if p.is_file())
+
+
+def repo_sha(repo: Path) -> str:
+    digest = hashlib.sha1()
+    for path in repo_files(repo):
+        stat = path.stat()
+        digest.update(path.relative_to(repo).as_posix().encode())
+        digest.update(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()
+
+
+def build_tarball(repo: Path, owner: str, name: str, sha: str) -> bytes:
+    buf = io.BytesIO()
+    prefix = f"{owner}-{name}-{sha[:7]}"
+    with tarfile.open(fileobj=buf, mode="w:gz", compresslevel=1) as tar:
+        root = tarfile.TarInfo(prefix)
+        root.type = tarfile.DIRTYPE
+        tar.addfile(root)
+        for path in repo_files(repo):
+            tar.add(path, arcname=f"{prefix}/{path.relative_to(repo).as_posix()}")
+    return buf.getvalue()
+
+
+class Handler(BaseHTTPRequestHandler):
+    root: Path
+    tarballs: dict = {}
+    lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        parts = [unquote(p) for p in urlsplit(self.path).path.strip("/").split("/")]
+
+        if parts[0] == "repos" and len(parts) >= 4:
+            owner, name, rest = parts[1], parts[2], parts[3:]
+            repo = self.root / owner / name
+            if not repo.is_dir():
+                return self._send(404, b'{"message": "Not Found"}')
+            sha = repo_sha(repo)
+
+            if rest[:2] == ["commits", "HEAD"]:
+                etag = f'"{sha}"'
+                if self.headers.get("If-None-Match") == etag:
+                    return self._send(304)
+                return self._send(200, sha.encode(), {"ETag": etag})
+
+            if rest[0] == "tarball":
+                with self.lock:
+                    body = self.tarballs.get((owner, name, sha))
+                    if body is None:
+                        body = build_tarball(repo, owner, name, sha)
+                        self.tarballs[(owner, name, sha)] = body
+                etag = f'"{hashlib.md5(body).hexdigest()}"'
+                headers = {"Content-Type": "application/x-gzip", "ETag": etag}
+                return self._send(200, body, headers)
+
+            if rest[:2] == ["git", "trees"]:
+                tree = []
+                for path in repo_files(repo):
+                    data = path.read_bytes()
+                    blob = f"blob {len(data)}\0".encode() + data
+                    tree.append(
+                        {
+                            "path": path.relative_to(repo).as_posix(),
+                            "type": "blob",
+                            "size": len(data),
+                            "sha": hashlib.sha1(blob).hexdigest(),
+                        }
+                    )
+                body = json.dumps({"sha": sha, "tree": tree, "truncated": False})
+                return self._send(200, body.encode())
+
+        if parts[0] == "raw" and len(parts) >= 5:
+            path = self.root / parts[1] / parts[2] / "/".join(parts[4:])
+            if path.is_file():
+                return self._send(200, path.read_bytes())
+
+        self._send(404, b"Not Found")
+
+    def _send(self, status: int, body: bytes = b"", headers: dict | None = None):
+        self.send_response(status)
+        for key, value in {**RATE_LIMIT_HEADERS, **(headers or {})}.items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_server(root: Path, port: int = 0) -> tuple[ThreadingHTTPServer, str]:
+    """
+    Serve root in a background thread. Returns (server, base URL).
+    """
+    handler = type("BoundHandler", (Handler,), {"root": root, "tarballs": {}})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local GitHub stand-in")
+    parser.add_argument("root", type=Path)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    server, url = start_server(args.root, args.port)
+    print(f"Serving {args.root} at {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Startup benchmark for the ragstrap CLI.
+
+Measures the import cost of ragstrap.cli (via python -X importtime) and the
+wall time of metadata commands, and fails if either exceeds its budget or if
+heavy modules leak into the import graph.
+
+    python benchmarks/startup.py [--runs 10] [--scale 1.5] [--json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Milliseconds on a typical developer laptop; --scale loosens them for slow CI
+BUDGETS_MS = {
+    "import ragstrap.cli": 80,
+    "ragstrap --version": 250,
+    "ragstrap list --json": 250,
+    "ragstrap info": 250,
+}
+
+# Modules that metadata commands must not pull in at startup
+FORBIDDEN_MODULES = [
+    "requests",
+    "urllib3",
+    "tarfile",
+    "sqlite3",
+    "multiprocessing",
+    "numpy",
+    "ragstrap.fetch.github_archive",
+    "ragstrap.examples.harvest",
+    "ragstrap.cli_capture.rust",
+]
+
+REFERENCE_COUNT = 200
+
+
+def import_time_ms() -> float:
+    """
+    Cumulative import time of ragstrap.cli as reported by -X importtime.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import ragstrap.cli"],
+        stderr=subprocess.PIPE,
+        text=True,
+        check=True,
+    )
+    for line in result.stderr.splitlines():
+        parts = [p.strip() for p in line.split("|")]
+        if len(parts) == 3 and parts[2] == "ragstrap.cli":
+            return int(parts[1]) / 1000
+    raise RuntimeError("ragstrap.cli missing from -X importtime output")
+
+
+def leaked_modules() -> list[str]:
+    code = (
+        "import sys, ragstrap.cli; "
+        f"print('\\n'.join(m for m in {FORBIDDEN_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], stdout=subprocess.PIPE, text=True, check=True
+    )
+    return result.stdout.split()
+
+
+def command_ms(args: list[str], cwd: Path, runs: int) -> float:
+    """
+    Median wall time of running the CLI with args, in milliseconds.
+    """
+    cmd = [sys.executable, "-c", "from ragstrap.cli import main; main()", *args]
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(cmd, cwd=cwd, stdout=subprocess.DEVNULL, check=True)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def make_workspace(root: Path, count: int):
+    for i in range(count):
+        ref = root / "references" / f"lib{i:04d}"
+        ref.mkdir(parents=True)
+        meta = {
+            "name": f"lib{i:04d}",
+            "source": f"https://github.com/example/lib{i:04d}",
+            "owner": "example",
+            "repo": f"lib{i:04d}",
+            "commit": "0" * 40,
+            "language": "python" if i % 2 else "rust",
+            "fetched_at": "2024-01-01T00:00:00Z",
+        }
+        (ref / "meta.json").write_text(json.dumps(meta, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument(
+        "--scale", type=float, default=1.0, help="Multiply every budget"
+    )
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workspace = Path(tmp)
+        make_workspace(workspace, REFERENCE_COUNT)
+        # Build the catalog once so list measures the steady state
+        command_ms(["reindex"], workspace, 1)
+
+        imports = [import_time_ms() for _ in range(args.runs)]
+        results = {
+            "import ragstrap.cli": statistics.median(imports),
+            "ragstrap --version": command_ms(["--version"], workspace, args.runs),
+            "ragstrap list --json": command_ms(
+                ["list", "--json"], workspace, args.runs
+            ),
+            "ragstrap info": command_ms(["info", "lib0001"], workspace, args.runs),
+        }
+
+    leaked = leaked_modules()
+    over = {
+        name: ms
+        for name, ms in results.items()
+        if ms > BUDGETS_MS[name] * args.scale
+    }
+
+    if args.json:
+        print(
+            json.dumps(
+                {
+                    "results_ms": results,
+                    "budgets_ms": {
+                        k: v * args.scale for k, v in BUDGETS_MS.items()
+                    },
+                    "leaked_modules": leaked,
+                    "python": sys.version.split()[0],
+                    "platform": sys.platform,
+                    "cpu_count": os.cpu_count(),
+                },
+                indent=2,
+            )
+        )
+    else:
+        for name, ms in results.items():
+            budget = BUDGETS_MS[name] * args.scale
+            flag = "OVER" if name in over else "ok"
+            print(f"{name:<24} {ms:8.1f} ms  (budget {budget:.0f} ms)  {flag}")
+        if leaked:
+            print(f"Heavy modules imported at startup: {', '.join(leaked)}")
+
+    if over or leaked:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
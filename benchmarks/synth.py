@@ -0,0 +1,115 @@
+"""
+Deterministic synthetic repositories for benchmarks.
+"""
+
+import random
+from dataclasses import dataclass
+from pathlib import Path
+
+WORDS = (
+    "alpha beta gamma delta parse render config stream buffer index token "
+    "request handler module package install release option command value"
+).split()
+
+
+@dataclass
+class RepoShape:
+    files: int = 500
+    depth: int = 4
+    # Fraction of files that are Markdown with fenced shell examples
+    markdown_ratio: float = 0.2
+    large_binaries: int = 0
+    large_binary_size: int = 5 * 1024 * 1024
+    file_size: int = 4096
+    seed: int = 0
+
+
+SHAPES = {
+    "small": RepoShape(files=300, depth=3),
+    "medium": RepoShape(files=3000, depth=5, large_binaries=2),
+    "large": RepoShape(files=20000, depth=6, large_binaries=5),
+    "docs": RepoShape(files=2000, depth=4, markdown_ratio=0.8),
+}
+
+
+def generate_repo(root: Path, shape: RepoShape) -> int:
+    """
+    Write a repository of the given shape under root. Returns bytes written.
+    """
+    rng = random.Random(shape.seed)
+    root.mkdir(parents=True, exist_ok=True)
+    written = 0
+
+    written += _write(root / "README.md", _markdown(rng, shape.file_size))
+    written += _write(root / "Cargo.toml", '[package]\nname = "synth"\n')
+
+    dirs = [Path(".")]
+    for i in range(max(1, shape.files // 20)):
+        parent = rng.choice(dirs)
+        if len(parent.parts) < shape.depth:
+            dirs.append(parent / f"dir{i}")
+
+    for i in range(shape.files):
+        folder = rng.choice(dirs)
+        if rng.random() < shape.markdown_ratio:
+            path = root / folder / f"doc{i}.md"
+            content = _markdown(rng, shape.file_size)
+        else:
+            path = root / folder / f"src{i}.rs"
+            content = _code(rng, shape.file_size)
+        written += _write(path, content)
+
+    for i in range(shape.large_binaries):
+        data = rng.randbytes(shape.large_binary_size)
+        path = root / "assets" / f"blob{i}.bin"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        written += len(data)
+
+    return written
+
+
+def mutate_repo(root: Path, fraction: float = 0.05, seed: int = 1) -> int:
+    """
+    Append to a fraction of the text files, as an upstream change would.
+    Returns the number of files changed.
+    """
+    rng = random.Random(seed)
+    files = sorted(
+        p for p in root.rglob("*") if p.is_file() and p.suffix in (".md", ".rs")
+    )
+    changed = rng.sample(files, max(1, int(len(files) * fraction)))
+    for path in changed:
+        with path.open("a") as fh:
+            fh.write(f"\n// revision {rng.randrange(1 << 30)}\n")
+    return len(changed)
+
+
+def _write(path: Path, text: str) -> int:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = text.encode()
+    path.write_bytes(data)
+    return len(data)
+
+
+def _sentence(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 14))) + "."
+
+
+def _markdown(rng: random.Random, size: int) -> str:
+    parts = [f"# {rng.choice(WORDS).title()}\n"]
+    while sum(len(p) for p in parts) < size:
+        parts.append(f"\n## {rng.choice(WORDS).title()}\n\n{_sentence(rng)}\n")
+        if rng.random() < 0.5:
+            parts.append(
+                f"\n```sh\nsynth {rng.choice(WORDS)} --{rng.choice(WORDS)}\n```\n"
+            )
+    return "".join(parts)
+
+
+def _code(rng: random.Random, size: int) -> str:
+    parts = []
+    while sum(len(p) for p in parts) < size:
+        name = f"{rng.choice(WORDS)}_{rng.randrange(1000)}"
+        parts.append(f"/// {_sentence(rng)}\npub fn {name}() -> u32 {{\n    42\n}}\n\n")
+    return "".join(parts)
@@ -1,3 +1,7 @@
-from importlib.metadata import version
+def __getattr__(name: str):
+    # Resolved on first use; importlib.metadata is slow to import
+    if name == "__version__":
+        from importlib.metadata import version
 
-__version__ = version("ragstrap")
+        return version("ragstrap")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,251 @@
+import hashlib
+import json
+import os
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import Executor, ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+
+from ragstrap.chunk.split import chunk_kind, count_tokens, split_text
+from ragstrap.util.text import is_text_candidate, looks_binary
+
+CHUNKS_FILE = "chunks.jsonl"
+CHUNKS_STATE_FILE = "chunks.state.json"
+
+MAX_TOKENS = 512
+OVERLAP_TOKENS = 64
+
+# Files handed to each worker at a time, and how many batches may be in
+# flight; together they bound how much chunked output sits in memory
+BATCH_SIZE = 16
+MAX_PENDING_BATCHES = 8
+
+
+def chunk_settings(reference_dir: Path) -> dict:
+    """
+    The max_tokens and overlap of the reference's last export, or the
+    defaults when it has none, so later exports can keep them.
+    """
+    settings = _load_state(reference_dir / CHUNKS_STATE_FILE).get("settings") or {}
+    return {
+        "max_tokens": settings.get("max_tokens", MAX_TOKENS),
+        "overlap": settings.get("overlap", OVERLAP_TOKENS),
+    }
+
+
+def export_chunks(
+    reference_dir: Path,
+    manifest: dict,
+    jobs: int = 1,
+    max_tokens: int = MAX_TOKENS,
+    overlap: int = OVERLAP_TOKENS,
+) -> dict:
+    """
+    Write chunks.jsonl for a reference, one JSON object per chunk.
+
+    Only files whose content changed since the previous run (with the same
+    settings) are re-chunked; the rest are copied from the previous output.
+    """
+    raw = reference_dir / "raw"
+    out_path = reference_dir / CHUNKS_FILE
+    state_path = reference_dir / CHUNKS_STATE_FILE
+
+    settings = {"max_tokens": max_tokens, "overlap": overlap}
+    previous = _load_state(state_path)
+    if previous.get("settings") != settings or not out_path.exists():
+        previous = {}
+    previous_files = previous.get("files", {})
+
+    if previous_files and _unchanged(manifest, previous_files):
+        # Nothing to re-chunk: keep chunks.jsonl, and its mtime, as it is
+        return {
+            "files": len(previous_files),
+            "chunked": 0,
+            "reused": len(previous_files),
+            "chunks": sum(f["chunks"] for f in previous_files.values()),
+        }
+
+    tasks = _tasks(raw, manifest, previous_files, max_tokens, overlap)
+
+    stats = {"files": 0, "chunked": 0, "reused": 0, "chunks": 0}
+    files_state: dict[str, dict] = {}
+    tmp_path = out_path.with_name(out_path.name + ".tmp")
+
+    pool = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+    try:
+        results = _imap_batched(pool, _chunk_batch, tasks)
+        with tmp_path.open("wb") as out, _open_optional(out_path) as old:
+            for rel, file_state, payload in results:
+                offset = out.tell()
+
+                if payload is None:
+                    prior = previous_files[rel]
+                    old.seek(prior["offset"])
+                    out.write(old.read(prior["length"]))
+                    file_state["chunks"] = prior["chunks"]
+                    stats["reused"] += 1
+                else:
+                    out.write(payload)
+                    stats["chunked"] += 1
+
+                file_state["offset"] = offset
+                file_state["length"] = out.tell() - offset
+                files_state[rel] = file_state
+                stats["files"] += 1
+                stats["chunks"] += file_state["chunks"]
+    finally:
+        if pool:
+            pool.shutdown()
+
+    os.replace(tmp_path, out_path)
+    state_path.write_text(json.dumps({"settings": settings, "files": files_state}))
+    return stats
+
+
+def _tasks(
+    raw: Path,
+    manifest: dict,
+    previous_files: dict,
+    max_tokens: int,
+    overlap: int,
+) -> Iterator[tuple]:
+    for entry in manifest["files"]:
+        if not is_text_candidate(entry):
+            continue
+        rel = entry["path"]
+        yield (
+            str(raw / rel),
+            rel,
+            entry,
+            previous_files.get(rel),
+            max_tokens,
+            overlap,
+        )
+
+
+def _unchanged(manifest: dict, previous_files: dict) -> bool:
+    """
+    Whether the manifest lists exactly the previously chunked files, each
+    with the same size and mtime.
+    """
+    seen = 0
+    for entry in manifest["files"]:
+        if not is_text_candidate(entry):
+            continue
+        prior = previous_files.get(entry["path"])
+        if not prior or (prior["size"], prior["mtime_ns"]) != (
+            entry["size"],
+            entry["mtime_ns"],
+        ):
+            return False
+        seen += 1
+    return seen == len(previous_files)
+
+
+def _chunk_batch(batch: list[tuple]) -> list[tuple]:
+    return [_chunk_file(*task) for task in batch]
+
+
+def _chunk_file(
+    path: str,
+    rel: str,
+    entry: dict,
+    prior: dict | None,
+    max_tokens: int,
+    overlap: int,
+) -> tuple[str, dict, bytes | None]:
+    """
+    Return (rel, state, payload), where payload is the encoded JSONL for the
+    file or None when the previous output can be reused.
+    """
+    file_state = {"size": entry["size"], "mtime_ns": entry["mtime_ns"]}
+
+    if prior and (prior["size"], prior["mtime_ns"]) == (
+        entry["size"],
+        entry["mtime_ns"],
+    ):
+        file_state["sha256"] = prior["sha256"]
+        return rel, file_state, None
+
+    data = Path(path).read_bytes()
+    sha256 = hashlib.sha256(data).hexdigest()
+    file_state["sha256"] = sha256
+
+    if prior and prior["sha256"] == sha256:
+        return rel, file_state, None
+
+    if looks_binary(data):
+        file_state["chunks"] = 0
+        return rel, file_state, b""
+
+    text = data.decode("utf-8", errors="ignore").replace("\r\n", "\n")
+    lines = text.split("\n")
+    kind = chunk_kind(entry["ext"])
+
+    records = []
+    for start, end in split_text(text, kind, max_tokens, overlap):
+        body = "\n".join(lines[start:end]).strip("\n")
+        record = {
+            "id": f"{rel}:{start + 1}-{end}",
+            "path": rel,
+            "start_line": start + 1,
+            "end_line": end,
+            "kind": kind,
+            "tokens": count_tokens(body),
+            "sha256": hashlib.sha256(body.encode("utf-8")).hexdigest(),
+            "text": body,
+        }
+        records.append(json.dumps(record, ensure_ascii=False) + "\n")
+
+    file_state["chunks"] = len(records)
+    return rel, file_state, "".join(records).encode("utf-8")
+
+
+def _imap_batched(
+    pool: Executor | None,
+    fn: Callable[[list], list],
+    items: Iterable,
+) -> Iterator:
+    """
+    Map fn over batches of items in order, keeping a bounded number of
+    batches in flight so memory stays flat however large the input is.
+    """
+    batches = _batched(items, BATCH_SIZE)
+
+    if pool is None:
+        for batch in batches:
+            yield from fn(batch)
+        return
+
+    pending = deque()
+    for batch in batches:
+        pending.append(pool.submit(fn, batch))
+        if len(pending) >= MAX_PENDING_BATCHES:
+            yield from pending.popleft().result()
+    while pending:
+        yield from pending.popleft().result()
+
+
+def _batched(items: Iterable, size: int) -> Iterator[list]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _open_optional(path: Path):
+    return path.open("rb") if path.exists() else nullcontext()
+
+
+def _load_state(path: Path) -> dict:
+    if not path.exists():
+        return {}
+    try:
+        return json.loads(path.read_text())
+    except json.JSONDecodeError:
+        return {}
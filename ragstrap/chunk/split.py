@@ -0,0 +1,149 @@
+import re
+
+TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+HEADING_RE = re.compile(r"^#{1,6}\s")
+FENCE_RE = re.compile(r"^\s*(```|~~~)")
+
+# Top-level definitions across the languages ragstrap recognizes
+DEFINITION_RE = re.compile(
+    r"^(?:"
+    r"(?:async\s+)?def\s|class\s|@"
+    r"|(?:pub(?:\([^)]*\))?\s+)?(?:async\s+)?"
+    r"(?:fn|struct|enum|trait|impl|mod|macro_rules!)\b"
+    r"|impl\b|func\s|type\s"
+    r"|(?:export\s+)?(?:default\s+)?(?:async\s+)?(?:function|class|interface|enum)\b"
+    r")"
+)
+
+MARKDOWN_EXTENSIONS = {".md", ".markdown", ".mdx", ".rst"}
+
+CODE_EXTENSIONS = {
+    ".py",
+    ".rs",
+    ".go",
+    ".js",
+    ".jsx",
+    ".mjs",
+    ".cjs",
+    ".ts",
+    ".tsx",
+}
+
+
+def count_tokens(text: str) -> int:
+    """
+    Approximate model tokens by counting words and punctuation.
+    """
+    return len(TOKEN_RE.findall(text))
+
+
+def chunk_kind(ext: str) -> str:
+    if ext in MARKDOWN_EXTENSIONS:
+        return "markdown"
+    if ext in CODE_EXTENSIONS:
+        return "code"
+    return "text"
+
+
+def section_starts(lines: list[str], kind: str) -> list[int]:
+    """
+    Return the line indexes where a new section begins: headings for
+    Markdown, top-level definitions for code and paragraphs for text.
+    """
+    starts = [0]
+
+    if kind == "markdown":
+        in_fence = False
+        for i, line in enumerate(lines):
+            if FENCE_RE.match(line):
+                in_fence = not in_fence
+            elif not in_fence and i and HEADING_RE.match(line):
+                starts.append(i)
+    elif kind == "code":
+        for i, line in enumerate(lines):
+            # Keep decorators attached to the definition that follows them
+            if i and DEFINITION_RE.match(line) and not lines[i - 1].startswith("@"):
+                starts.append(i)
+    else:
+        for i, line in enumerate(lines):
+            if i and line.strip() and not lines[i - 1].strip():
+                starts.append(i)
+
+    return starts
+
+
+def split_text(
+    text: str,
+    kind: str,
+    max_tokens: int,
+    overlap: int,
+) -> list[tuple[int, int]]:
+    """
+    Split text into (start, end) line ranges, zero-based and end-exclusive.
+
+    Whole sections are packed together up to max_tokens; a section that is
+    larger on its own is cut into windows that overlap by up to overlap
+    tokens.
+    """
+    lines = text.split("\n")
+    tokens = [count_tokens(line) for line in lines]
+    starts = section_starts(lines, kind)
+    bounds = [*starts[1:], len(lines)]
+
+    ranges: list[tuple[int, int]] = []
+    current = None
+    current_tokens = 0
+
+    for start, end in zip(starts, bounds):
+        size = sum(tokens[start:end])
+
+        if size > max_tokens:
+            if current:
+                ranges.append(current)
+                current = None
+            ranges.extend(_windows(tokens, start, end, max_tokens, overlap))
+            continue
+
+        if current and current_tokens + size <= max_tokens:
+            current = (current[0], end)
+            current_tokens += size
+        else:
+            if current:
+                ranges.append(current)
+            current = (start, end)
+            current_tokens = size
+
+    if current:
+        ranges.append(current)
+
+    return [(s, e) for s, e in ranges if any(lines[i].strip() for i in range(s, e))]
+
+
+def _windows(
+    tokens: list[int],
+    start: int,
+    end: int,
+    max_tokens: int,
+    overlap: int,
+) -> list[tuple[int, int]]:
+    windows = []
+    pos = start
+    while pos < end:
+        stop = pos
+        used = 0
+        while stop < end and (stop == pos or used + tokens[stop] <= max_tokens):
+            used += tokens[stop]
+            stop += 1
+        windows.append((pos, stop))
+        if stop >= end:
+            break
+
+        # Step back over trailing lines so consecutive windows share context
+        back = stop
+        carried = 0
+        while back - 1 > pos and carried + tokens[back - 1] <= overlap:
+            back -= 1
+            carried += tokens[back]
+        pos = back
+    return windows
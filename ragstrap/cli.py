@@ -1,21 +1,26 @@
 import json
+import os
 import shutil
+import time
+from contextlib import contextmanager
 from datetime import datetime
-from importlib.metadata import version
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 import typer
-from requests import HTTPError
 from rich import print
+from rich.markup import escape
 
-from ragstrap.cli_capture.policy import should_auto_capture_cli
-from ragstrap.cli_capture.rust import capture_help, cargo_build
-from ragstrap.cli_detect.rust import is_rust_cli
-from ragstrap.examples.harvest import harvest_examples
-from ragstrap.fetch.github import fetch_repo_recursive
-from ragstrap.fetch.github_archive import download_repo_archive
-from ragstrap.index.generate import generate_index
-from ragstrap.util.github import parse_github_repo
+# Commands import their dependencies when they run, so that metadata
+# commands like `list --json` don't pay for requests, tarfile, sqlite3 or
+# multiprocessing at startup. benchmarks/startup.py guards this.
+if TYPE_CHECKING:
+    import requests
+
+    from ragstrap.fetch.filters import MemberFilter
+    from ragstrap.util.timings import Timings
+
+DEFAULT_JOBS = os.cpu_count() or 1
 
 app = typer.Typer(
     help="ragstrap — bootstrap authoritative references for external tools",
@@ -43,6 +48,14 @@ def _read_meta_optional(reference_dir: Path) -> dict | None:
         return None
 
 
+def _update_catalog(reference_dir: Path):
+    from ragstrap.store.catalog import upsert_reference
+
+    upsert_reference(
+        reference_dir.parent, reference_dir.name, _read_meta_optional(reference_dir)
+    )
+
+
 def _format_optional_list(value: object) -> str | None:
     if value is None:
         return None
@@ -52,6 +65,11 @@ def _format_optional_list(value: object) -> str | None:
     return str(value)
 
 
+def _print_json(payload: object):
+    # Bypass rich so long values aren't wrapped or parsed as markup
+    typer.echo(json.dumps(payload, indent=2))
+
+
 def _reset_dir(path: Path):
     _remove_path(path)
     path.mkdir(parents=True, exist_ok=True)
@@ -66,8 +84,203 @@ def _remove_path(path: Path):
         path.unlink()
 
 
+def _format_bytes(size: float) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+def _print_archive_stats(stats: dict, log=print):
+    parts = [
+        f"{stats['files']} files",
+        _format_bytes(stats["bytes"]),
+        f"{stats['seconds']:.2f}s",
+    ]
+    if stats.get("cache") == "hit":
+        parts.append("from cache")
+    if stats.get("downloaded") is not None:
+        parts.append(f"{stats['downloaded']} downloaded")
+    if stats.get("first_file_seconds") is not None:
+        parts.append(f"first file after {stats['first_file_seconds']:.2f}s")
+    if stats.get("peak_rss_bytes") is not None:
+        parts.append(f"peak RSS {_format_bytes(stats['peak_rss_bytes'])}")
+    log(f"[dim]Extracted {', '.join(parts)}[/dim]")
+
+    skipped = stats.get("skipped")
+    if skipped:
+        reasons = ", ".join(
+            f"{entry['files']} {reason.replace('_', ' ')}"
+            for reason, entry in sorted(skipped.items())
+        )
+        total = sum(entry["bytes"] for entry in skipped.values())
+        log(f"[dim]Skipped {reasons} ({_format_bytes(total)})[/dim]")
+
+
+def _resolve_commit(
+    owner: str,
+    repo: str,
+    offline: bool,
+    etag: str | None = None,
+    session: "requests.Session | None" = None,
+) -> tuple[str | None, str | None]:
+    from ragstrap.fetch.cache import cache_dir, latest_cached_commit
+    from ragstrap.fetch.github_archive import resolve_head
+
+    if not offline:
+        return resolve_head(owner, repo, etag=etag, session=session)
+
+    commit = latest_cached_commit(cache_dir(), owner, repo)
+    if commit is None:
+        raise typer.Abort(f"No cached archive for {owner}/{repo}")
+    return commit, None
+
+
+def _filter_settings(
+    include: list[str] | None,
+    exclude: list[str] | None,
+    max_file_size: str | None,
+    skip_binary: bool | None,
+    previous: dict | None = None,
+) -> dict:
+    from ragstrap.fetch.cache import parse_size
+    from ragstrap.fetch.filters import default_filters
+
+    settings = {**default_filters(), **(previous or {})}
+    if include:
+        settings["include"] = include
+    if exclude:
+        settings["exclude"] = exclude
+    if max_file_size is not None:
+        try:
+            settings["max_file_size"] = parse_size(max_file_size) or None
+        except ValueError as exc:
+            raise typer.Abort(str(exc)) from exc
+    if skip_binary is not None:
+        settings["skip_binary"] = skip_binary
+    return settings
+
+
+def _download_sparse(
+    owner: str,
+    repo: str,
+    commit: str,
+    paths: list[str],
+    base: Path,
+    delta: bool = False,
+    session: "requests.Session | None" = None,
+    filters: "MemberFilter | None" = None,
+) -> dict:
+    from ragstrap.fetch.github import TREE_FILE, fetch_repo_sparse
+
+    tree_path = base / TREE_FILE
+    previous = None
+    if delta and tree_path.exists():
+        try:
+            previous = json.loads(tree_path.read_text())
+        except json.JSONDecodeError:
+            previous = None
+
+    stats = fetch_repo_sparse(
+        owner,
+        repo,
+        commit,
+        paths,
+        base / "raw",
+        previous=previous,
+        session=session,
+        filters=filters,
+    )
+    tree_path.write_text(json.dumps(stats.pop("blobs"), indent=2))
+    return stats
+
+
+def _capture_message(capture: dict) -> str:
+    if capture["captured"]:
+        return "[green]CLI help captured[/green]"
+    if capture["built"]:
+        return "[green]CLI help unchanged[/green] [dim](binary identical)[/dim]"
+    return (
+        "[green]CLI help unchanged[/green] "
+        "[dim](sources unchanged, build skipped)[/dim]"
+    )
+
+
+def _print_rate_budget(log=print):
+    from ragstrap.util.http import default_limiter
+
+    budget = default_limiter().budget()
+    if budget["remaining"] is None:
+        return
+    reset = ""
+    if budget["reset_at"]:
+        reset_at = time.localtime(budget["reset_at"])
+        reset = f", resets at {time.strftime('%H:%M:%S', reset_at)}"
+    log(
+        f"[dim]GitHub API budget: {budget['remaining']}/{budget['limit']} "
+        f"requests left{reset}[/dim]"
+    )
+
+
+@contextmanager
+def _reference_lock(reference_dir: Path, create: bool = True):
+    from ragstrap.store.lock import ReferenceLock, ReferenceLocked
+
+    lock = ReferenceLock(reference_dir, create=create)
+    try:
+        lock.acquire()
+    except (ReferenceLocked, FileNotFoundError) as exc:
+        raise typer.Abort(str(exc)) from exc
+    try:
+        yield
+    finally:
+        lock.release()
+
+
+def _files_written(stats: dict) -> int:
+    if stats.get("downloaded") is not None:
+        return stats["downloaded"]
+    if stats.get("changes") is not None:
+        return len(stats["changes"]["added"]) + len(stats["changes"]["modified"])
+    return stats["files"]
+
+
+def _record_stats(reference_dir: Path, timings: "Timings"):
+    meta = _read_meta_optional(reference_dir)
+    if meta is None:
+        return
+    meta["stats"] = timings.summary()
+    # Only now are the derived artifacts in step with the fetched commit
+    meta["built_commit"] = meta.get("commit")
+    (reference_dir / "meta.json").write_text(json.dumps(meta, indent=2))
+    _update_catalog(reference_dir)
+
+
+def _print_timings(timings: "Timings", log=print):
+    log(
+        f"[dim]{'stage':<16} {'wall':>8} {'cpu':>8} {'transferred':>12} "
+        f"{'written':>8} {'RSS growth':>10}[/dim]"
+    )
+    for record in timings.stages:
+        transferred = record.get("transferred_bytes")
+        written = record.get("files_written")
+        rss = record.get("peak_rss_growth_bytes")
+        log(
+            f"[dim]{record['name']:<16} {record['seconds']:>7.2f}s "
+            f"{record['cpu_seconds']:>7.2f}s "
+            f"{_format_bytes(transferred) if transferred is not None else '-':>12} "
+            f"{written if written is not None else '-':>8} "
+            f"{_format_bytes(rss) if rss is not None else '-':>10}[/dim]"
+        )
+    total = sum(record["seconds"] for record in timings.stages)
+    log(f"[dim]{'total':<16} {total:>7.2f}s[/dim]")
+
+
 def _version_callback(value: bool):
     if value:
+        from importlib.metadata import version
+
         print(version("ragstrap"))
         raise typer.Exit()
 
@@ -82,12 +295,274 @@ def fetch(
         "--capture-cli/--no-capture-cli",
         help="Capture CLI --help output (auto by default when safe)",
     ),
+    cli_depth: int | None = typer.Option(
+        None,
+        "--cli-depth",
+        min=0,
+        help="How many levels of subcommands to capture help for (default 3)",
+    ),
+    buffer_size: int | None = typer.Option(
+        None,
+        "--buffer-size",
+        min=64 * 1024,
+        help="Maximum bytes buffered while streaming the archive to disk "
+        "(default 1 MiB)",
+    ),
+    jobs: int = typer.Option(
+        DEFAULT_JOBS,
+        "--jobs",
+        "-j",
+        min=1,
+        help="Worker processes for symbol parsing and example harvesting",
+    ),
+    dedupe: bool = typer.Option(
+        False,
+        "--dedupe/--no-dedupe",
+        help="Hardlink files from the shared references/.objects store",
+    ),
+    offline: bool = typer.Option(
+        False,
+        "--offline",
+        help="Build only from the local archive cache, without network access",
+    ),
+    paths: list[str] | None = typer.Option(
+        None,
+        "--paths",
+        help="Only fetch files matching this glob (repeatable), e.g. 'docs/**'",
+    ),
+    include: list[str] | None = typer.Option(
+        None,
+        "--include",
+        help="Only extract files matching this glob (repeatable)",
+    ),
+    exclude: list[str] | None = typer.Option(
+        None,
+        "--exclude",
+        help="Never extract files matching this glob (repeatable)",
+    ),
+    max_file_size: str | None = typer.Option(
+        None,
+        "--max-file-size",
+        help="Skip files larger than this, e.g. 5M (default 10M; 0 disables)",
+    ),
+    skip_binary: bool | None = typer.Option(
+        None,
+        "--skip-binary/--keep-binary",
+        help="Skip binary files, detected by extension and content (default)",
+    ),
+    show_timings: bool = typer.Option(
+        False,
+        "--timings",
+        help="Show wall time, CPU time, transfer and memory per stage",
+    ),
+    trace: Path | None = typer.Option(
+        None,
+        "--trace",
+        help="Write per-stage timings as a Chrome trace (chrome://tracing, Perfetto)",
+    ),
 ):
     """
     Fetch and build a local reference for a library.
     """
+    from ragstrap.util.http import RateLimitError
+    from ragstrap.util.timings import Timings, write_trace
 
+    timings = Timings(name or source)
+    try:
+        _fetch_reference(
+            source,
+            name,
+            force,
+            capture_cli,
+            buffer_size,
+            jobs=jobs,
+            dedupe=dedupe,
+            offline=offline,
+            paths=paths,
+            filters=_filter_settings(include, exclude, max_file_size, skip_binary),
+            cli_depth=cli_depth,
+            timings=timings,
+        )
+    except RateLimitError as exc:
+        raise typer.Abort(str(exc)) from exc
+    finally:
+        if trace:
+            write_trace(trace, [timings])
+
+    if show_timings:
+        _print_timings(timings)
+
+
+@app.command("fetch-many")
+def fetch_many(
+    manifest: Path,
+    jobs: int = typer.Option(4, "--jobs", "-j", min=1, help="Concurrent fetches"),
+    force: bool = typer.Option(False, "--force", "-f"),
+    capture_cli: bool | None = typer.Option(
+        None,
+        "--capture-cli/--no-capture-cli",
+        help="Capture CLI --help output (auto by default when safe)",
+    ),
+    cli_depth: int | None = typer.Option(
+        None,
+        "--cli-depth",
+        min=0,
+        help="How many levels of subcommands to capture help for (default 3)",
+    ),
+    buffer_size: int | None = typer.Option(
+        None,
+        "--buffer-size",
+        min=64 * 1024,
+        help="Maximum bytes buffered while streaming each archive to disk "
+        "(default 1 MiB)",
+    ),
+    dedupe: bool = typer.Option(
+        False,
+        "--dedupe/--no-dedupe",
+        help="Hardlink files from the shared references/.objects store",
+    ),
+    offline: bool = typer.Option(
+        False,
+        "--offline",
+        help="Build only from the local archive cache, without network access",
+    ),
+    include: list[str] | None = typer.Option(
+        None,
+        "--include",
+        help="Only extract files matching this glob (repeatable)",
+    ),
+    exclude: list[str] | None = typer.Option(
+        None,
+        "--exclude",
+        help="Never extract files matching this glob (repeatable)",
+    ),
+    max_file_size: str | None = typer.Option(
+        None,
+        "--max-file-size",
+        help="Skip files larger than this, e.g. 5M (default 10M; 0 disables)",
+    ),
+    skip_binary: bool | None = typer.Option(
+        None,
+        "--skip-binary/--keep-binary",
+        help="Skip binary files, detected by extension and content (default)",
+    ),
+    show_timings: bool = typer.Option(
+        False,
+        "--timings",
+        help="Show wall time, CPU time, transfer and memory per stage",
+    ),
+    trace: Path | None = typer.Option(
+        None,
+        "--trace",
+        help="Write per-stage timings as a Chrome trace (chrome://tracing, Perfetto)",
+    ),
+):
+    """
+    Fetch every reference listed in a TOML or JSON manifest.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    from ragstrap.fetch.batch import load_fetch_manifest
+    from ragstrap.util.http import create_session
+    from ragstrap.util.timings import Timings, write_trace
+
+    try:
+        entries = load_fetch_manifest(manifest)
+    except (OSError, ValueError) as exc:
+        raise typer.Abort(f"Could not read manifest: {exc}") from exc
+
+    filters = _filter_settings(include, exclude, max_file_size, skip_binary)
+    session = create_session(pool_size=jobs)
+
+    def run(entry: dict) -> dict:
+        label = entry["name"] or entry["source"]
+        started = time.monotonic()
+        result = {"source": entry["source"], "name": entry["name"]}
+        timings = Timings(label)
+        try:
+            stats = _fetch_reference(
+                entry["source"],
+                entry["name"],
+                force,
+                capture_cli,
+                buffer_size,
+                session=session,
+                log=lambda msg: print(f"[cyan]{label}[/cyan] {msg}"),
+                dedupe=dedupe,
+                offline=offline,
+                paths=entry["paths"],
+                filters=filters,
+                cli_depth=cli_depth,
+                timings=timings,
+            )
+            result["ok"] = True
+            result["files"] = stats["files"]
+            result["bytes"] = stats["bytes"]
+        except Exception as exc:
+            result["ok"] = False
+            result["error"] = str(exc) or type(exc).__name__
+        result["seconds"] = time.monotonic() - started
+        result["timings"] = timings
+        return result
+
+    with session, ThreadPoolExecutor(max_workers=jobs) as pool:
+        results = [*pool.map(run, entries)]
+
+    if trace:
+        write_trace(trace, [result["timings"] for result in results])
+
+    print("[bold]Summary[/bold]")
+    for result in results:
+        label = result["name"] or result["source"]
+        if result["ok"]:
+            print(
+                f"[green]ok[/green]     {label} — {result['seconds']:.1f}s, "
+                f"{result['files']} files, {_format_bytes(result['bytes'])}"
+            )
+        else:
+            print(
+                f"[red]failed[/red] {label} — {result['seconds']:.1f}s: "
+                f"{result['error']}"
+            )
+        if show_timings:
+            _print_timings(result["timings"])
+
+    failed = sum(1 for r in results if not r["ok"])
+    print(f"{len(results) - failed} succeeded, {failed} failed")
+    _print_rate_budget()
+    if failed:
+        raise typer.Exit(1)
+
+
+def _fetch_reference(
+    source: str,
+    name: str | None,
+    force: bool,
+    capture_cli: bool | None,
+    buffer_size: int | None,
+    session: "requests.Session | None" = None,
+    log=print,
+    jobs: int = 1,
+    dedupe: bool = False,
+    offline: bool = False,
+    paths: list[str] | None = None,
+    filters: dict | None = None,
+    cli_depth: int | None = None,
+    timings: "Timings | None" = None,
+) -> dict:
+    from importlib.metadata import version
+
+    from ragstrap.fetch.filters import MemberFilter, default_filters
+    from ragstrap.fetch.github import TREE_FILE
+    from ragstrap.fetch.github_archive import BUFFER_SIZE, download_repo_archive
+    from ragstrap.store.objects import objects_dir
+    from ragstrap.util.github import parse_github_repo
+    from ragstrap.util.timings import Timings
+
+    timings = timings or Timings()
     owner, repo = parse_github_repo(source)
+    filters = filters or default_filters()
+    buffer_size = buffer_size or BUFFER_SIZE
     ref_name = name or repo
 
     base = Path("references") / ref_name
@@ -95,59 +570,360 @@ def fetch(
 
     if base.exists() and not force:
         raise typer.Abort(f"Reference '{ref_name}' already exists (use --force)")
+    if paths and (dedupe or offline):
+        raise typer.Abort("--paths cannot be combined with --dedupe or --offline")
 
-    raw.mkdir(parents=True, exist_ok=True)
+    log(f"[bold]Fetching {owner}/{repo}[/bold]")
 
-    print(f"[bold]Fetching {owner}/{repo}[/bold]")
+    with _reference_lock(base):
+        with timings.stage("resolve"):
+            commit, commit_etag = _resolve_commit(
+                owner, repo, offline, session=session
+            )
 
-    print("[bold]Downloading repository archive[/bold]")
-    download_repo_archive(owner, repo, raw)
+        # Start from a clean snapshot; raw/ may hold read-only links into the store
+        _reset_dir(raw)
+
+        with timings.stage("download") as stage:
+            if paths:
+                log(
+                    f"[bold]Downloading files matching "
+                    f"{escape(', '.join(paths))}[/bold]"
+                )
+                stats = _download_sparse(
+                    owner,
+                    repo,
+                    commit,
+                    paths,
+                    base,
+                    session=session,
+                    filters=MemberFilter(**filters),
+                )
+            else:
+                _remove_path(base / TREE_FILE)
+                log("[bold]Downloading repository archive[/bold]")
+                stats = download_repo_archive(
+                    owner,
+                    repo,
+                    raw,
+                    ref=commit,
+                    buffer_size=buffer_size,
+                    session=session,
+                    objects=objects_dir(base.parent) if dedupe else None,
+                    offline=offline,
+                    filters=MemberFilter(**filters),
+                )
+            stage["transferred_bytes"] = stats.get("transferred")
+            stage["files_written"] = _files_written(stats)
+        _print_archive_stats(stats, log)
+
+        meta = {
+            "name": ref_name,
+            "source": source,
+            "owner": owner,
+            "repo": repo,
+            "commit": commit,
+            "commit_etag": commit_etag,
+            "built_commit": None,
+            "archive_etag": stats["etag"],
+            "dedupe": dedupe,
+            "paths": paths or None,
+            "filters": filters,
+            "skipped": stats.get("skipped", {}),
+            "languages": stats["languages"],
+            "fetched_at": datetime.utcnow().isoformat() + "Z",
+            "ragstrap_version": version("ragstrap"),
+        }
 
-    meta = {
-        "name": ref_name,
-        "source": source,
-        "owner": owner,
-        "repo": repo,
-        "fetched_at": datetime.utcnow().isoformat() + "Z",
-        "ragstrap_version": version("ragstrap"),
-    }
+        (base / "meta.json").write_text(json.dumps(meta, indent=2))
 
-    (base / "meta.json").write_text(json.dumps(meta, indent=2))
+        _process_reference(base, capture_cli, cli_depth, jobs, timings, log)
+        return stats
+
+
+def _process_reference(
+    base: Path,
+    capture_cli: bool | None,
+    cli_depth: int | None,
+    jobs: int,
+    timings: "Timings",
+    log=print,
+):
+    """
+    Rebuild everything derived from raw/: manifest, index, search index, CLI
+    help and examples. Records the run's stats in meta.json.
+    """
+    from ragstrap.cli_capture.policy import should_auto_capture_cli
+    from ragstrap.cli_capture.rust import build_and_capture
+    from ragstrap.examples.harvest import harvest_examples
+    from ragstrap.index.generate import generate_index
+    from ragstrap.index.manifest import scan_tree, write_manifest
+    from ragstrap.search.index import update_search_index
+    from ragstrap.symbols.index import update_symbol_index
+
+    raw = base / "raw"
+
+    with timings.stage("manifest"):
+        manifest = scan_tree(raw)
+        write_manifest(base, manifest)
+
+    with timings.stage("generate_index"):
+        generate_index(base, manifest)
+        _update_catalog(base)
+    log("[green]Index generated[/green]")
+
+    with timings.stage("search_index"):
+        search_stats = update_search_index(base, manifest)
+    log(
+        f"[green]Search index updated[/green] "
+        f"[dim]({search_stats['indexed']} indexed, "
+        f"{search_stats['removed']} removed)[/dim]"
+    )
 
-    generate_index(base)
-    print("[green]Index generated[/green]")
+    with timings.stage("symbols"):
+        symbol_stats = update_symbol_index(base, manifest, jobs=jobs)
+    log(
+        f"[green]Symbols indexed[/green] "
+        f"[dim]({symbol_stats['parsed']} parsed, "
+        f"{symbol_stats['removed']} removed)[/dim]"
+    )
 
     do_capture = capture_cli is True or (
-        capture_cli is None and should_auto_capture_cli(raw)
+        capture_cli is None and should_auto_capture_cli(raw, manifest)
     )
 
     if do_capture:
-        print("[bold]Capturing CLI help output[/bold]")
-        binary = cargo_build(raw)
-        capture_help(binary, base / "cli")
-        print("[green]CLI help captured[/green]")
+        log("[bold]Capturing CLI help output[/bold]")
+        capture = build_and_capture(
+            raw, base, max_depth=cli_depth, timings=timings
+        )
+        log(_capture_message(capture))
     else:
-        print("[dim]Skipping CLI help capture[/dim]")
+        _remove_path(base / "cli")
+        log("[dim]Skipping CLI help capture[/dim]")
 
     examples_dir = base / "examples"
-    harvest_examples(raw, examples_dir)
-    print("[green]Examples harvested[/green]")
-
-    print("[green]Done[/green]")
+    with timings.stage("harvest_examples") as stage:
+        harvest = harvest_examples(raw, examples_dir, manifest, jobs=jobs)
+        stage["files_written"] = harvest["written"]
+    log("[green]Examples harvested[/green]")
+
+    _record_stats(base, timings)
+    log("[green]Done[/green]")
+
+
+def _process_in_worker(
+    base: Path,
+    capture_cli: bool | None,
+    cli_depth: int | None,
+    label: str,
+    stages: list[dict],
+) -> list[dict]:
+    """
+    _process_reference for a process pool: timings can't be pickled, so
+    stages recorded so far go in and the completed list comes back.
+    """
+    from ragstrap.util.timings import Timings
+
+    timings = Timings(label)
+    timings.stages.extend(stages)
+    _process_reference(
+        base,
+        capture_cli,
+        cli_depth,
+        1,
+        timings,
+        log=lambda msg: print(f"[cyan]{label}[/cyan] {msg}"),
+    )
+    return timings.stages
 
 
 @app.command()
 def update(
-    name: str,
+    name: str | None = typer.Argument(
+        None, help="Reference to update (omit when using --all)"
+    ),
+    update_all: bool = typer.Option(
+        False,
+        "--all",
+        help="Update every reference, least recently checked first",
+    ),
+    older_than: str | None = typer.Option(
+        None,
+        "--older-than",
+        help="With --all, only references not checked since then "
+        "(ISO date or e.g. 7d, 12h)",
+    ),
+    report: Path | None = typer.Option(
+        None,
+        "--report",
+        help="With --all, write a JSON run report to this file",
+    ),
     capture_cli: bool | None = typer.Option(
         None,
         "--capture-cli/--no-capture-cli",
         help="Capture CLI --help output (auto by default when safe)",
     ),
+    cli_depth: int | None = typer.Option(
+        None,
+        "--cli-depth",
+        min=0,
+        help="How many levels of subcommands to capture help for (default 3)",
+    ),
+    buffer_size: int | None = typer.Option(
+        None,
+        "--buffer-size",
+        min=64 * 1024,
+        help="Maximum bytes buffered while streaming the archive to disk "
+        "(default 1 MiB)",
+    ),
+    jobs: int = typer.Option(
+        DEFAULT_JOBS,
+        "--jobs",
+        "-j",
+        min=1,
+        help="Worker processes for symbol parsing and example harvesting; with "
+        "--all, concurrent downloads and post-processing processes",
+    ),
+    force: bool = typer.Option(
+        False,
+        "--force",
+        "-f",
+        help="Rebuild even if upstream has not changed",
+    ),
+    delta: bool = typer.Option(
+        True,
+        "--delta/--full",
+        help="Rewrite only changed files (default) or re-extract everything",
+    ),
+    dedupe: bool | None = typer.Option(
+        None,
+        "--dedupe/--no-dedupe",
+        help="Hardlink files from the shared references/.objects store "
+        "(defaults to the setting used at fetch time)",
+    ),
+    offline: bool = typer.Option(
+        False,
+        "--offline",
+        help="Build only from the local archive cache, without network access",
+    ),
+    include: list[str] | None = typer.Option(
+        None,
+        "--include",
+        help="Only extract files matching this glob (repeatable)",
+    ),
+    exclude: list[str] | None = typer.Option(
+        None,
+        "--exclude",
+        help="Never extract files matching this glob (repeatable)",
+    ),
+    max_file_size: str | None = typer.Option(
+        None,
+        "--max-file-size",
+        help="Skip files larger than this, e.g. 5M "
+        "(defaults to the setting used at fetch time)",
+    ),
+    skip_binary: bool | None = typer.Option(
+        None,
+        "--skip-binary/--keep-binary",
+        help="Skip binary files, detected by extension and content "
+        "(defaults to the setting used at fetch time)",
+    ),
+    show_timings: bool = typer.Option(
+        False,
+        "--timings",
+        help="Show wall time, CPU time, transfer and memory per stage",
+    ),
+    trace: Path | None = typer.Option(
+        None,
+        "--trace",
+        help="Write per-stage timings as a Chrome trace (chrome://tracing, Perfetto)",
+    ),
 ):
     """
-    Update an existing reference.
+    Update an existing reference, or all of them with --all.
     """
+    from ragstrap.util.http import RateLimitError
+    from ragstrap.util.timings import Timings, write_trace
+
+    if update_all == bool(name):
+        raise typer.BadParameter("Pass either a reference name or --all")
+    if not update_all and (older_than or report):
+        raise typer.BadParameter("--older-than and --report require --all")
+
+    options = {
+        "buffer_size": buffer_size,
+        "force": force,
+        "delta": delta,
+        "dedupe": dedupe,
+        "offline": offline,
+        "include": include,
+        "exclude": exclude,
+        "max_file_size": max_file_size,
+        "skip_binary": skip_binary,
+    }
+
+    if update_all:
+        _update_all(
+            older_than,
+            jobs,
+            capture_cli,
+            cli_depth,
+            options,
+            report=report,
+            show_timings=show_timings,
+            trace=trace,
+        )
+        return
+
+    timings = Timings(name)
+    try:
+        with _reference_lock(Path("references") / name, create=False):
+            outcome = _update_download(name, timings=timings, **options)
+            _print_rate_budget()
+            if outcome["changed"]:
+                _process_reference(
+                    Path("references") / name, capture_cli, cli_depth, jobs, timings
+                )
+    except RateLimitError as exc:
+        raise typer.Abort(str(exc)) from exc
+    finally:
+        if trace:
+            write_trace(trace, [timings])
+
+    if show_timings:
+        _print_timings(timings)
+
+
+def _update_download(
+    name: str,
+    buffer_size: int | None,
+    force: bool,
+    delta: bool,
+    dedupe: bool | None,
+    offline: bool,
+    include: list[str] | None,
+    exclude: list[str] | None,
+    max_file_size: str | None,
+    skip_binary: bool | None,
+    timings: "Timings",
+    session: "requests.Session | None" = None,
+    log=print,
+) -> dict:
+    """
+    Resolve upstream and, if it moved, apply the new snapshot to raw/ and
+    write meta.json. Returns {"changed", "from_commit", "to_commit"}; the
+    caller runs _process_reference when changed is true, which is also the
+    case when the last processing of the current commit didn't finish.
+    """
+    from importlib.metadata import version
+
+    from ragstrap.fetch.filters import MemberFilter
+    from ragstrap.fetch.github_archive import BUFFER_SIZE, download_repo_archive
+    from ragstrap.store.objects import objects_dir
+    from ragstrap.util.github import parse_github_repo
+
+    buffer_size = buffer_size or BUFFER_SIZE
     base = Path("references") / name
     if not base.exists():
         raise typer.Abort(f"Reference '{name}' not found")
@@ -168,57 +944,341 @@ def update(
     if not owner or not repo:
         raise typer.Abort(f"Reference '{name}' is missing owner/repo metadata")
 
+    log(f"[bold]Updating {owner}/{repo}[/bold]")
+
+    paths = meta.get("paths")
+    if paths and offline:
+        raise typer.Abort("--offline is not supported for sparse (--paths) references")
+
+    previous_commit = meta.get("commit")
+    etag = meta.get("commit_etag") if previous_commit and not force else None
+    with timings.stage("resolve"):
+        commit, commit_etag = _resolve_commit(
+            owner, repo, offline, etag=etag, session=session
+        )
+    checked_at = datetime.utcnow().isoformat() + "Z"
+
+    if not force and (commit is None or commit == previous_commit):
+        meta["checked_at"] = checked_at
+        (base / "meta.json").write_text(json.dumps(meta, indent=2))
+        _update_catalog(base)
+        # raw/ is current but indexing or harvesting failed after the last
+        # download; references from before built_commit count as built
+        built_commit = meta.get("built_commit", previous_commit)
+        if built_commit != previous_commit:
+            log(
+                "[yellow]Rebuilding: the last update didn't finish processing"
+                f"[/yellow] ({previous_commit[:12]})"
+            )
+            return {
+                "changed": True,
+                "from_commit": built_commit,
+                "to_commit": previous_commit,
+            }
+        log(f"[green]Already up to date[/green] ({previous_commit[:12]})")
+        return {
+            "changed": False,
+            "from_commit": previous_commit,
+            "to_commit": previous_commit,
+        }
+
     raw = base / "raw"
-    _reset_dir(raw)
+    changes_path = base / "changes.json"
+    if delta:
+        raw.mkdir(parents=True, exist_ok=True)
+    else:
+        _reset_dir(raw)
+        _remove_path(changes_path)
 
-    print(f"[bold]Updating {owner}/{repo}[/bold]")
-    print("[bold]Downloading repository archive[/bold]")
-    download_repo_archive(owner, repo, raw)
+    if dedupe is None:
+        dedupe = bool(meta.get("dedupe"))
+
+    filters = _filter_settings(
+        include, exclude, max_file_size, skip_binary, previous=meta.get("filters")
+    )
+
+    with timings.stage("download") as stage:
+        if paths:
+            log(f"[bold]Downloading files matching {escape(', '.join(paths))}[/bold]")
+            stats = _download_sparse(
+                owner,
+                repo,
+                commit,
+                paths,
+                base,
+                delta=delta,
+                session=session,
+                filters=MemberFilter(**filters),
+            )
+            dedupe = False
+        else:
+            log("[bold]Downloading repository archive[/bold]")
+            stats = download_repo_archive(
+                owner,
+                repo,
+                raw,
+                ref=commit,
+                buffer_size=buffer_size,
+                session=session,
+                delta=delta,
+                objects=objects_dir(base.parent) if dedupe else None,
+                offline=offline,
+                filters=MemberFilter(**filters),
+            )
+        stage["transferred_bytes"] = stats.get("transferred")
+        stage["files_written"] = _files_written(stats)
+    _print_archive_stats(stats, log)
+
+    if delta:
+        changes = stats["changes"]
+        changeset = {
+            "from_commit": previous_commit,
+            "to_commit": commit,
+            "generated_at": checked_at,
+            **changes,
+        }
+        changes_path.write_text(json.dumps(changeset, indent=2))
+        log(
+            f"[dim]{len(changes['added'])} added, "
+            f"{len(changes['modified'])} modified, "
+            f"{len(changes['removed'])} removed[/dim]"
+        )
 
     meta["owner"] = owner
     meta["repo"] = repo
     if source:
         meta["source"] = source
-    meta["fetched_at"] = datetime.utcnow().isoformat() + "Z"
+    meta["commit"] = commit
+    meta["commit_etag"] = commit_etag
+    meta["archive_etag"] = stats["etag"]
+    meta["dedupe"] = dedupe
+    meta["filters"] = filters
+    meta["skipped"] = stats.get("skipped", {})
+    meta["languages"] = stats["languages"]
+    meta["fetched_at"] = checked_at
+    meta["checked_at"] = checked_at
     meta["ragstrap_version"] = version("ragstrap")
 
     (base / "meta.json").write_text(json.dumps(meta, indent=2))
+    return {"changed": True, "from_commit": previous_commit, "to_commit": commit}
+
+
+def _update_all(
+    older_than: str | None,
+    jobs: int,
+    capture_cli: bool | None,
+    cli_depth: int | None,
+    options: dict,
+    report: Path | None = None,
+    show_timings: bool = False,
+    trace: Path | None = None,
+):
+    """
+    Update every reference, least recently checked first. Downloads run on
+    a thread pool; each finished download is handed to a process pool for
+    indexing and harvesting while the threads move on to the next one.
+    """
+    import multiprocessing
+    from concurrent.futures import (
+        ProcessPoolExecutor,
+        ThreadPoolExecutor,
+        as_completed,
+    )
 
-    generate_index(base)
-    print("[green]Index generated[/green]")
-
-    do_capture = capture_cli is True or (
-        capture_cli is None and should_auto_capture_cli(raw)
+    from ragstrap.store.catalog import (
+        catalog_path,
+        query_references,
+        rebuild_catalog,
     )
+    from ragstrap.store.lock import ReferenceLock, ReferenceLocked
+    from ragstrap.util.http import create_session
+    from ragstrap.util.timings import Timings, write_trace
 
-    cli_dir = base / "cli"
-    if do_capture:
-        print("[bold]Capturing CLI help output[/bold]")
-        binary = cargo_build(raw)
-        capture_help(binary, cli_dir)
-        print("[green]CLI help captured[/green]")
-    else:
-        _remove_path(cli_dir)
-        print("[dim]Skipping CLI help capture[/dim]")
+    references = Path("references")
+    if not references.is_dir():
+        print("[dim]No references found[/dim]")
+        return
+    if not catalog_path(references).exists():
+        rebuild_catalog(references)
+    try:
+        refs = query_references(references, stale_since=older_than, sort="stale")
+    except ValueError as exc:
+        raise typer.Abort(f"Invalid --older-than: {exc}") from exc
 
-    examples_dir = base / "examples"
-    harvest_examples(raw, examples_dir)
-    print("[green]Examples harvested[/green]")
+    names = [ref["directory"] for ref in refs if ref["meta"]]
+    if not names:
+        print("[dim]No references to update[/dim]")
+        return
+    print(f"[bold]Updating {len(names)} references[/bold] [dim](jobs={jobs})[/dim]")
+
+    started_at = datetime.utcnow().isoformat() + "Z"
+    started = time.monotonic()
+    results = {
+        name: {"name": name, "status": None, "timings": Timings(name)}
+        for name in names
+    }
+    session = create_session(pool_size=jobs)
+
+    def download(name: str) -> ReferenceLock | None:
+        result = results[name]
+        result["started"] = time.monotonic()
+        lock = ReferenceLock(references / name, create=False)
+        try:
+            lock.acquire()
+        except ReferenceLocked as exc:
+            result.update(status="locked", error=str(exc))
+            return None
+        except FileNotFoundError as exc:
+            result.update(status="failed", error=str(exc))
+            return None
+        try:
+            outcome = _update_download(
+                name,
+                timings=result["timings"],
+                session=session,
+                log=lambda msg: print(f"[cyan]{name}[/cyan] {msg}"),
+                **options,
+            )
+        except Exception as exc:
+            lock.release()
+            result.update(status="failed", error=str(exc) or type(exc).__name__)
+            return None
+        result["from_commit"] = outcome["from_commit"]
+        result["to_commit"] = outcome["to_commit"]
+        if not outcome["changed"]:
+            lock.release()
+            result["status"] = "unchanged"
+            return None
+        # Held until post-processing finishes
+        return lock
+
+    # Spawned workers don't inherit the download threads' locks and sockets
+    context = multiprocessing.get_context("spawn")
+    with (
+        session,
+        ThreadPoolExecutor(max_workers=jobs) as threads,
+        ProcessPoolExecutor(max_workers=jobs, mp_context=context) as processes,
+    ):
+        downloads = {threads.submit(download, name): name for name in names}
+        builds = {}
+        for future in as_completed(downloads):
+            name = downloads[future]
+            lock = future.result()
+            if lock is None:
+                results[name]["seconds"] = time.monotonic() - results[name]["started"]
+                continue
+            build = processes.submit(
+                _process_in_worker,
+                references / name,
+                capture_cli,
+                cli_depth,
+                name,
+                results[name]["timings"].stages,
+            )
+            build.add_done_callback(lambda _, lock=lock: lock.release())
+            builds[build] = name
+
+        for build in as_completed(builds):
+            result = results[builds[build]]
+            try:
+                result["timings"].stages[:] = build.result()
+                result["status"] = "updated"
+            except Exception as exc:
+                result.update(status="failed", error=str(exc) or type(exc).__name__)
+            result["seconds"] = time.monotonic() - result["started"]
+
+    ordered = [results[name] for name in names]
+    if trace:
+        write_trace(trace, [result["timings"] for result in ordered])
+
+    print("[bold]Summary[/bold]")
+    colors = {"updated": "green", "unchanged": "dim", "locked": "yellow"}
+    for result in ordered:
+        status = result["status"]
+        color = colors.get(status, "red")
+        line = (
+            f"[{color}]{status:<9}[/{color}] {result['name']} "
+            f"— {result['seconds']:.1f}s"
+        )
+        if status == "updated":
+            from_commit = (result["from_commit"] or "?")[:12]
+            line += f", {from_commit} → {result['to_commit'][:12]}"
+        elif result.get("error"):
+            line += f": {escape(result['error'])}"
+        print(line)
+        if show_timings and result["timings"].stages:
+            _print_timings(result["timings"])
+
+    counts = {}
+    for result in ordered:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    print(", ".join(f"{count} {status}" for status, count in sorted(counts.items())))
+    _print_rate_budget()
+
+    if report:
+        report.write_text(
+            json.dumps(
+                {
+                    "started_at": started_at,
+                    "finished_at": datetime.utcnow().isoformat() + "Z",
+                    "seconds": time.monotonic() - started,
+                    "jobs": jobs,
+                    "older_than": older_than,
+                    "counts": counts,
+                    "references": [
+                        {
+                            "name": result["name"],
+                            "status": result["status"],
+                            "seconds": result["seconds"],
+                            "from_commit": result.get("from_commit"),
+                            "to_commit": result.get("to_commit"),
+                            "error": result.get("error"),
+                            "stats": result["timings"].summary(),
+                        }
+                        for result in ordered
+                    ],
+                },
+                indent=2,
+            )
+        )
 
-    print("[green]Done[/green]")
+    if counts.get("failed"):
+        raise typer.Exit(1)
 
 
-@app.command()
-def list(
+@app.command("list")
+def list_references(
     json_output: bool = typer.Option(
         False,
         "--json",
         help="Output machine-readable JSON",
     ),
+    language: str | None = typer.Option(
+        None,
+        "--language",
+        help="Only references whose primary or secondary language matches",
+    ),
+    stale_since: str | None = typer.Option(
+        None,
+        "--stale-since",
+        help="Only references not checked since a time (ISO date or e.g. 7d, 12h)",
+    ),
+    sort: str = typer.Option(
+        "name",
+        "--sort",
+        help="Sort order: name, fetched, checked or stale",
+    ),
 ):
     """
     List available references.
     """
+    from ragstrap.store.catalog import (
+        SORT_COLUMNS,
+        catalog_path,
+        query_references,
+        rebuild_catalog,
+    )
+
     base = Path("references")
     if not base.exists():
         if json_output:
@@ -228,11 +1288,18 @@ def list(
         return
     if not base.is_dir():
         raise typer.Abort("'references' exists but is not a directory")
+    if sort not in SORT_COLUMNS:
+        raise typer.Abort(f"Unknown sort order '{sort}'")
 
-    refs = sorted(
-        (p for p in base.iterdir() if p.is_dir() and not p.name.startswith(".")),
-        key=lambda p: p.name.lower(),
-    )
+    if not catalog_path(base).exists():
+        rebuild_catalog(base)
+
+    try:
+        refs = query_references(
+            base, language=language, stale_since=stale_since, sort=sort
+        )
+    except ValueError as exc:
+        raise typer.Abort(f"Invalid --stale-since: {exc}") from exc
 
     if not refs:
         if json_output:
@@ -244,28 +1311,33 @@ def list(
     if json_output:
         payload = []
         for ref in refs:
-            meta = _read_meta_optional(ref)
+            meta = ref["meta"]
             payload.append(
                 {
-                    "name": meta.get("name", ref.name) if meta else ref.name,
-                    "directory": ref.name,
-                    "path": str(ref),
+                    "name": meta.get("name", ref["directory"])
+                    if meta
+                    else ref["directory"],
+                    "directory": ref["directory"],
+                    "path": str(base / ref["directory"]),
                     "meta": meta,
                 }
             )
-        print(json.dumps(payload, indent=2))
+        _print_json(payload)
         return
 
     for ref in refs:
-        meta = _read_meta_optional(ref)
-        display_name = meta.get("name", ref.name) if meta else ref.name
+        meta = ref["meta"]
+        display_name = meta.get("name", ref["directory"]) if meta else ref["directory"]
         details: list[str] = []
         if meta:
             source = meta.get("source")
             if source:
                 details.append(source)
             language = meta.get("language")
-            if language:
+            share = (meta.get("languages") or {}).get(language)
+            if language and share is not None:
+                details.append(f"{language} {share:.0f}%")
+            elif language:
                 details.append(language)
         if details:
             print(f"- {display_name} — {', '.join(details)}")
@@ -285,13 +1357,19 @@ def info(
     """
     Show metadata about a reference.
     """
+    from ragstrap.store.catalog import get_reference
+    from ragstrap.store.objects import objects_dir, store_stats
+
     base = Path("references") / name
     if not base.exists():
         raise typer.Abort(f"Reference '{name}' not found")
     if not base.is_dir():
         raise typer.Abort(f"Reference '{name}' is not a directory")
 
-    meta = _load_meta(base, name)
+    meta = get_reference(base.parent, name) or _load_meta(base, name)
+
+    objects = objects_dir(base.parent)
+    store = store_stats(objects) if meta.get("dedupe") and objects.is_dir() else None
 
     if json_output:
         payload = {
@@ -300,7 +1378,9 @@ def info(
             "path": str(base),
             "meta": meta,
         }
-        print(json.dumps(payload, indent=2))
+        if store:
+            payload["object_store"] = store
+        _print_json(payload)
         return
 
     print(f"[bold]{meta.get('name', name)}[/bold]")
@@ -314,10 +1394,18 @@ def info(
     if owner and repo:
         print(f"Repo: {owner}/{repo}")
 
+    commit = meta.get("commit")
+    if commit:
+        print(f"Commit: {commit}")
+
     fetched_at = meta.get("fetched_at")
     if fetched_at:
         print(f"Fetched at: {fetched_at}")
 
+    checked_at = meta.get("checked_at")
+    if checked_at:
+        print(f"Checked at: {checked_at}")
+
     ragstrap_version = meta.get("ragstrap_version")
     if ragstrap_version:
         print(f"Ragstrap version: {ragstrap_version}")
@@ -330,6 +1418,479 @@ def info(
     if secondary_languages:
         print(f"Secondary languages: {secondary_languages}")
 
+    languages = meta.get("languages")
+    if languages:
+        breakdown = ", ".join(
+            f"{lang} {share}%" for lang, share in languages.items() if share
+        )
+        print(f"Language breakdown: {breakdown}")
+
+    skipped = meta.get("skipped")
+    if skipped:
+        files = sum(entry["files"] for entry in skipped.values())
+        size = sum(entry["bytes"] for entry in skipped.values())
+        print(f"Skipped at extraction: {files} files, {_format_bytes(size)}")
+
+    stats = meta.get("stats")
+    if stats:
+        slowest = max(stats["stages"].items(), key=lambda item: item[1]["seconds"])
+        print(
+            f"Last build: {stats['seconds']:.2f}s "
+            f"(slowest stage {slowest[0]}, {slowest[1]['seconds']:.2f}s)"
+        )
+
+    if store:
+        print(
+            f"Object store: {store['objects']} blobs, "
+            f"{_format_bytes(store['bytes'])} on disk, "
+            f"{_format_bytes(store['saved_bytes'])} saved by deduplication"
+        )
+
+
+@app.command()
+def search(
+    name: str | None = typer.Argument(
+        None, help="Reference to search (with --all, the query)"
+    ),
+    query: str | None = typer.Argument(None, help="Search terms"),
+    search_all: bool = typer.Option(
+        False,
+        "--all",
+        help="Search every reference concurrently and merge the hits",
+    ),
+    limit: int = typer.Option(20, "--limit", "-l", min=1, help="Maximum hits"),
+    language: str | None = typer.Option(
+        None,
+        "--language",
+        help="With --all, only references whose primary or secondary language "
+        "matches",
+    ),
+    timeout: float | None = typer.Option(
+        None,
+        "--timeout",
+        min=0.001,
+        help="With --all, give up on references still searching after this many "
+        "seconds (default 5)",
+    ),
+    jobs: int | None = typer.Option(
+        None,
+        "--jobs",
+        "-j",
+        min=1,
+        help="With --all, references searched at once",
+    ),
+    json_output: bool = typer.Option(
+        False,
+        "--json",
+        help="Output machine-readable JSON",
+    ),
+):
+    """
+    Search the files of a reference, or of every reference with --all.
+    """
+    if search_all:
+        if query is not None:
+            raise typer.BadParameter("With --all, pass only the query")
+        name, query = None, name
+    elif language or timeout or jobs:
+        raise typer.BadParameter("--language, --timeout and --jobs require --all")
+    if not query:
+        raise typer.BadParameter("Missing search query")
+
+    if search_all:
+        _search_all(query, limit, language, timeout, jobs, json_output)
+        return
+
+    from ragstrap.index.manifest import load_manifest, scan_tree
+    from ragstrap.search.index import (
+        SEARCH_DB,
+        search_reference,
+        update_search_index,
+    )
+
+    base = Path("references") / name
+    if not base.is_dir():
+        raise typer.Abort(f"Reference '{name}' not found")
+
+    if not (base / SEARCH_DB).exists():
+        manifest = load_manifest(base) or scan_tree(base / "raw")
+        update_search_index(base, manifest)
+
+    started = time.monotonic()
+    hits = search_reference(base, query, limit=limit)
+    elapsed = time.monotonic() - started
+
+    if json_output:
+        _print_json(hits)
+        return
+
+    if not hits:
+        print("[dim]No matches[/dim]")
+        return
+
+    for hit in hits:
+        print(f"[cyan]{hit['path']}[/cyan]:{hit['line']}: {escape(hit['text'])}")
+    print(f"[dim]{len(hits)} hits in {elapsed * 1000:.1f} ms[/dim]")
+
+
+def _search_all(
+    query: str,
+    limit: int,
+    language: str | None,
+    timeout: float | None,
+    jobs: int | None,
+    json_output: bool,
+):
+    from ragstrap.search.federated import DEFAULT_TIMEOUT, search_all
+    from ragstrap.store.catalog import (
+        catalog_path,
+        query_directories,
+        rebuild_catalog,
+    )
+
+    base = Path("references")
+    if not base.is_dir():
+        raise typer.Abort("No references found")
+    if not catalog_path(base).exists():
+        rebuild_catalog(base)
+
+    result = search_all(
+        base,
+        query_directories(base, language=language),
+        query,
+        limit=limit,
+        timeout=timeout or DEFAULT_TIMEOUT,
+        jobs=jobs,
+    )
+
+    if json_output:
+        _print_json(result)
+        return
+
+    hits = result["hits"]
+    shards = result["shards"]
+    for hit in hits:
+        print(
+            f"[bold]{hit['reference']}[/bold] [cyan]{hit['path']}[/cyan]:"
+            f"{hit['line']}: {escape(hit['text'])} [dim]({hit['score']:.2f})[/dim]"
+        )
+    if not hits:
+        print("[dim]No matches[/dim]")
+
+    searched = [shard for shard in shards if shard["status"] == "ok"]
+    print(
+        f"[dim]{len(hits)} hits from {len(searched)} references "
+        f"in {result['seconds'] * 1000:.1f} ms[/dim]"
+    )
+    slowest = sorted(searched, key=lambda shard: -shard["seconds"])[:3]
+    if len(searched) > 1:
+        print(
+            "[dim]Slowest: "
+            + ", ".join(
+                f"{shard['reference']} {shard['seconds'] * 1000:.1f} ms"
+                for shard in slowest
+            )
+            + "[/dim]"
+        )
+
+    for status, color, label in (
+        ("timeout", "yellow", "timed out"),
+        ("error", "red", "failed"),
+        ("unindexed", "dim", "have no search index (run update)"),
+    ):
+        names = [shard["reference"] for shard in shards if shard["status"] == status]
+        if names:
+            shown = ", ".join(names[:10]) + (", ..." if len(names) > 10 else "")
+            print(f"[{color}]{len(names)} references {label}:[/{color}] {shown}")
+
+
+@app.command()
+def symbols(
+    name: str,
+    pattern: str,
+    kind: str | None = typer.Option(
+        None,
+        "--kind",
+        "-k",
+        help="Only symbols of this kind, e.g. function, method, class, struct",
+    ),
+    limit: int = typer.Option(20, "--limit", "-l", min=1, help="Maximum results"),
+    json_output: bool = typer.Option(
+        False,
+        "--json",
+        help="Output machine-readable JSON",
+    ),
+):
+    """
+    Find where functions, types and other definitions are declared.
+    """
+    from ragstrap.index.manifest import load_manifest, scan_tree
+    from ragstrap.symbols.index import SYMBOLS_DB, find_symbols, update_symbol_index
+
+    base = Path("references") / name
+    if not base.is_dir():
+        raise typer.Abort(f"Reference '{name}' not found")
+
+    if not (base / SYMBOLS_DB).exists():
+        manifest = load_manifest(base) or scan_tree(base / "raw")
+        update_symbol_index(base, manifest, jobs=DEFAULT_JOBS)
+
+    started = time.monotonic()
+    hits = find_symbols(base, pattern, kind=kind, limit=limit)
+    elapsed = time.monotonic() - started
+
+    if json_output:
+        _print_json(hits)
+        return
+
+    if not hits:
+        print("[dim]No matches[/dim]")
+        return
+
+    for hit in hits:
+        print(
+            f"[bold]{escape(hit['name'])}[/bold] [dim]{hit['kind']}[/dim] "
+            f"[cyan]{hit['path']}[/cyan]:{hit['line']}"
+        )
+        print(f"    {escape(hit['signature'])}")
+    print(f"[dim]{len(hits)} symbols in {elapsed * 1000:.1f} ms[/dim]")
+
+
+@app.command()
+def chunk(
+    name: str,
+    max_tokens: int | None = typer.Option(
+        None,
+        "--max-tokens",
+        min=16,
+        help="Upper bound on tokens per chunk (default 512)",
+    ),
+    overlap: int | None = typer.Option(
+        None,
+        "--overlap",
+        min=0,
+        help="Tokens shared between consecutive windows of a long section "
+        "(default 64)",
+    ),
+    jobs: int = typer.Option(
+        DEFAULT_JOBS,
+        "--jobs",
+        "-j",
+        min=1,
+        help="Worker processes for chunking",
+    ),
+):
+    """
+    Export RAG-ready chunks of a reference as JSONL.
+    """
+    from ragstrap.chunk.export import (
+        CHUNKS_FILE,
+        MAX_TOKENS,
+        OVERLAP_TOKENS,
+        export_chunks,
+    )
+    from ragstrap.index.manifest import load_manifest, scan_tree
+
+    max_tokens = max_tokens or MAX_TOKENS
+    overlap = OVERLAP_TOKENS if overlap is None else overlap
+    base = Path("references") / name
+    if not base.is_dir():
+        raise typer.Abort(f"Reference '{name}' not found")
+    if overlap >= max_tokens:
+        raise typer.BadParameter("--overlap must be smaller than --max-tokens")
+
+    manifest = load_manifest(base) or scan_tree(base / "raw")
+    stats = export_chunks(
+        base, manifest, jobs=jobs, max_tokens=max_tokens, overlap=overlap
+    )
+
+    print(
+        f"[green]Wrote {stats['chunks']} chunks[/green] to {base / CHUNKS_FILE} "
+        f"[dim]({stats['chunked']} files chunked, {stats['reused']} unchanged)[/dim]"
+    )
+
+
+@app.command()
+def query(
+    name: str,
+    text: str,
+    k: int = typer.Option(10, "-k", min=1, help="Number of chunks to return"),
+    embedder_name: str = typer.Option(
+        "hashing",
+        "--embedder",
+        help="Built-in embedder name or module:attribute of a custom one",
+    ),
+    nprobe: int = typer.Option(
+        8, "--nprobe", min=1, help="Partitions scanned on partitioned indexes"
+    ),
+    ivf_threshold: int | None = typer.Option(
+        None,
+        "--ivf-threshold",
+        min=1,
+        help="Partition the index once a reference has more chunks than this "
+        "(default 50000)",
+    ),
+    rebuild: bool = typer.Option(False, "--rebuild", help="Rebuild the index"),
+    json_output: bool = typer.Option(
+        False,
+        "--json",
+        help="Output machine-readable JSON",
+    ),
+):
+    """
+    Semantic lookup over the chunks of a reference.
+    """
+    from ragstrap.chunk.export import CHUNKS_FILE, chunk_settings, export_chunks
+    from ragstrap.index.manifest import load_manifest, scan_tree
+
+    try:
+        from ragstrap.vector.embed import get_embedder
+        from ragstrap.vector.index import (
+            IVF_THRESHOLD,
+            build_vector_index,
+            query_vector_index,
+            vector_index_is_current,
+        )
+    except ImportError as exc:
+        raise typer.Abort(
+            f"{exc}; install the vector extra: pip install 'ragstrap[vector]'"
+        ) from exc
+
+    base = Path("references") / name
+    if not base.is_dir():
+        raise typer.Abort(f"Reference '{name}' not found")
+
+    try:
+        embedder = get_embedder(embedder_name)
+    except (ImportError, AttributeError, ValueError) as exc:
+        raise typer.BadParameter(str(exc), param_hint="--embedder") from exc
+
+    # Incremental, and a no-op when raw/ hasn't changed since the last export,
+    # so chunks (and the vector index built on them) follow updates. Keeps the
+    # --max-tokens/--overlap of an earlier `chunk` run.
+    if not (base / CHUNKS_FILE).exists():
+        print("[bold]Chunking reference[/bold]")
+    manifest = load_manifest(base) or scan_tree(base / "raw")
+    chunk_stats = export_chunks(
+        base, manifest, jobs=DEFAULT_JOBS, **chunk_settings(base)
+    )
+    if chunk_stats["chunked"] and chunk_stats["reused"]:
+        print(f"[dim]Re-chunked {chunk_stats['chunked']} changed files[/dim]")
+
+    if rebuild or not vector_index_is_current(base, embedder):
+        print("[bold]Building vector index[/bold]")
+        build_vector_index(
+            base, embedder, ivf_threshold=ivf_threshold or IVF_THRESHOLD
+        )
+
+    started = time.monotonic()
+    hits = query_vector_index(base, embedder, text, k=k, nprobe=nprobe)
+    elapsed = time.monotonic() - started
+
+    if json_output:
+        _print_json(hits)
+        return
+
+    for hit in hits:
+        preview = " ".join(hit["text"].split())[:120]
+        print(
+            f"[cyan]{hit['path']}[/cyan]:{hit['start_line']}-{hit['end_line']} "
+            f"[dim]{hit['score']:.3f}[/dim] {escape(preview)}"
+        )
+    print(f"[dim]{len(hits)} results in {elapsed * 1000:.1f} ms[/dim]")
+
+
+@app.command()
+def reindex():
+    """
+    Rebuild the reference catalog from the meta.json files on disk.
+    """
+    from ragstrap.store.catalog import rebuild_catalog
+
+    base = Path("references")
+    if not base.is_dir():
+        print("[dim]No references found[/dim]")
+        return
+    count = rebuild_catalog(base)
+    print(f"[green]Catalog rebuilt[/green] ({count} references)")
+
+
+@app.command()
+def serve(
+    host: str | None = typer.Option(
+        None, "--host", help="Address to listen on (default 127.0.0.1)"
+    ),
+    port: int | None = typer.Option(
+        None, "--port", "-p", min=0, help="Port to listen on (default 7787)"
+    ),
+    socket_path: Path | None = typer.Option(
+        None,
+        "--socket",
+        help="Listen on this Unix socket instead of a TCP port",
+    ),
+    cache_size: str | None = typer.Option(
+        None,
+        "--cache-size",
+        help="Memory budget for cached reference data, e.g. 512M (default 256M)",
+    ),
+):
+    """
+    Serve list, info, files, examples and search over HTTP as JSON.
+    """
+    from ragstrap.fetch.cache import parse_size
+    from ragstrap.serve.server import (
+        CACHE_SIZE,
+        DEFAULT_HOST,
+        DEFAULT_PORT,
+        create_server,
+    )
+
+    try:
+        max_bytes = parse_size(cache_size) if cache_size else CACHE_SIZE
+    except ValueError as exc:
+        raise typer.Abort(str(exc)) from exc
+
+    server = create_server(
+        Path("references"),
+        host=host or DEFAULT_HOST,
+        port=DEFAULT_PORT if port is None else port,
+        socket_path=socket_path,
+        max_bytes=max_bytes,
+    )
+    if socket_path:
+        print(f"[bold]Serving references on {socket_path}[/bold]")
+    else:
+        bound_host, bound_port = server.server_address[:2]
+        print(f"[bold]Serving references on http://{bound_host}:{bound_port}[/bold]")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if socket_path:
+            _remove_path(socket_path)
+
+
+@app.command()
+def gc():
+    """
+    Delete object store blobs that no reference links to any more.
+    """
+    from ragstrap.store.objects import collect_garbage, objects_dir
+
+    objects = objects_dir(Path("references"))
+    if not objects.is_dir():
+        print("[dim]No object store found[/dim]")
+        return
+
+    stats = collect_garbage(objects)
+    print(
+        f"[green]Removed {stats['removed']} unreferenced blobs[/green] "
+        f"[dim]({_format_bytes(stats['bytes'])} reclaimed)[/dim]"
+    )
+
 
 @app.callback()
 def callback(
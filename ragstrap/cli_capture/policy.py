@@ -1,18 +1,21 @@
 from pathlib import Path
 
 from ragstrap.cli_detect.rust import is_rust_cli
+from ragstrap.index.manifest import manifest_paths
 
 
-def should_auto_capture_cli(raw: Path) -> bool:
+def should_auto_capture_cli(raw: Path, manifest: dict) -> bool:
+    files = manifest_paths(manifest)
+
     # Only Rust for now
-    if not is_rust_cli(raw):
+    if not is_rust_cli(raw, files):
         return False
 
     # Require Cargo.toml and src/main.rs
-    if not (raw / "Cargo.toml").exists():
+    if "Cargo.toml" not in files:
         return False
 
-    if not (raw / "src" / "main.rs").exists():
+    if "src/main.rs" not in files:
         return False
 
     return True
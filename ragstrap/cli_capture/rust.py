@@ -1,19 +1,109 @@
+import hashlib
+import json
+import os
+import re
+import shutil
 import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
 
+from ragstrap.util.ignore import DEFAULT_IGNORES
+from ragstrap.util.timings import Timings
 
-def cargo_build(raw: Path) -> Path:
+# Per-reference build state, kept outside raw/ so updates don't discard it
+BUILD_DIR = ".build"
+BUILD_STATE = "state.json"
+
+# Files that can change what cargo builds
+BUILD_INPUTS = {
+    "Cargo.toml",
+    "Cargo.lock",
+    "build.rs",
+    "rust-toolchain",
+    "rust-toolchain.toml",
+}
+
+# Help capture limits
+HELP_DEPTH = 3
+HELP_JOBS = 8
+HELP_TIMEOUT = 10.0
+HELP_MAX_OUTPUT = 256 * 1024
+MAX_HELP_INVOCATIONS = 500
+
+COMMANDS_HEADING_RE = re.compile(
+    r"^\s*(?:available\s+)?(?:sub)?commands:?\s*$", re.IGNORECASE
+)
+# Entries sit at a shallow indent; wrapped descriptions are indented further
+COMMAND_RE = re.compile(r"^(?: {1,6}|\t)([A-Za-z][\w-]*)(?:,\s*[\w-]+)*(?:\s{2,}|\s*$)")
+
+
+def cargo_target_dir(reference_dir: Path) -> Path:
+    """
+    Persistent CARGO_TARGET_DIR for a reference. RAGSTRAP_CARGO_TARGET_DIR
+    shares one target dir (and its compiled dependencies) across references.
+    """
+    shared = os.getenv("RAGSTRAP_CARGO_TARGET_DIR")
+    if shared:
+        return Path(shared)
+    return reference_dir / BUILD_DIR / "target"
+
+
+def source_hash(raw: Path) -> str:
+    """
+    Hash the Cargo manifests, lockfile and Rust sources under raw.
+    """
+    digest = hashlib.sha256()
+    for dirpath, dirnames, filenames in os.walk(raw):
+        dirnames[:] = sorted(d for d in dirnames if d not in DEFAULT_IGNORES)
+        for filename in sorted(filenames):
+            in_cargo_config = Path(dirpath).name == ".cargo"
+            if not (
+                filename in BUILD_INPUTS
+                or filename.endswith(".rs")
+                or in_cargo_config
+            ):
+                continue
+            path = Path(dirpath) / filename
+            digest.update(path.relative_to(raw).as_posix().encode())
+            digest.update(b"\0")
+            digest.update(_file_sha256(path).encode())
+    return digest.hexdigest()
+
+
+def cargo_build(raw: Path, target_dir: Path | None = None) -> Path:
     """
     Build the Rust binary and return path to executable.
     """
-    subprocess.run(
-        ["cargo", "build", "--release"],
-        cwd=raw,
-        check=True,
-    )
+    target_dir = target_dir or raw / "target"
+    target_dir.mkdir(parents=True, exist_ok=True)
 
-    target = raw / "target" / "release"
-    bins = [p for p in target.iterdir() if p.is_file() and p.stat().st_mode & 0o111]
+    with _build_lock(target_dir):
+        result = subprocess.run(
+            [
+                "cargo",
+                "build",
+                "--release",
+                "--message-format=json-render-diagnostics",
+            ],
+            cwd=raw,
+            env={**os.environ, "CARGO_TARGET_DIR": str(target_dir.resolve())},
+            stdout=subprocess.PIPE,
+            text=True,
+            check=True,
+        )
+
+    # Ask cargo which executables it produced; a persistent target dir may
+    # hold stale binaries from earlier builds
+    bins = []
+    for line in result.stdout.splitlines():
+        try:
+            message = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if message.get("reason") == "compiler-artifact" and message.get("executable"):
+            bins.append(Path(message["executable"]))
 
     if not bins:
         raise RuntimeError("No executable produced by cargo build")
@@ -21,29 +111,238 @@ def cargo_build(raw: Path) -> Path:
     return bins[0]
 
 
-def capture_help(binary: Path, out_dir: Path):
-    out_dir.mkdir(parents=True, exist_ok=True)
+def build_and_capture(
+    raw: Path,
+    reference_dir: Path,
+    max_depth: int | None = None,
+    timings: Timings | None = None,
+) -> dict:
+    """
+    Build the CLI and capture its help into reference_dir/cli, skipping the
+    build when sources are unchanged since the last capture and the capture
+    when the binary is unchanged. The build and the capture are recorded as
+    the cargo_build and capture_help stages of timings.
+    """
+    if max_depth is None:
+        max_depth = HELP_DEPTH
+    timings = timings or Timings()
+    state_path = reference_dir / BUILD_DIR / BUILD_STATE
+    state = _load_state(state_path)
+    cli_dir = reference_dir / "cli"
 
-    def run_help(args: list[str], name: str):
-        result = subprocess.run(
-            [binary, *args],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
-            check=False,  # help often exits non-zero
+    hashed = source_hash(raw)
+    binary = Path(state["binary"]) if state.get("binary") else None
+    built = not (
+        state.get("source_hash") == hashed
+        and binary is not None
+        and binary.is_file()
+        # A shared target dir may have rebuilt the binary for another reference
+        and _file_sha256(binary) == state.get("binary_sha256")
+    )
+    if built:
+        with timings.stage("cargo_build"):
+            binary = cargo_build(raw, cargo_target_dir(reference_dir))
+
+    binary_sha256 = _file_sha256(binary)
+    captured = not (
+        state.get("help_binary_sha256") == binary_sha256
+        and state.get("help_depth") == max_depth
+        and (cli_dir / "index.json").is_file()
+    )
+    if captured:
+        if cli_dir.exists():
+            shutil.rmtree(cli_dir)
+        with timings.stage("capture_help") as stage:
+            capture_help(binary, cli_dir, max_depth=max_depth)
+            stage["files_written"] = sum(1 for _ in cli_dir.glob("*.help.txt"))
+
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+    state_path.write_text(
+        json.dumps(
+            {
+                "source_hash": hashed,
+                "binary": str(binary),
+                "binary_sha256": binary_sha256,
+                "help_binary_sha256": binary_sha256,
+                "help_depth": max_depth,
+            },
+            indent=2,
         )
-        (out_dir / f"{name}.help.txt").write_text(result.stdout)
+    )
+    return {"built": built, "captured": captured}
+
 
-    # Root help
-    run_help(["--help"], "root")
+def capture_help(
+    binary: Path,
+    out_dir: Path,
+    max_depth: int = HELP_DEPTH,
+    jobs: int = HELP_JOBS,
+    timeout: float = HELP_TIMEOUT,
+    max_output: int = HELP_MAX_OUTPUT,
+) -> dict:
+    """
+    Capture --help for the binary and its subcommands down to max_depth
+    levels, running each level's invocations concurrently. Outputs identical
+    to one already captured are recorded as "same_as" and not explored
+    further. Writes <path>.help.txt files plus cli/index.json and returns the
+    index.
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    root = {"name": binary.name, "args": []}
+    seen: dict[str, str] = {}
+    level = [root]
+    invocations = 0
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        for depth in range(max_depth + 1):
+            level = level[: max(0, MAX_HELP_INVOCATIONS - invocations)]
+            if not level:
+                break
+            invocations += len(level)
+
+            results = pool.map(
+                lambda node: _run_help(
+                    binary, [*node["args"], "--help"], timeout, max_output
+                ),
+                level,
+            )
+
+            next_level = []
+            for node, (text, status, exit_code) in zip(level, results):
+                node["status"] = status
+                node["exit_code"] = exit_code
+
+                digest = hashlib.sha256(text.encode()).hexdigest()
+                if digest in seen:
+                    node["same_as"] = seen[digest]
+                    continue
+
+                filename = ".".join(node["args"]) or "root"
+                node["file"] = f"{filename}.help.txt"
+                seen[digest] = node["file"]
+                (out_dir / node["file"]).write_text(text)
+
+                if depth == max_depth or status == "timeout":
+                    continue
+                node["subcommands"] = [
+                    {"name": cmd, "args": [*node["args"], cmd]}
+                    for cmd in parse_subcommands(text)
+                    if cmd not in node["args"]
+                ]
+                next_level.extend(node["subcommands"])
+            level = next_level
+
+    index = {"binary": binary.name, "max_depth": max_depth, "root": root}
+    (out_dir / "index.json").write_text(json.dumps(index, indent=2))
+    return index
+
+
+def parse_subcommands(text: str) -> list[str]:
+    """
+    Pull subcommand names out of help output: the entries of a "Commands:"
+    (or "SUBCOMMANDS:") section, falling back to bare single-word lines.
+    """
+    commands = []
+    in_section = False
+    for line in text.splitlines():
+        if COMMANDS_HEADING_RE.match(line):
+            in_section = True
+            continue
+        if in_section:
+            if not line.strip():
+                continue
+            if not line.startswith((" ", "\t")):
+                in_section = False
+                continue
+            match = COMMAND_RE.match(line)
+            if match:
+                commands.append(match.group(1))
+
+    if not commands:
+        for line in text.splitlines():
+            word = line.strip()
+            if line.startswith("  ") and word and " " not in word:
+                commands.append(word)
 
-    # Discover subcommands by parsing root help (lightly)
-    root_text = (out_dir / "root.help.txt").read_text()
+    # "help" just re-renders the help we are already walking
+    unique = dict.fromkeys(c for c in commands if c != "help")
+    return [*unique]
 
-    subcommands = []
-    for line in root_text.splitlines():
-        if line.startswith("  ") and line.strip() and " " not in line.strip():
-            subcommands.append(line.strip())
 
-    for cmd in subcommands:
-        run_help([cmd, "--help"], cmd)
+def _run_help(
+    binary: Path,
+    args: list[str],
+    timeout: float,
+    max_output: int,
+) -> tuple[str, str, int | None]:
+    """
+    Run one help invocation. Returns (output, status, exit code); status is
+    ok, timeout or truncated.
+    """
+    proc = subprocess.Popen(
+        [binary, *args],
+        # A binary waiting on stdin would otherwise hang until the timeout
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+    )
+    timed_out = threading.Event()
+
+    def kill():
+        timed_out.set()
+        proc.kill()
+
+    timer = threading.Timer(timeout, kill)
+    timer.start()
+    try:
+        data = proc.stdout.read(max_output)
+        truncated = bool(proc.stdout.read(1))
+        if truncated:
+            proc.kill()
+        proc.wait()
+    finally:
+        timer.cancel()
+        proc.stdout.close()
+
+    status = "ok"
+    if timed_out.is_set():
+        status = "timeout"
+    elif truncated:
+        status = "truncated"
+    exit_code = None if status != "ok" else proc.returncode
+    return data.decode("utf-8", errors="replace"), status, exit_code
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as fh:
+        while chunk := fh.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _load_state(path: Path) -> dict:
+    try:
+        return json.loads(path.read_text())
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+@contextmanager
+def _build_lock(target_dir: Path):
+    """
+    Serialise ragstrap builds that share a target dir.
+    """
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+
+    with (target_dir / ".ragstrap.lock").open("w") as fh:
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
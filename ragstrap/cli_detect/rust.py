@@ -1,15 +1,18 @@
 from pathlib import Path
+from typing import Collection
 
 
-def is_rust_cli(raw: Path) -> bool:
+def is_rust_cli(raw: Path, files: Collection[str]) -> bool:
+    """
+    files holds every path in the snapshot, relative to raw.
+    """
     # Strong signals only
-    if (raw / "Cargo.toml").exists() and (raw / "src" / "main.rs").exists():
+    if "Cargo.toml" in files and "src/main.rs" in files:
         return True
 
     # Also allow explicit [[bin]] crates
-    cargo = raw / "Cargo.toml"
-    if cargo.exists():
-        text = cargo.read_text(errors="ignore")
+    if "Cargo.toml" in files:
+        text = (raw / "Cargo.toml").read_text(errors="ignore")
         if "[[bin]]" in text:
             return True
 
@@ -13,7 +13,10 @@ def extract_shell_blocks(md_path: Path) -> list[str]:
     """
     Return fenced code blocks that look like shell / CLI usage.
     """
-    text = md_path.read_text(errors="ignore")
+    return find_shell_blocks(md_path.read_text(errors="ignore"))
+
+
+def find_shell_blocks(text: str) -> list[str]:
     blocks: list[str] = []
 
     for match in FENCE_RE.finditer(text):
@@ -1,32 +1,121 @@
+import hashlib
+import json
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-from ragstrap.examples.extract import extract_shell_blocks
+from ragstrap.examples.extract import find_shell_blocks
+from ragstrap.index.manifest import scan_tree
 
+STATE_FILE = ".harvest.json"
 
-def harvest_examples(raw: Path, out_dir: Path):
-    # overwrite existing examples (authoritative snapshot)
-    if out_dir.exists():
-        for p in out_dir.iterdir():
-            p.unlink()
+# Markdown files larger than this are almost always generated (changelogs,
+# API dumps) and dominate harvest time without yielding useful examples
+MAX_MARKDOWN_SIZE = 2 * 1024 * 1024
+
+# Below this many files, process start-up costs more than it saves
+MIN_PARALLEL_FILES = 64
 
+
+def harvest_examples(
+    raw: Path,
+    out_dir: Path,
+    manifest: dict | None = None,
+    jobs: int = 1,
+    max_size: int = MAX_MARKDOWN_SIZE,
+) -> dict:
+    """
+    Write the shell examples of every Markdown file under raw into out_dir,
+    rescanning only files whose content changed. Returns counts of written
+    and unchanged files.
+    """
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    for md in raw.rglob("*.md"):
-        blocks = extract_shell_blocks(md)
-        if not blocks:
+    if manifest is None:
+        manifest = scan_tree(raw)
+
+    state_path = out_dir / STATE_FILE
+    previous = _load_state(state_path)
+
+    tasks = []
+    for entry in manifest["files"]:
+        if entry["ext"] != ".md" or entry["size"] > max_size:
             continue
 
-        rel = md.relative_to(raw)
-        out_name = "_".join(rel.with_suffix("").parts) + ".md"
-        out_path = out_dir / out_name
+        rel = entry["path"]
+        prior = previous.get(rel)
+        # Only trust the previous result if its output is still on disk
+        if prior and prior["output"] and not (out_dir / prior["output"]).exists():
+            prior = None
+        tasks.append((str(raw / rel), rel, prior["sha256"] if prior else None))
+
+    if jobs > 1 and len(tasks) >= MIN_PARALLEL_FILES:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = [*pool.map(_scan_markdown, tasks, chunksize=16)]
+    else:
+        results = [_scan_markdown(task) for task in tasks]
+
+    # Results are in manifest order, so output matches a serial run exactly
+    state: dict[str, dict] = {}
+    stats = {"written": 0, "unchanged": 0}
+    for rel, sha256, blocks in results:
+        if blocks is None:
+            state[rel] = previous[rel]
+            stats["unchanged"] += 1
+            continue
+
+        output = _write_examples(out_dir, rel, blocks) if blocks else None
+        state[rel] = {"sha256": sha256, "output": output}
+        if output:
+            stats["written"] += 1
+
+    # overwrite existing examples (authoritative snapshot)
+    keep = {s["output"] for s in state.values() if s["output"]}
+    for p in out_dir.iterdir():
+        if p.name != STATE_FILE and p.name not in keep:
+            p.unlink()
+
+    state_path.write_text(json.dumps(state, indent=2, sort_keys=True))
+    return stats
+
+
+def _scan_markdown(task: tuple[str, str, str | None]):
+    """
+    Return (rel, sha256, blocks); blocks is None when the content hash
+    matches the previous harvest.
+    """
+    path, rel, previous_sha = task
+    data = Path(path).read_bytes()
+    sha256 = hashlib.sha256(data).hexdigest()
+    if sha256 == previous_sha:
+        return rel, sha256, None
+
+    text = data.decode("utf-8", errors="ignore")
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return rel, sha256, find_shell_blocks(text)
+
+
+def _write_examples(out_dir: Path, rel_path: str, blocks: list[str]) -> str:
+    rel = Path(rel_path)
+    out_name = "_".join(rel.with_suffix("").parts) + ".md"
+    out_path = out_dir / out_name
+
+    lines: list[str] = []
+    lines.append(f"# Examples from `{rel}`\n")
+
+    for i, block in enumerate(blocks, 1):
+        lines.append(f"## Example {i}\n")
+        lines.append("```sh")
+        lines.append(block)
+        lines.append("```\n")
 
-        lines: list[str] = []
-        lines.append(f"# Examples from `{rel}`\n")
+    out_path.write_text("\n".join(lines))
+    return out_name
 
-        for i, block in enumerate(blocks, 1):
-            lines.append(f"## Example {i}\n")
-            lines.append("```sh")
-            lines.append(block)
-            lines.append("```\n")
 
-        out_path.write_text("\n".join(lines))
+def _load_state(path: Path) -> dict:
+    if not path.exists():
+        return {}
+    try:
+        return json.loads(path.read_text())
+    except json.JSONDecodeError:
+        return {}
@@ -0,0 +1,55 @@
+import json
+from pathlib import Path
+
+
+def _load_toml(text: str) -> dict:
+    try:
+        import tomllib
+    except ImportError:
+        try:
+            import tomli as tomllib
+        except ImportError as exc:
+            raise ValueError(
+                "TOML manifests require Python 3.11+ or the 'tomli' package"
+            ) from exc
+    return tomllib.loads(text)
+
+
+def load_fetch_manifest(path: Path) -> list[dict]:
+    """
+    Load a list of {"source", "name", "paths"} entries from a TOML or JSON
+    manifest.
+
+    TOML manifests use [[references]] tables; JSON manifests may be either a
+    list of entries or an object with a "references" list. "paths" is an
+    optional list of globs selecting a sparse fetch.
+    """
+    text = path.read_text()
+
+    if path.suffix.lower() == ".toml":
+        data = _load_toml(text)
+    else:
+        data = json.loads(text)
+
+    if isinstance(data, dict):
+        data = data.get("references", [])
+
+    if not isinstance(data, list):
+        raise ValueError(f"{path}: expected a list of references")
+
+    entries: list[dict] = []
+    for i, item in enumerate(data, 1):
+        if isinstance(item, str):
+            item = {"source": item}
+        if not isinstance(item, dict) or not item.get("source"):
+            raise ValueError(f"{path}: entry {i} is missing 'source'")
+        paths = item.get("paths")
+        if isinstance(paths, str):
+            paths = [paths]
+        if paths is not None and not isinstance(paths, list):
+            raise ValueError(f"{path}: entry {i} has invalid 'paths'")
+        entries.append(
+            {"source": item["source"], "name": item.get("name"), "paths": paths}
+        )
+
+    return entries
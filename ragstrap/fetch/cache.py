@@ -0,0 +1,133 @@
+import os
+import re
+import tempfile
+import time
+from pathlib import Path
+from typing import BinaryIO
+
+DEFAULT_CACHE_SIZE = 2 * 1024**3
+
+STALE_PART_SECONDS = 3600
+
+SIZE_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([kmgt]?)i?b?\s*$", re.IGNORECASE)
+SIZE_UNITS = {"": 1, "k": 1024, "m": 1024**2, "g": 1024**3, "t": 1024**4}
+
+
+def parse_size(value: str) -> int:
+    """
+    Parse sizes like "500M" or "2GiB" into bytes.
+    """
+    match = SIZE_RE.match(value)
+    if not match:
+        raise ValueError(f"Invalid size: {value!r}")
+    number, unit = match.groups()
+    return int(float(number) * SIZE_UNITS[unit.lower()])
+
+
+def cache_dir() -> Path:
+    override = os.getenv("RAGSTRAP_CACHE_DIR")
+    if override:
+        return Path(override)
+    base = os.getenv("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "ragstrap"
+
+
+def cache_budget() -> int:
+    """
+    Size budget from RAGSTRAP_CACHE_SIZE; 0 disables the cache.
+    """
+    value = os.getenv("RAGSTRAP_CACHE_SIZE")
+    return parse_size(value) if value else DEFAULT_CACHE_SIZE
+
+
+def archive_path(root: Path, owner: str, repo: str, commit: str) -> Path:
+    return root / "archives" / owner / repo / f"{commit}.tar.gz"
+
+
+def lookup_archive(root: Path, owner: str, repo: str, commit: str) -> Path | None:
+    path = archive_path(root, owner, repo, commit)
+    try:
+        # Bump mtime so eviction sees this entry as recently used
+        os.utime(path)
+    except FileNotFoundError:
+        return None
+    return path
+
+
+def latest_cached_commit(root: Path, owner: str, repo: str) -> str | None:
+    """
+    Return the most recently used cached commit of a repo, if any.
+    """
+    repo_dir = root / "archives" / owner / repo
+    if not repo_dir.is_dir():
+        return None
+    archives = sorted(
+        repo_dir.glob("*.tar.gz"),
+        key=lambda p: p.stat().st_mtime,
+        reverse=True,
+    )
+    return archives[0].name[: -len(".tar.gz")] if archives else None
+
+
+class TeeReader:
+    """
+    File-like wrapper that copies everything read from src into a temp file,
+    which is moved into the cache with commit() once fully read.
+    """
+
+    def __init__(self, src: BinaryIO, dest: Path):
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        fd, name = tempfile.mkstemp(dir=dest.parent, suffix=".part")
+        self._src = src
+        self._out = os.fdopen(fd, "wb")
+        self._tmp = Path(name)
+        self._dest = dest
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._src.read(size)
+        self._out.write(data)
+        return data
+
+    def commit(self, buffer_size: int):
+        # tarfile stops at the end-of-archive marker; keep the trailing bytes
+        while self.read(buffer_size):
+            pass
+        self._out.close()
+        os.replace(self._tmp, self._dest)
+
+    def discard(self):
+        self._out.close()
+        self._tmp.unlink(missing_ok=True)
+
+
+def evict(root: Path, budget: int) -> int:
+    """
+    Delete least recently used archives until the cache fits in budget.
+    Returns the number of bytes freed.
+    """
+    # Partial downloads left behind by interrupted runs
+    cutoff = time.time() - STALE_PART_SECONDS
+    for part in (root / "archives").glob("*/*/*.part"):
+        try:
+            if part.stat().st_mtime < cutoff:
+                part.unlink()
+        except FileNotFoundError:
+            continue
+
+    entries = []
+    for path in (root / "archives").glob("*/*/*.tar.gz"):
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    freed = 0
+    for _, size, path in sorted(entries):
+        if total <= budget:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
+        freed += size
+    return freed
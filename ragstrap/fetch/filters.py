@@ -0,0 +1,62 @@
+from pathlib import PurePosixPath
+
+from ragstrap.util.globs import compile_globs
+from ragstrap.util.ignore import should_ignore
+from ragstrap.util.text import BINARY_EXTENSIONS, looks_binary
+
+# Files above this are data dumps or vendored artifacts, not documentation
+MAX_FILE_SIZE = 10 * 1024 * 1024
+
+
+def default_filters() -> dict:
+    return {
+        "include": [],
+        "exclude": [],
+        "max_file_size": MAX_FILE_SIZE,
+        "skip_binary": True,
+    }
+
+
+class MemberFilter:
+    """
+    Decides which archive members are written to disk and tallies the rest
+    by reason: ignored (DEFAULT_IGNORES), excluded (globs), too_large or
+    binary.
+    """
+
+    def __init__(
+        self,
+        include: list[str] | None = None,
+        exclude: list[str] | None = None,
+        max_file_size: int | None = MAX_FILE_SIZE,
+        skip_binary: bool = True,
+    ):
+        self._include = compile_globs(include) if include else None
+        self._exclude = compile_globs(exclude or [])
+        self.max_file_size = max_file_size
+        self.skip_binary = skip_binary
+        self.skipped: dict[str, dict] = {}
+
+    def check(self, path: str, size: int) -> str | None:
+        """
+        Return why path should be skipped, or None to keep it.
+        """
+        if should_ignore(path):
+            return "ignored"
+        if self._include and not self._include(path):
+            return "excluded"
+        if self._exclude(path):
+            return "excluded"
+        if self.max_file_size and size > self.max_file_size:
+            return "too_large"
+        if self.skip_binary and PurePosixPath(path).suffix.lower() in BINARY_EXTENSIONS:
+            return "binary"
+        return None
+
+    def is_binary(self, head: bytes) -> bool:
+        return self.skip_binary and looks_binary(head)
+
+    def skip(self, reason: str, size: int):
+        entry = self.skipped.setdefault(reason, {"files": 0, "bytes": 0})
+        entry["files"] += 1
+        entry["bytes"] += size
@@ -1,54 +1,179 @@
+import os
 import sys
-from pathlib import Path
-from typing import Iterable
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path, PurePosixPath
+from urllib.parse import quote
 
 import requests
 
-GITHUB_API = "https://api.github.com"
+from ragstrap.fetch.filters import MemberFilter
+from ragstrap.index.language import LanguageStats
+from ragstrap.util.globs import compile_globs
+from ragstrap.util.http import (
+    GITHUB_API,
+    create_session,
+    github_headers,
+    raw_limiter,
+    request,
+)
+from ragstrap.util.memory import peak_rss_bytes
 
+GITHUB_RAW = os.getenv("GITHUB_RAW_URL", "https://raw.githubusercontent.com")
+GITHUB_RAW = GITHUB_RAW.rstrip("/")
 
-def fetch_repo_contents(
+TREE_FILE = "tree.json"
+
+DOWNLOAD_JOBS = 8
+CHUNK_SIZE = 64 * 1024
+
+
+def fetch_tree(
     owner: str,
     repo: str,
-    path: str = "",
+    ref: str,
+    session: requests.Session | None = None,
 ) -> list[dict]:
-    url = f"{GITHUB_API}/repos/{owner}/{repo}/contents/{path}"
-    resp = requests.get(url)
+    """
+    List every blob in the repository at ref with a single recursive call.
+    """
+    url = f"{GITHUB_API}/repos/{owner}/{repo}/git/trees/{ref}"
+    resp = request(
+        "GET",
+        url,
+        session=session,
+        headers=github_headers(),
+        params={"recursive": "1"},
+    )
+    resp.raise_for_status()
+    data = resp.json()
 
-    if resp.status_code == 403:
-        # Check if it's a rate limit error
-        rate_limit_header = resp.headers.get("X-RateLimit-Remaining")
-        if rate_limit_header == "0" or "rate limit" in resp.text.lower():
-            print("GitHub API rate limit exceeded.", file=sys.stderr)
-            print("Set GITHUB_TOKEN to avoid this.", file=sys.stderr)
-            sys.exit(1)
+    if data.get("truncated"):
+        print(
+            f"Warning: tree listing for {owner}/{repo} was truncated by GitHub; "
+            "some matching files may be missing.",
+            file=sys.stderr,
+        )
 
-    resp.raise_for_status()
-    return resp.json()
+    return [item for item in data["tree"] if item["type"] == "blob"]
 
 
-def download_file(url: str, dest: Path):
+def download_file(
+    url: str,
+    dest: Path,
+    session: requests.Session | None = None,
+) -> int:
     dest.parent.mkdir(parents=True, exist_ok=True)
-    r = requests.get(url)
-    r.raise_for_status()
-    dest.write_bytes(r.content)
+    resp = request(
+        "GET",
+        url,
+        session=session,
+        limiter=raw_limiter(),
+        headers=github_headers(),
+        stream=True,
+    )
+    with resp:
+        resp.raise_for_status()
+        tmp = dest.with_name(dest.name + ".ragstrap-tmp")
+        written = 0
+        with tmp.open("wb") as fh:
+            for chunk in resp.iter_content(CHUNK_SIZE):
+                written += fh.write(chunk)
+        os.replace(tmp, dest)
+    return written
 
 
-def fetch_repo_recursive(
+def fetch_repo_sparse(
     owner: str,
     repo: str,
-    remote_path: str,
-    local_root: Path,
-):
-    items = fetch_repo_contents(owner, repo, remote_path)
-
-    if isinstance(items, dict):
-        # Single file
-        download_file(items["download_url"], local_root / items["path"])
-        return
-
-    for item in items:
-        if item["type"] == "file":
-            download_file(item["download_url"], local_root / item["path"])
-        elif item["type"] == "dir":
-            fetch_repo_recursive(owner, repo, item["path"], local_root)
+    ref: str,
+    patterns: list[str],
+    dest: Path,
+    previous: dict[str, str] | None = None,
+    session: requests.Session | None = None,
+    jobs: int = DOWNLOAD_JOBS,
+    filters: MemberFilter | None = None,
+) -> dict:
+    """
+    Download only the files matching patterns into dest.
+
+    previous maps paths to the git blob SHAs of an earlier sparse fetch into
+    dest; unchanged blobs are skipped and files no longer selected are
+    removed. The new map is returned under stats["blobs"].
+
+    filters are applied to the tree listing, so binary detection relies on
+    file extensions only. Language stats likewise come from extensions and
+    sizes in the listing.
+    """
+    started = time.monotonic()
+    owns_session = session is None
+    session = session or create_session(pool_size=jobs)
+
+    try:
+        tree = fetch_tree(owner, repo, ref, session=session)
+        matches = compile_globs(patterns)
+        selected = []
+        for item in tree:
+            if not matches(item["path"]) or not _is_safe(item["path"]):
+                continue
+            if filters is not None:
+                reason = filters.check(item["path"], item.get("size", 0))
+                if reason:
+                    filters.skip(reason, item.get("size", 0))
+                    continue
+            selected.append(item)
+
+        previous = previous or {}
+        changes = {"added": [], "modified": [], "removed": []}
+        todo = []
+        for item in selected:
+            prior = previous.get(item["path"])
+            if prior == item["sha"] and (dest / item["path"]).is_file():
+                continue
+            changes["modified" if prior else "added"].append(item["path"])
+            todo.append(item)
+
+        def fetch_one(item: dict) -> int:
+            url = f"{GITHUB_RAW}/{owner}/{repo}/{ref}/{quote(item['path'])}"
+            return download_file(url, dest / item["path"], session)
+
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            # Consuming the results re-raises the first download error
+            transferred = sum(pool.map(fetch_one, todo))
+    finally:
+        if owns_session:
+            session.close()
+
+    blobs = {item["path"]: item["sha"] for item in selected}
+    for path in sorted(set(previous) - set(blobs)):
+        target = dest / path
+        if target.is_file():
+            target.unlink()
+        changes["removed"].append(path)
+
+    languages = LanguageStats()
+    for item in selected:
+        languages.add(item["path"], item.get("size", 0))
+
+    stats = {
+        "files": len(selected),
+        "bytes": sum(item.get("size", 0) for item in selected),
+        "downloaded": len(todo),
+        "transferred": transferred,
+        "first_file_seconds": None,
+        "seconds": time.monotonic() - started,
+        "peak_rss_bytes": peak_rss_bytes(),
+        "etag": None,
+        "cache": None,
+        "blobs": blobs,
+        "changes": changes,
+        "languages": languages.percentages(),
+    }
+    if filters is not None:
+        stats["skipped"] = filters.skipped
+    return stats
+
+
+def _is_safe(path: str) -> bool:
+    parts = PurePosixPath(path).parts
+    return bool(parts) and not any(p in ("", ".", "..") for p in parts)
@@ -1,49 +1,425 @@
-import io
 import os
-import sys
+import shutil
 import tarfile
-from pathlib import Path
+import time
+import zlib
+from contextlib import contextmanager
+from pathlib import Path, PurePosixPath
+from typing import BinaryIO, Iterator
 
 import requests
 
+from ragstrap.fetch.cache import (
+    TeeReader,
+    archive_path,
+    cache_budget,
+    cache_dir,
+    evict,
+    lookup_archive,
+)
+from ragstrap.fetch.filters import MemberFilter
+from ragstrap.index.language import LanguageStats
+from ragstrap.store.objects import link_object, store_blob
+from ragstrap.util.http import GITHUB_API, github_headers, request
+from ragstrap.util.memory import peak_rss_bytes
+from ragstrap.util.text import SNIFF_SIZE
 
-def download_repo_archive(owner: str, repo: str, dest: Path):
-    url = f"https://api.github.com/repos/{owner}/{repo}/tarball"
+# Upper bound for the tar read buffer and per-file copy buffer
+BUFFER_SIZE = 1024 * 1024
 
-    headers = {}
-    token = os.getenv("GITHUB_TOKEN")
-    if token:
-        headers["Authorization"] = f"Bearer {token}"
+# tarfile's stream reader re-slices its decompressed buffer on every read,
+# so a large bufsize makes each 512-byte header read copy megabytes
+TAR_READ_SIZE = 16 * 1024
 
-    resp = requests.get(url, headers=headers, stream=True)
 
-    if resp.status_code == 403:
-        # Check if it's a rate limit error
-        rate_limit_header = resp.headers.get("X-RateLimit-Remaining")
-        if rate_limit_header == "0" or "rate limit" in resp.text.lower():
-            print("GitHub API rate limit exceeded.", file=sys.stderr)
-            print("Set GITHUB_TOKEN to avoid this.", file=sys.stderr)
-            sys.exit(1)
+def resolve_head(
+    owner: str,
+    repo: str,
+    etag: str | None = None,
+    session: requests.Session | None = None,
+) -> tuple[str | None, str | None]:
+    """
+    Resolve the commit SHA at the head of the default branch.
+    Returns (sha, etag); sha is None when etag shows nothing has changed.
+    """
+    url = f"{GITHUB_API}/repos/{owner}/{repo}/commits/HEAD"
 
+    headers = github_headers()
+    headers["Accept"] = "application/vnd.github.sha"
+    if etag:
+        headers["If-None-Match"] = etag
+
+    resp = request("GET", url, session=session, headers=headers)
+
+    # Conditional requests that return 304 don't count against the rate limit
+    if resp.status_code == 304:
+        return None, etag
+
+    resp.raise_for_status()
+
+    return resp.text.strip(), resp.headers.get("ETag")
+
+
+def download_repo_archive(
+    owner: str,
+    repo: str,
+    dest: Path,
+    ref: str | None = None,
+    buffer_size: int = BUFFER_SIZE,
+    session: requests.Session | None = None,
+    delta: bool = False,
+    objects: Path | None = None,
+    offline: bool = False,
+    filters: MemberFilter | None = None,
+) -> dict:
+    """
+    Extract the archive for ref into dest, from the local archive cache when
+    possible. Archives downloaded for a pinned commit are added to the cache.
+    """
+    cache_root = cache_dir()
+    budget = cache_budget()
+    use_cache = ref is not None and budget > 0
+
+    if use_cache:
+        cached = lookup_archive(cache_root, owner, repo, ref)
+        if cached:
+            try:
+                with cached.open("rb") as fh:
+                    stats = extract_archive(
+                        fh,
+                        dest,
+                        buffer_size=buffer_size,
+                        delta=delta,
+                        objects=objects,
+                        filters=filters,
+                    )
+                stats["etag"] = None
+                stats["cache"] = "hit"
+                stats["transferred"] = 0
+                return stats
+            except (tarfile.TarError, EOFError, zlib.error):
+                # Corrupt cache entry; drop it and fall back to the network
+                cached.unlink(missing_ok=True)
+                if offline:
+                    raise
+
+    if offline:
+        raise FileNotFoundError(f"No cached archive for {owner}/{repo} at {ref}")
+
+    url = f"{GITHUB_API}/repos/{owner}/{repo}/tarball"
+    if ref:
+        url = f"{url}/{ref}"
+
+    resp = request("GET", url, session=session, headers=github_headers(), stream=True)
     resp.raise_for_status()
 
-    tar = tarfile.open(fileobj=io.BytesIO(resp.content))
-    members = tar.getmembers()
+    with resp:
+        # Undo any transfer encoding; the tarball itself stays gzipped
+        resp.raw.decode_content = True
+        tee = None
+        if use_cache:
+            tee = TeeReader(resp.raw, archive_path(cache_root, owner, repo, ref))
+        try:
+            stats = extract_archive(
+                tee or resp.raw,
+                dest,
+                buffer_size=buffer_size,
+                delta=delta,
+                objects=objects,
+                filters=filters,
+            )
+            if tee:
+                tee.commit(buffer_size)
+            # Compressed bytes read off the wire
+            stats["transferred"] = resp.raw.tell()
+        except BaseException:
+            if tee:
+                tee.discard()
+            raise
+
+    if use_cache:
+        evict(cache_root, budget)
+
+    stats["etag"] = resp.headers.get("ETag")
+    stats["cache"] = "miss" if use_cache else None
+    return stats
+
+
+def extract_archive(
+    fileobj: BinaryIO,
+    dest: Path,
+    buffer_size: int = BUFFER_SIZE,
+    delta: bool = False,
+    objects: Path | None = None,
+    filters: MemberFilter | None = None,
+) -> dict:
+    """
+    Stream a GitHub tarball into dest, writing members as they arrive.
+    Memory use is bounded by buffer_size regardless of archive size.
+
+    With delta=True, dest is treated as the previous snapshot: only new or
+    modified files are rewritten, files missing from the archive are removed,
+    and the changeset is returned under stats["changes"].
+
+    With objects set, each file is written once into that content-addressed
+    store and hardlinked into dest.
+
+    Members rejected by filters are never written; the tally per reason is
+    returned under stats["skipped"].
+
+    Bytes per language are tallied from the members as they stream past and
+    returned as percentages under stats["languages"].
+    """
+    started = time.monotonic()
+    stats = {
+        "files": 0,
+        "bytes": 0,
+        "first_file_seconds": None,
+    }
+
+    existing = _list_files(dest) if delta else set()
+    changes = {"added": [], "modified": [], "removed": []}
+    languages = LanguageStats()
+
+    root_prefix = None
+
+    bufsize = min(buffer_size, TAR_READ_SIZE)
+    with tarfile.open(fileobj=fileobj, mode="r|gz", bufsize=bufsize) as tar:
+        for member in tar:
+            # GitHub tarballs have a single top-level folder
+            if root_prefix is None:
+                root_prefix = PurePosixPath(member.name).parts[0]
+
+            if not member.isfile():
+                continue
+
+            relative = _safe_relative(member.name, root_prefix)
+            if relative is None:
+                continue
+
+            rel = relative.as_posix()
+            if filters is not None:
+                reason = filters.check(rel, member.size)
+                if reason:
+                    filters.skip(reason, member.size)
+                    continue
+
+            f = tar.extractfile(member)
+            if f is None:
+                continue
+
+            head = b""
+            if filters is not None or languages.needs_head(rel):
+                head = f.read(SNIFF_SIZE)
+                if filters is not None and filters.is_binary(head):
+                    filters.skip("binary", member.size)
+                    continue
+                f = _PrefixedReader(head, f)
+            languages.add(rel, member.size, head)
+
+            out = dest / relative
+            _make_parents(out, dest)
+
+            if objects is not None:
+                status = _link_member(f, out, member.size, objects, buffer_size)
+            elif delta:
+                status = _apply_member(f, out, member.size, buffer_size)
+            else:
+                with out.open("wb") as fh:
+                    shutil.copyfileobj(f, fh, buffer_size)
+                status = "added"
+
+            if delta:
+                existing.discard(rel)
+                if status != "unchanged":
+                    changes[status].append(rel)
+
+            if stats["first_file_seconds"] is None:
+                stats["first_file_seconds"] = time.monotonic() - started
+            stats["files"] += 1
+            stats["bytes"] += member.size
 
-    # GitHub tarballs have a single top-level folder
-    root_prefix = members[0].name.split("/")[0]
+    if delta:
+        for rel in sorted(existing):
+            path = dest / rel
+            if path.is_file() or path.is_symlink():
+                _remove_file(path, dest)
+            changes["removed"].append(rel)
+        stats["changes"] = changes
 
-    for member in members:
-        if not member.isfile():
-            continue
+    if filters is not None:
+        stats["skipped"] = filters.skipped
 
-        relative = member.name.replace(root_prefix + "/", "", 1)
-        if not relative:
-            continue
+    stats["languages"] = languages.percentages()
+    stats["seconds"] = time.monotonic() - started
+    stats["peak_rss_bytes"] = peak_rss_bytes()
+    return stats
 
-        out = dest / relative
+
+class _PrefixedReader:
+    """
+    Replays bytes already read for sniffing ahead of the rest of src.
+    """
+
+    def __init__(self, head: bytes, src: BinaryIO):
+        self._head = head
+        self._src = src
+
+    def read(self, size: int = -1) -> bytes:
+        if not self._head:
+            return self._src.read(size)
+        if size < 0:
+            data, self._head = self._head + self._src.read(), b""
+            return data
+        data, self._head = self._head[:size], self._head[size:]
+        return data
+
+
+class _ReplayReader:
+    """
+    Replays the first matched bytes of the existing file, which a compare
+    found identical to what it consumed from the member, ahead of src.
+    """
+
+    def __init__(self, existing: BinaryIO, matched: int, src: BinaryIO):
+        self._existing = existing
+        self._remaining = matched
+        self._src = src
+
+    def read(self, size: int = -1) -> bytes:
+        if not self._remaining:
+            return self._src.read(size)
+        wanted = self._remaining if size < 0 else min(size, self._remaining)
+        data = self._existing.read(wanted)
+        self._remaining = self._remaining - len(data) if data else 0
+        if size < 0:
+            data += self._src.read()
+        return data or self._src.read(size)
+
+
+def _list_files(root: Path) -> set[str]:
+    files = set()
+    for dirpath, _, filenames in os.walk(root):
+        rel_dir = Path(dirpath).relative_to(root)
+        for filename in filenames:
+            files.add((rel_dir / filename).as_posix())
+    return files
+
+
+def _apply_member(src: BinaryIO, out: Path, size: int, buffer_size: int) -> str:
+    """
+    Write a member over the previous snapshot, leaving identical files
+    (and their mtimes) untouched. Returns added, modified or unchanged.
+    """
+    if out.is_dir():
+        shutil.rmtree(out)
+
+    if not out.exists():
+        with out.open("wb") as fh:
+            shutil.copyfileobj(src, fh, buffer_size)
+        return "added"
+
+    with _compared(src, out, size, buffer_size) as changed:
+        if changed is None:
+            return "unchanged"
+        tmp = _write_tmp(changed, out, buffer_size)
+    os.replace(tmp, out)
+    return "modified"
+
+
+def _link_member(
+    src: BinaryIO, out: Path, size: int, objects: Path, buffer_size: int
+) -> str:
+    """
+    Store a member in the shared object store and hardlink it into place,
+    leaving identical files untouched. Returns added, modified or unchanged
+    relative to what was at out.
+    """
+    if out.is_dir():
+        shutil.rmtree(out)
+
+    if not out.exists():
+        obj, _ = store_blob(src, objects, buffer_size)
+        link_object(obj, out)
+        return "added"
+
+    with _compared(src, out, size, buffer_size) as changed:
+        if changed is None:
+            return "unchanged"
+        obj, _ = store_blob(changed, objects, buffer_size)
+    link_object(obj, out)
+    return "modified"
+
+
+@contextmanager
+def _compared(
+    src: BinaryIO, out: Path, size: int, buffer_size: int
+) -> Iterator[BinaryIO | None]:
+    """
+    Compare a member with the file at out: by size, then as it streams.
+    Yields None when they match, otherwise a reader for the whole member
+    that replays the bytes the compare consumed, so nothing is written
+    until a difference shows up.
+    """
+    if out.stat().st_size != size:
+        yield src
+        return
+
+    with out.open("rb") as existing:
+        matched = 0
+        while chunk := src.read(buffer_size):
+            if existing.read(len(chunk)) != chunk:
+                break
+            matched += len(chunk)
+        else:
+            yield None
+            return
+
+        existing.seek(0)
+        yield _ReplayReader(existing, matched, _PrefixedReader(chunk, src))
+
+
+def _write_tmp(src: BinaryIO, out: Path, buffer_size: int) -> Path:
+    """
+    Write the replacement for out next to it. Callers os.replace() it over
+    out, so a hardlinked out (a shared object) is never written in place.
+    """
+    tmp = out.with_name(out.name + ".ragstrap-tmp")
+    with tmp.open("wb") as fh:
+        shutil.copyfileobj(src, fh, buffer_size)
+    return tmp
+
+
+def _make_parents(out: Path, dest: Path):
+    try:
+        out.parent.mkdir(parents=True, exist_ok=True)
+    except (FileExistsError, NotADirectoryError):
+        # A file in the previous snapshot is now a directory upstream
+        for parent in reversed(out.relative_to(dest).parents):
+            candidate = dest / parent
+            if candidate.is_file():
+                candidate.unlink()
         out.parent.mkdir(parents=True, exist_ok=True)
 
-        f = tar.extractfile(member)
-        if f:
-            out.write_bytes(f.read())
+
+def _remove_file(path: Path, root: Path):
+    path.unlink()
+    parent = path.parent
+    while parent != root and not any(parent.iterdir()):
+        parent.rmdir()
+        parent = parent.parent
+
+
+def _safe_relative(name: str, root_prefix: str) -> Path | None:
+    """
+    Strip the archive root folder, rejecting paths that would escape dest.
+    """
+    parts = PurePosixPath(name).parts
+    if len(parts) < 2 or parts[0] != root_prefix:
+        return None
+
+    relative = parts[1:]
+    if any(p in ("", ".", "..") or "\\" in p for p in relative):
+        return None
+
+    return Path(*relative)
@@ -2,8 +2,14 @@ import json
 import re
 from datetime import datetime
 from pathlib import Path
+from typing import Collection
 
-from .language import detect_languages
+from .language import (
+    detect_languages,
+    languages_from_percentages,
+    manifest_languages,
+)
+from .manifest import load_manifest, scan_tree, top_level_dirs, top_level_files
 
 
 def read_first_paragraph(path: Path) -> str | None:
@@ -42,44 +48,54 @@ def read_first_paragraph(path: Path) -> str | None:
     return None
 
 
-def detect_readme(raw: Path) -> Path | None:
+def detect_readme(raw: Path, top_level: Collection[str]) -> Path | None:
     for name in ("README.md", "README.rst", "README.txt"):
-        candidate = raw / name
-        if candidate.exists():
-            return candidate
+        if name in top_level:
+            return raw / name
     return None
 
 
-def list_dirs(raw: Path) -> list[str]:
-    return sorted(
-        p.name for p in raw.iterdir() if p.is_dir() and not p.name.startswith(".")
-    )
+def list_dirs(manifest: dict) -> list[str]:
+    return sorted(d for d in top_level_dirs(manifest) if not d.startswith("."))
 
 
-def list_files(raw: Path) -> list[str]:
-    return sorted(p.name for p in raw.iterdir() if p.is_file())
+def list_files(manifest: dict) -> list[str]:
+    return sorted(top_level_files(manifest))
 
 
-def generate_index(reference_dir: Path):
+def generate_index(reference_dir: Path, manifest: dict | None = None):
     raw = reference_dir / "raw"
     meta_path = reference_dir / "meta.json"
 
+    if manifest is None:
+        manifest = load_manifest(reference_dir) or scan_tree(raw)
+
     meta = {}
     if meta_path.exists():
         meta = json.loads(meta_path.read_text())
 
-    readme = detect_readme(raw)
+    dirs = list_dirs(manifest)
+    files = list_files(manifest)
+
+    readme = detect_readme(raw, files)
     summary = read_first_paragraph(readme) if readme else None
 
-    primary_language, secondary_languages = detect_languages(raw)
+    # Byte shares tallied at extraction, else from manifest sizes; marker
+    # files only decide when no source file has a known extension
+    percentages = meta.get("languages") or manifest_languages(manifest)
+    if percentages:
+        primary_language, secondary_languages = languages_from_percentages(
+            percentages
+        )
+    else:
+        primary_language, secondary_languages = detect_languages(files)
     meta["language"] = primary_language
     if secondary_languages:
         meta["secondary_languages"] = secondary_languages
+    else:
+        meta.pop("secondary_languages", None)
     meta_path.write_text(json.dumps(meta, indent=2))
 
-    dirs = list_dirs(raw)
-    files = list_files(raw)
-
     lines: list[str] = []
 
     lines.append(f"# {meta.get('name', 'Library')} — Local Reference")
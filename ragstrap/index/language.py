@@ -1,9 +1,13 @@
-from pathlib import Path
+from pathlib import PurePosixPath
+from typing import Collection
 
+from ragstrap.util.ignore import is_vendored, should_ignore
 
-def detect_languages(raw: Path) -> tuple[str, list[str]]:
+
+def detect_languages(top_level: Collection[str]) -> tuple[str, list[str]]:
     """
     Detect primary and secondary languages using strong repository signals.
+    top_level holds the file names at the repository root.
     Returns (primary_language, secondary_languages).
     """
     signals = {
@@ -31,7 +35,7 @@ def detect_languages(raw: Path) -> tuple[str, list[str]]:
 
     for language, files in signals.items():
         for f in files:
-            if (raw / f).exists():
+            if f in top_level:
                 detected.append(language)
                 break
 
@@ -42,3 +46,158 @@ def detect_languages(raw: Path) -> tuple[str, list[str]]:
     secondary = detected[1:]
 
     return primary, secondary
+
+
+# Programming languages only: docs and data formats don't make a repository
+# "a Markdown project"
+EXTENSIONS = {
+    ".py": "python",
+    ".pyi": "python",
+    ".pyx": "python",
+    ".rs": "rust",
+    ".go": "go",
+    ".js": "javascript",
+    ".mjs": "javascript",
+    ".cjs": "javascript",
+    ".jsx": "javascript",
+    ".ts": "typescript",
+    ".mts": "typescript",
+    ".cts": "typescript",
+    ".tsx": "typescript",
+    ".c": "c",
+    ".h": "c",
+    ".cc": "cpp",
+    ".cpp": "cpp",
+    ".cxx": "cpp",
+    ".hh": "cpp",
+    ".hpp": "cpp",
+    ".java": "java",
+    ".kt": "kotlin",
+    ".kts": "kotlin",
+    ".scala": "scala",
+    ".swift": "swift",
+    ".m": "objective-c",
+    ".cs": "csharp",
+    ".fs": "fsharp",
+    ".rb": "ruby",
+    ".php": "php",
+    ".pl": "perl",
+    ".pm": "perl",
+    ".lua": "lua",
+    ".sh": "shell",
+    ".bash": "shell",
+    ".zsh": "shell",
+    ".hs": "haskell",
+    ".ml": "ocaml",
+    ".mli": "ocaml",
+    ".ex": "elixir",
+    ".exs": "elixir",
+    ".erl": "erlang",
+    ".clj": "clojure",
+    ".dart": "dart",
+    ".zig": "zig",
+    ".nim": "nim",
+    ".jl": "julia",
+    ".r": "r",
+    ".vue": "vue",
+    ".svelte": "svelte",
+}
+
+SHEBANGS = {
+    "python": "python",
+    "bash": "shell",
+    "sh": "shell",
+    "zsh": "shell",
+    "dash": "shell",
+    "node": "javascript",
+    "deno": "typescript",
+    "ts-node": "typescript",
+    "ruby": "ruby",
+    "perl": "perl",
+    "php": "php",
+    "lua": "lua",
+}
+
+# Languages with a smaller share than this aren't listed as secondary
+SECONDARY_MIN_PERCENT = 5.0
+
+
+class LanguageStats:
+    """
+    Tallies bytes per language by extension, or by shebang for files
+    without one, skipping ignored, vendored and generated paths.
+    """
+
+    def __init__(self):
+        self.bytes: dict[str, int] = {}
+
+    def needs_head(self, path: str) -> bool:
+        """
+        True when add() can only classify path from its first bytes.
+        """
+        return not PurePosixPath(path).suffix and not _excluded(path)
+
+    def add(self, path: str, size: int, head: bytes = b""):
+        if _excluded(path):
+            return
+        suffix = PurePosixPath(path).suffix.lower()
+        language = EXTENSIONS.get(suffix) if suffix else shebang_language(head)
+        if language:
+            self.bytes[language] = self.bytes.get(language, 0) + size
+
+    def percentages(self) -> dict[str, float]:
+        """
+        Share of bytes per language, largest first. Languages whose share
+        rounds to 0.0% are left out.
+        """
+        total = sum(self.bytes.values())
+        if not total:
+            return {}
+        ranked = sorted(self.bytes.items(), key=lambda item: (-item[1], item[0]))
+        shares = {
+            language: round(100 * size / total, 1) for language, size in ranked
+        }
+        return {language: share for language, share in shares.items() if share}
+
+
+def shebang_language(head: bytes) -> str | None:
+    if not head.startswith(b"#!"):
+        return None
+    words = head[2:].split(b"\n", 1)[0].decode("utf-8", errors="ignore").split()
+    if words and words[0].endswith("/env"):
+        words = [w for w in words[1:] if not w.startswith("-") and "=" not in w]
+    if not words:
+        return None
+    interpreter = PurePosixPath(words[0]).name.rstrip("0123456789.")
+    return SHEBANGS.get(interpreter)
+
+
+def manifest_languages(manifest: dict) -> dict[str, float]:
+    """
+    Byte shares by extension from a manifest, for references extracted
+    before language stats were recorded.
+    """
+    stats = LanguageStats()
+    for entry in manifest["files"]:
+        if entry["ext"]:
+            stats.add(entry["path"], entry["size"])
+    return stats.percentages()
+
+
+def languages_from_percentages(percentages: dict[str, float]) -> tuple[str, list[str]]:
+    """
+    Pick (primary_language, secondary_languages) from a percentage map.
+    """
+    if not percentages:
+        return "unknown", []
+    ranked = list(percentages)
+    secondary = [
+        language
+        for language in ranked[1:]
+        if percentages[language] >= SECONDARY_MIN_PERCENT
+    ]
+    return ranked[0], secondary
+
+
+def _excluded(path: str) -> bool:
+    return should_ignore(path) or is_vendored(path)
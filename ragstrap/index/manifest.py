@@ -0,0 +1,74 @@
+import json
+import os
+from pathlib import Path
+
+from ragstrap.util.ignore import should_ignore
+
+MANIFEST_FILE = "manifest.json"
+
+
+def scan_tree(raw: Path) -> dict:
+    """
+    Walk raw once and record every non-ignored file with its size and
+    extension. Post-fetch stages consume this instead of re-walking the tree.
+    """
+    dirs: list[str] = []
+    files: list[dict] = []
+
+    stack = [("", raw)]
+    while stack:
+        prefix, path = stack.pop()
+        with os.scandir(path) as entries:
+            for entry in entries:
+                rel = prefix + entry.name
+                if should_ignore(rel):
+                    continue
+
+                if entry.is_dir(follow_symlinks=False):
+                    dirs.append(rel)
+                    stack.append((rel + "/", Path(entry.path)))
+                elif entry.is_file(follow_symlinks=False):
+                    st = entry.stat(follow_symlinks=False)
+                    files.append(
+                        {
+                            "path": rel,
+                            "size": st.st_size,
+                            "mtime_ns": st.st_mtime_ns,
+                            "ext": os.path.splitext(entry.name)[1].lower(),
+                        }
+                    )
+
+    dirs.sort()
+    files.sort(key=lambda f: f["path"])
+
+    return {
+        "version": 1,
+        "dirs": dirs,
+        "files": files,
+    }
+
+
+def write_manifest(reference_dir: Path, manifest: dict):
+    (reference_dir / MANIFEST_FILE).write_text(json.dumps(manifest))
+
+
+def load_manifest(reference_dir: Path) -> dict | None:
+    path = reference_dir / MANIFEST_FILE
+    if not path.exists():
+        return None
+    try:
+        return json.loads(path.read_text())
+    except json.JSONDecodeError:
+        return None
+
+
+def manifest_paths(manifest: dict) -> set[str]:
+    return {f["path"] for f in manifest["files"]}
+
+
+def top_level_files(manifest: dict) -> list[str]:
+    return [f["path"] for f in manifest["files"] if "/" not in f["path"]]
+
+
+def top_level_dirs(manifest: dict) -> list[str]:
+    return [d for d in manifest["dirs"] if "/" not in d]
@@ -0,0 +1,140 @@
+import heapq
+import math
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from ragstrap.search.index import SEARCH_DB, TERM_RE, search_reference
+
+DEFAULT_TIMEOUT = 5.0
+
+# FTS5's bm25() term-frequency saturation parameter
+BM25_K1 = 1.2
+
+# SQLite virtual machine steps between deadline checks
+PROGRESS_STEPS = 10_000
+
+
+def search_all(
+    references: Path,
+    directories: list[str],
+    query: str,
+    limit: int = 20,
+    timeout: float = DEFAULT_TIMEOUT,
+    jobs: int | None = None,
+) -> dict:
+    """
+    Search every listed reference concurrently, one shard each, and merge
+    the best limit hits into a single ranking. Shards still running when
+    timeout seconds have passed are interrupted and reported as timed out.
+
+    Returns {"hits", "shards", "seconds"}. Hits carry the reference name
+    and a score normalized to 0-1 so shards of different sizes compare;
+    shards carry their status, hit count and latency.
+    """
+    started = time.monotonic()
+    deadline = started + timeout
+    terms = [term.lower() for term in TERM_RE.findall(query)]
+
+    # Min-heap of the best hits so far; the seq breaks ties between equal scores
+    best: list[tuple[float, int, dict]] = []
+    seq = 0
+    shards = []
+
+    # SQLite releases the GIL while it runs a query, so threads scale
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = {
+            pool.submit(
+                _search_shard, references / name, query, terms, limit, deadline
+            ): name
+            for name in directories
+        }
+        for future in as_completed(futures):
+            shard = future.result()
+            shard["reference"] = futures[future]
+            hits = shard["hits"]
+            shard["hits"] = len(hits)
+            for hit in hits:
+                hit["reference"] = shard["reference"]
+                seq += 1
+                entry = (hit["score"], -seq, hit)
+                if len(best) < limit:
+                    heapq.heappush(best, entry)
+                elif entry > best[0]:
+                    heapq.heapreplace(best, entry)
+            shards.append(shard)
+
+    shards.sort(key=lambda shard: shard["reference"])
+    return {
+        "hits": [hit for _, _, hit in sorted(best, reverse=True)],
+        "shards": shards,
+        "seconds": time.monotonic() - started,
+    }
+
+
+def _search_shard(
+    base: Path,
+    query: str,
+    terms: list[str],
+    limit: int,
+    deadline: float,
+) -> dict:
+    started = time.monotonic()
+    shard = {"status": "ok", "hits": [], "seconds": 0.0}
+    if started > deadline:
+        shard["status"] = "timeout"
+        return shard
+    if not (base / SEARCH_DB).exists():
+        shard["status"] = "unindexed"
+        return shard
+
+    try:
+        conn = sqlite3.connect(f"file:{base / SEARCH_DB}?mode=ro", uri=True)
+    except sqlite3.Error as exc:
+        shard.update(status="error", error=str(exc))
+        return shard
+    # Returning true from the handler interrupts the running statement
+    conn.set_progress_handler(lambda: time.monotonic() > deadline, PROGRESS_STEPS)
+    try:
+        hits = search_reference(base, query, limit=limit, conn=conn)
+        if hits:
+            scale = _max_score(conn, terms)
+            for hit in hits:
+                hit["bm25"] = hit["score"]
+                hit["score"] = min(hit["score"] / scale, 1.0)
+        shard["hits"] = hits
+    except sqlite3.Error as exc:
+        if "interrupted" in str(exc):
+            shard["status"] = "timeout"
+        else:
+            shard.update(status="error", error=str(exc))
+    finally:
+        conn.close()
+        shard["seconds"] = time.monotonic() - started
+    return shard
+
+
+def _max_score(conn: sqlite3.Connection, terms: list[str]) -> float:
+    """
+    The bm25() score a block would approach with every query term repeated
+    endlessly: the sum over terms of IDF * (k1 + 1). Dividing by it turns
+    raw scores, whose scale depends on the size and vocabulary of each
+    shard, into a 0-1 measure of how well a block matches.
+    """
+    conn.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS temp.search_vocab "
+        "USING fts5vocab(main, blocks_fts, row)"
+    )
+    (total,) = conn.execute("SELECT count(*) FROM blocks").fetchone()
+    scale = 0.0
+    # A repeated term is a separate phrase to bm25(), so it counts each time
+    for term in terms:
+        row = conn.execute(
+            "SELECT doc FROM temp.search_vocab WHERE term = ?", (term,)
+        ).fetchone()
+        docs = row[0] if row else 0
+        # Same IDF, floor included, as FTS5's bm25()
+        idf = math.log((total - docs + 0.5) / (docs + 0.5))
+        scale += max(idf, 1e-6) * (BM25_K1 + 1)
+    return scale or 1.0
@@ -0,0 +1,199 @@
+import hashlib
+import re
+import sqlite3
+from pathlib import Path
+
+from ragstrap.util.text import is_text_candidate, looks_binary
+
+SEARCH_DB = "search.db"
+
+# Lines per indexed block; smaller blocks give tighter line numbers
+BLOCK_LINES = 10
+
+TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS blocks (
+    id INTEGER PRIMARY KEY,
+    file_id INTEGER NOT NULL,
+    line INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS blocks_file_id ON blocks (file_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS blocks_fts USING fts5(
+    body,
+    tokenize = 'unicode61'
+);
+"""
+
+
+def connect(reference_dir: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(reference_dir / SEARCH_DB)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def update_search_index(reference_dir: Path, manifest: dict) -> dict:
+    """
+    Bring search.db in line with the manifest, re-indexing only files whose
+    content changed. Returns counts of indexed, removed and unchanged files.
+    """
+    raw = reference_dir / "raw"
+    stats = {"indexed": 0, "removed": 0, "unchanged": 0}
+
+    with connect(reference_dir) as conn:
+        known = {
+            path: (file_id, size, mtime_ns, sha256)
+            for file_id, path, size, mtime_ns, sha256 in conn.execute(
+                "SELECT id, path, size, mtime_ns, sha256 FROM files"
+            )
+        }
+
+        for entry in manifest["files"]:
+            if not is_text_candidate(entry):
+                continue
+
+            path = entry["path"]
+            previous = known.pop(path, None)
+            if previous and previous[1:3] == (entry["size"], entry["mtime_ns"]):
+                stats["unchanged"] += 1
+                continue
+
+            data = (raw / path).read_bytes()
+            sha256 = hashlib.sha256(data).hexdigest()
+
+            if previous and previous[3] == sha256:
+                conn.execute(
+                    "UPDATE files SET mtime_ns = ? WHERE id = ?",
+                    (entry["mtime_ns"], previous[0]),
+                )
+                stats["unchanged"] += 1
+                continue
+
+            if previous:
+                _delete_file(conn, previous[0])
+
+            cur = conn.execute(
+                "INSERT INTO files (path, size, mtime_ns, sha256) VALUES (?, ?, ?, ?)",
+                (path, entry["size"], entry["mtime_ns"], sha256),
+            )
+            # Binary files keep their row so they aren't re-read next time
+            if not looks_binary(data):
+                text = data.decode("utf-8", errors="ignore")
+                _insert_blocks(conn, cur.lastrowid, text)
+            stats["indexed"] += 1
+
+        # Whatever is left disappeared from the snapshot
+        for file_id, *_ in known.values():
+            _delete_file(conn, file_id)
+            stats["removed"] += 1
+
+    conn.close()
+    return stats
+
+
+def _delete_file(conn: sqlite3.Connection, file_id: int):
+    conn.execute(
+        "DELETE FROM blocks_fts WHERE rowid IN "
+        "(SELECT id FROM blocks WHERE file_id = ?)",
+        (file_id,),
+    )
+    conn.execute("DELETE FROM blocks WHERE file_id = ?", (file_id,))
+    conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+
+
+def _insert_blocks(conn: sqlite3.Connection, file_id: int, text: str):
+    lines = [line.rstrip("\r") for line in text.split("\n")]
+    for start in range(0, len(lines), BLOCK_LINES):
+        body = "\n".join(lines[start : start + BLOCK_LINES])
+        if not body.strip():
+            continue
+        cur = conn.execute(
+            "INSERT INTO blocks (file_id, line) VALUES (?, ?)",
+            (file_id, start + 1),
+        )
+        conn.execute(
+            "INSERT INTO blocks_fts (rowid, body) VALUES (?, ?)",
+            (cur.lastrowid, body),
+        )
+
+
+def build_match_query(query: str) -> str | None:
+    """
+    Turn free text into an FTS5 query that matches all terms.
+    """
+    terms = TERM_RE.findall(query)
+    if not terms:
+        return None
+    return " ".join(f'"{term}"' for term in terms)
+
+
+def search_reference(
+    reference_dir: Path,
+    query: str,
+    limit: int = 20,
+    conn: sqlite3.Connection | None = None,
+) -> list[dict]:
+    """
+    Return ranked hits as dicts with path, line, text and score (higher is
+    better). Long-lived callers can pass an open connection to search.db.
+    """
+    match = build_match_query(query)
+    if match is None:
+        return []
+
+    terms = [t.lower() for t in TERM_RE.findall(query)]
+
+    owns_conn = conn is None
+    if owns_conn:
+        conn = sqlite3.connect(reference_dir / SEARCH_DB)
+    try:
+        rows = conn.execute(
+            """
+            SELECT files.path, blocks.line, blocks_fts.body, bm25(blocks_fts)
+            FROM blocks_fts
+            JOIN blocks ON blocks.id = blocks_fts.rowid
+            JOIN files ON files.id = blocks.file_id
+            WHERE blocks_fts MATCH ?
+            ORDER BY bm25(blocks_fts)
+            LIMIT ?
+            """,
+            (match, limit),
+        ).fetchall()
+    finally:
+        if owns_conn:
+            conn.close()
+
+    hits = []
+    for path, line, body, rank in rows:
+        offset, text = _best_line(body, terms)
+        hits.append(
+            {
+                "path": path,
+                "line": line + offset,
+                "text": text,
+                # bm25() is negative, lower is better
+                "score": -rank,
+            }
+        )
+    return hits
+
+
+def _best_line(body: str, terms: list[str]) -> tuple[int, str]:
+    """
+    Pick the line of a block that contains the most query terms.
+    """
+    lines = body.split("\n")
+    best = (0, 0, lines[0])
+    for i, line in enumerate(lines):
+        lowered = line.lower()
+        found = sum(1 for t in terms if t in lowered)
+        if found > best[0]:
+            best = (found, i, line)
+    return best[1], best[2].strip()
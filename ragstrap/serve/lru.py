@@ -0,0 +1,63 @@
+import threading
+from collections import OrderedDict
+from typing import Hashable
+
+
+class ByteLRU:
+    """
+    Thread-safe LRU mapping that evicts the least recently used entries once
+    their combined size exceeds max_bytes. Keys are tuples whose first item
+    groups entries for discard_group().
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple, tuple[object, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: tuple, value: object, size: int):
+        # An entry larger than the whole budget would only evict everything
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous[1]
+            self._entries[key] = (value, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+
+    def discard_group(self, group: Hashable) -> int:
+        """
+        Drop every entry whose key starts with group. Returns how many.
+        """
+        with self._lock:
+            keys = [key for key in self._entries if key[0] == group]
+            for key in keys:
+                self.bytes -= self._entries.pop(key)[1]
+        return len(keys)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
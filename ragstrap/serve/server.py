@@ -0,0 +1,354 @@
+import json
+import os
+import re
+import socketserver
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path, PurePosixPath
+from typing import Iterator
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from ragstrap.search.index import SEARCH_DB, search_reference
+from ragstrap.serve.lru import ByteLRU
+from ragstrap.symbols.index import SYMBOLS_DB, find_symbols
+from ragstrap.store.catalog import catalog_path, query_references, rebuild_catalog
+from ragstrap.util.text import SNIFF_SIZE, looks_binary
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 7787
+CACHE_SIZE = 256 * 1024 * 1024
+
+MAX_SEARCH_LIMIT = 200
+
+NAME_RE = re.compile(r"^[^/\\]+$")
+
+ROUTES = [
+    (re.compile(r"^/references$"), "list"),
+    (re.compile(r"^/references/([^/]+)$"), "info"),
+    (re.compile(r"^/references/([^/]+)/index$"), "index"),
+    (re.compile(r"^/references/([^/]+)/examples$"), "examples"),
+    (re.compile(r"^/references/([^/]+)/search$"), "search"),
+    (re.compile(r"^/references/([^/]+)/symbols$"), "symbols"),
+    (re.compile(r"^/references/([^/]+)/files/(.+)$"), "file"),
+    (re.compile(r"^/stats$"), "stats"),
+]
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class _SharedConnection:
+    """
+    A cached sqlite connection, used by one request at a time. Once retired
+    it is closed by whoever releases it last, so invalidation never closes
+    it under a request that already holds it.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.lock = threading.Lock()
+        self.users = 0
+        self.retired = False
+
+
+class ReferenceStore:
+    """
+    Reference data kept in memory between requests. Everything cached for a
+    reference is dropped as soon as its meta.json changes, which fetch and
+    update rewrite on every run.
+    """
+
+    def __init__(self, references: Path, max_bytes: int = CACHE_SIZE):
+        self.references = references
+        self.cache = ByteLRU(max_bytes)
+        self.started = time.time()
+        self._versions: dict[str, int] = {}
+        self._connections: dict[tuple[str, str], _SharedConnection] = {}
+        self._lock = threading.Lock()
+
+    def list_references(
+        self,
+        language: str | None = None,
+        stale_since: str | None = None,
+        sort: str = "name",
+    ) -> list[dict]:
+        if not self.references.is_dir():
+            return []
+        if not catalog_path(self.references).exists():
+            rebuild_catalog(self.references)
+        try:
+            refs = query_references(
+                self.references, language=language, stale_since=stale_since, sort=sort
+            )
+        except ValueError as exc:
+            raise ApiError(400, f"Invalid stale_since: {exc}") from exc
+        return [
+            {
+                "name": ref["meta"].get("name", ref["directory"])
+                if ref["meta"]
+                else ref["directory"],
+                "directory": ref["directory"],
+                "path": str(self.references / ref["directory"]),
+                "meta": ref["meta"],
+            }
+            for ref in refs
+        ]
+
+    def info(self, name: str) -> dict:
+        base = self._reference(name)
+        meta = self._cached(name, ("meta",), lambda: _read_text(base / "meta.json"))
+        try:
+            meta = json.loads(meta)
+        except json.JSONDecodeError as exc:
+            raise ApiError(500, f"Invalid meta.json for '{name}': {exc}") from exc
+        return {
+            "name": meta.get("name", name),
+            "directory": name,
+            "path": str(base),
+            "meta": meta,
+        }
+
+    def index(self, name: str) -> dict:
+        base = self._reference(name)
+        text = self._cached(name, ("index",), lambda: _read_text(base / "index.md"))
+        return {"name": name, "text": text}
+
+    def read_file(self, name: str, path: str) -> dict:
+        base = self._reference(name)
+        pure = PurePosixPath(path)
+        if (
+            not pure.parts
+            or pure.is_absolute()
+            or any(p in ("", ".", "..") for p in pure.parts)
+        ):
+            raise ApiError(400, f"Invalid path: {path}")
+        raw = (base / "raw").resolve()
+        # Symlinks in the snapshot must not lead out of it either
+        resolved = (raw / path).resolve()
+        if not resolved.is_relative_to(raw):
+            raise ApiError(400, f"Invalid path: {path}")
+        text = self._cached(name, ("file", path), lambda: _read_text(resolved))
+        return {"name": name, "path": path, "text": text}
+
+    def examples(self, name: str) -> list[dict]:
+        base = self._reference(name)
+
+        def load() -> str:
+            examples_dir = base / "examples"
+            if not examples_dir.is_dir():
+                return "[]"
+            files = sorted(
+                p for p in examples_dir.iterdir() if p.suffix == ".md" and p.is_file()
+            )
+            return json.dumps(
+                [{"file": p.name, "text": p.read_text(errors="replace")} for p in files]
+            )
+
+        return json.loads(self._cached(name, ("examples",), load))
+
+    def search(self, name: str, query: str, limit: int) -> list[dict]:
+        base = self._reference(name)
+        with self._connection(name, base, SEARCH_DB, "search index") as conn:
+            return search_reference(base, query, limit=limit, conn=conn)
+
+    def symbols(
+        self, name: str, pattern: str, kind: str | None, limit: int
+    ) -> list[dict]:
+        base = self._reference(name)
+        with self._connection(name, base, SYMBOLS_DB, "symbol index") as conn:
+            return find_symbols(base, pattern, kind=kind, limit=limit, conn=conn)
+
+    def stats(self) -> dict:
+        return {
+            "uptime_seconds": time.time() - self.started,
+            "cache": self.cache.stats(),
+            "loaded_references": len(self._versions),
+        }
+
+    def _reference(self, name: str) -> Path:
+        if not NAME_RE.match(name) or name.startswith("."):
+            raise ApiError(404, f"Reference '{name}' not found")
+        base = self.references / name
+        try:
+            version = (base / "meta.json").stat().st_mtime_ns
+        except OSError:
+            self._invalidate(name)
+            raise ApiError(404, f"Reference '{name}' not found") from None
+        with self._lock:
+            current = self._versions.get(name)
+        if current != version:
+            self._invalidate(name)
+            with self._lock:
+                self._versions[name] = version
+        return base
+
+    @contextmanager
+    def _connection(
+        self, name: str, base: Path, db: str, label: str
+    ) -> Iterator[sqlite3.Connection]:
+        if not (base / db).exists():
+            raise ApiError(404, f"Reference '{name}' has no {label}")
+        with self._lock:
+            entry = self._connections.get((name, db))
+            if entry is None:
+                conn = sqlite3.connect(base / db, check_same_thread=False)
+                entry = self._connections[name, db] = _SharedConnection(conn)
+            entry.users += 1
+        try:
+            with entry.lock:
+                yield entry.conn
+        finally:
+            with self._lock:
+                entry.users -= 1
+                close = entry.retired and not entry.users
+            if close:
+                entry.conn.close()
+
+    def _invalidate(self, name: str):
+        self.cache.discard_group(name)
+        idle = []
+        with self._lock:
+            self._versions.pop(name, None)
+            for key in [key for key in self._connections if key[0] == name]:
+                entry = self._connections.pop(key)
+                entry.retired = True
+                if not entry.users:
+                    idle.append(entry)
+        # Connections still in use are closed by their last user
+        for entry in idle:
+            entry.conn.close()
+
+    def _cached(self, name: str, key: tuple, load) -> str:
+        value = self.cache.get((name, *key))
+        if value is None:
+            value = load()
+            self.cache.put((name, *key), value, len(value))
+        return value
+
+
+def _read_text(path: Path) -> str:
+    try:
+        data = path.read_bytes()
+    except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
+        raise ApiError(404, f"{path.name} not found") from None
+    if looks_binary(data[:SNIFF_SIZE]):
+        raise ApiError(415, f"{path.name} is a binary file")
+    return data.decode("utf-8", errors="replace")
+
+
+class Handler(BaseHTTPRequestHandler):
+    # Keep-alive lets clients skip a TCP handshake per query
+    protocol_version = "HTTP/1.1"
+    # Buffer each response so headers and body leave in one send; separate
+    # small writes stall for ~40 ms on Nagle's algorithm and delayed ACKs
+    wbufsize = 64 * 1024
+    store: ReferenceStore
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            payload = self._dispatch(unquote(url.path.rstrip("/")), params)
+        except ApiError as exc:
+            self._send(exc.status, {"error": str(exc)})
+            return
+        except (sqlite3.Error, OSError) as exc:
+            # A reference changing mid-request; answer rather than drop it
+            self._send(500, {"error": str(exc) or type(exc).__name__})
+            return
+        self._send(200, payload)
+
+    def _dispatch(self, path: str, params: dict) -> object:
+        store = self.store
+        for pattern, route in ROUTES:
+            match = pattern.match(path)
+            if not match:
+                continue
+            args = match.groups()
+            if route == "list":
+                return store.list_references(
+                    language=params.get("language"),
+                    stale_since=params.get("stale_since"),
+                    sort=params.get("sort", "name"),
+                )
+            if route == "info":
+                return store.info(*args)
+            if route == "index":
+                return store.index(*args)
+            if route == "examples":
+                return store.examples(*args)
+            if route == "file":
+                return store.read_file(*args)
+            if route == "search":
+                query = params.get("q")
+                if not query:
+                    raise ApiError(400, "Missing query parameter 'q'")
+                return store.search(args[0], query, _limit(params))
+            if route == "symbols":
+                pattern = params.get("q")
+                if pattern is None:
+                    raise ApiError(400, "Missing query parameter 'q'")
+                return store.symbols(
+                    args[0], pattern, params.get("kind"), _limit(params)
+                )
+            if route == "stats":
+                return store.stats()
+        raise ApiError(404, f"No route for {path}")
+
+    def _send(self, status: int, payload: object):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def _limit(params: dict) -> int:
+    try:
+        limit = int(params.get("limit", 20))
+    except ValueError:
+        raise ApiError(400, "'limit' must be an integer") from None
+    return max(min(limit, MAX_SEARCH_LIMIT), 1)
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        conn, _ = super().get_request()
+        # BaseHTTPRequestHandler expects a (host, port) client address
+        return conn, ("local", 0)
+
+
+def create_server(
+    references: Path,
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    socket_path: Path | None = None,
+    max_bytes: int = CACHE_SIZE,
+) -> socketserver.BaseServer:
+    """
+    Build a threaded HTTP server for references/, listening on host:port or
+    on a Unix socket when socket_path is set. Call serve_forever() on it.
+    """
+    handler = type(
+        "BoundHandler", (Handler,), {"store": ReferenceStore(references, max_bytes)}
+    )
+    if socket_path is None:
+        server = ThreadingHTTPServer((host, port), handler)
+        server.daemon_threads = True
+        return server
+
+    if socket_path.exists():
+        os.unlink(socket_path)
+    return ThreadingUnixHTTPServer(str(socket_path), handler)
@@ -0,0 +1,181 @@
+import json
+import re
+import sqlite3
+from contextlib import closing
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+CATALOG_DB = ".catalog.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS refs (
+    directory TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    source TEXT,
+    language TEXT,
+    secondary_languages TEXT NOT NULL DEFAULT '[]',
+    fetched_at TEXT,
+    checked_at TEXT,
+    meta TEXT
+);
+CREATE INDEX IF NOT EXISTS refs_language ON refs (language);
+CREATE INDEX IF NOT EXISTS refs_checked ON refs (coalesce(checked_at, fetched_at));
+"""
+
+SORT_COLUMNS = {
+    "name": "lower(name)",
+    "fetched": "fetched_at DESC",
+    "checked": "coalesce(checked_at, fetched_at) DESC",
+    # Least recently checked first, for update --all
+    "stale": "coalesce(checked_at, fetched_at, '')",
+}
+
+DURATION_RE = re.compile(r"^(\d+)\s*([smhdw])$")
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+def catalog_path(references: Path) -> Path:
+    return references / CATALOG_DB
+
+
+def connect(references: Path) -> sqlite3.Connection:
+    # fetch-many writes from several threads; WAL keeps readers unblocked
+    conn = sqlite3.connect(catalog_path(references), timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def upsert_reference(references: Path, directory: str, meta: dict | None):
+    with closing(connect(references)) as conn, conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO refs VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            _row(directory, meta),
+        )
+
+
+def rebuild_catalog(references: Path) -> int:
+    """
+    Replace the catalog with what is on disk. Returns the number of
+    references found.
+    """
+    rows = []
+    for ref in references.iterdir():
+        if ref.is_dir() and not ref.name.startswith("."):
+            rows.append(_row(ref.name, _read_meta(ref)))
+
+    with closing(connect(references)) as conn, conn:
+        conn.execute("DELETE FROM refs")
+        conn.executemany("INSERT INTO refs VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    return len(rows)
+
+
+def query_references(
+    references: Path,
+    language: str | None = None,
+    stale_since: str | None = None,
+    sort: str = "name",
+) -> list[dict]:
+    """
+    Return {"directory", "meta"} rows. language matches primary or secondary
+    languages; stale_since keeps references not checked since that time.
+    """
+    where, params = _where(language, stale_since)
+    order = SORT_COLUMNS.get(sort, SORT_COLUMNS["name"])
+
+    with closing(connect(references)) as conn:
+        rows = conn.execute(
+            f"SELECT directory, meta FROM refs {where} ORDER BY {order}, directory",
+            params,
+        ).fetchall()
+    return [
+        {"directory": directory, "meta": json.loads(meta) if meta else None}
+        for directory, meta in rows
+    ]
+
+
+def query_directories(
+    references: Path,
+    language: str | None = None,
+    stale_since: str | None = None,
+) -> list[str]:
+    """
+    Like query_references, but only the directory names, without decoding
+    every meta.json; for callers that fan out over thousands of references.
+    """
+    where, params = _where(language, stale_since)
+    with closing(connect(references)) as conn:
+        rows = conn.execute(
+            f"SELECT directory FROM refs {where} ORDER BY directory", params
+        ).fetchall()
+    return [directory for (directory,) in rows]
+
+
+def _where(language: str | None, stale_since: str | None) -> tuple[str, list]:
+    clauses = []
+    params: list = []
+    if language:
+        clauses.append(
+            "(lower(language) = lower(?) OR EXISTS ("
+            "SELECT 1 FROM json_each(secondary_languages) "
+            "WHERE lower(value) = lower(?)))"
+        )
+        params += [language, language]
+    if stale_since:
+        clauses.append("coalesce(checked_at, fetched_at, '') < ?")
+        params.append(parse_since(stale_since))
+    return (f"WHERE {' AND '.join(clauses)}" if clauses else ""), params
+
+
+def get_reference(references: Path, directory: str) -> dict | None:
+    """
+    Return the catalogued meta for a reference, or None if it isn't listed.
+    """
+    if not catalog_path(references).exists():
+        return None
+    with closing(connect(references)) as conn:
+        row = conn.execute(
+            "SELECT meta FROM refs WHERE directory = ?", (directory,)
+        ).fetchone()
+    if row is None or row[0] is None:
+        return None
+    return json.loads(row[0])
+
+
+def parse_since(value: str) -> str:
+    """
+    Turn "7d", "12h" or an ISO date/time into the timestamp format stored
+    in meta.json.
+    """
+    match = DURATION_RE.match(value.strip().lower())
+    if match:
+        amount, unit = match.groups()
+        moment = datetime.now(timezone.utc) - timedelta(
+            seconds=int(amount) * DURATION_UNITS[unit]
+        )
+    else:
+        moment = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc).replace(tzinfo=None).isoformat() + "Z"
+
+
+def _row(directory: str, meta: dict | None) -> tuple:
+    meta = meta or {}
+    return (
+        directory,
+        meta.get("name", directory),
+        meta.get("source"),
+        meta.get("language"),
+        json.dumps(meta.get("secondary_languages") or []),
+        meta.get("fetched_at"),
+        meta.get("checked_at"),
+        json.dumps(meta) if meta else None,
+    )
+
+
+def _read_meta(reference_dir: Path) -> dict | None:
+    try:
+        return json.loads((reference_dir / "meta.json").read_text())
+    except (OSError, json.JSONDecodeError):
+        return None
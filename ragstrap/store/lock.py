@@ -0,0 +1,58 @@
+from pathlib import Path
+
+LOCK_FILE = ".lock"
+
+
+class ReferenceLocked(RuntimeError):
+    pass
+
+
+class ReferenceLock:
+    """
+    Exclusive, non-blocking lock on a reference directory so concurrent
+    fetch/update runs can't interleave writes to it. The OS drops the lock
+    if the holder dies. A no-op where fcntl is unavailable.
+
+    With create=False a missing reference directory raises FileNotFoundError
+    instead of being created, so updating a mistyped name leaves nothing
+    behind.
+    """
+
+    def __init__(self, reference_dir: Path, create: bool = True):
+        self.path = reference_dir / LOCK_FILE
+        self.create = create
+        self._fh = None
+
+    def acquire(self):
+        try:
+            import fcntl
+        except ImportError:
+            return
+
+        if self.create:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        elif not self.path.parent.is_dir():
+            raise FileNotFoundError(f"Reference '{self.path.parent.name}' not found")
+        fh = self.path.open("w")
+        try:
+            fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            fh.close()
+            raise ReferenceLocked(
+                f"Reference '{self.path.parent.name}' is being updated "
+                "by another process"
+            ) from None
+        self._fh = fh
+
+    def release(self):
+        # Closing the descriptor releases the flock
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
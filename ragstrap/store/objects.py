@@ -0,0 +1,129 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import BinaryIO
+
+OBJECTS_DIR = ".objects"
+
+# Objects are never modified in place; read-only modes make accidental
+# writes through a hardlink in raw/ fail instead of corrupting every copy
+OBJECT_MODE = 0o444
+
+STALE_TMP_SECONDS = 3600
+
+
+def objects_dir(references: Path) -> Path:
+    return references / OBJECTS_DIR
+
+
+def object_path(objects: Path, sha256: str) -> Path:
+    # Fan out by the first two hex digits to keep directories small
+    return objects / sha256[:2] / sha256
+
+
+def store_blob(src: BinaryIO, objects: Path, buffer_size: int) -> tuple[Path, str]:
+    """
+    Copy src into the store once, keyed by its SHA-256.
+    Returns (object path, sha256).
+    """
+    tmp_dir = objects / "tmp"
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+
+    digest = hashlib.sha256()
+    fd, tmp_name = tempfile.mkstemp(dir=tmp_dir)
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            while chunk := src.read(buffer_size):
+                digest.update(chunk)
+                fh.write(chunk)
+
+        sha256 = digest.hexdigest()
+        obj = object_path(objects, sha256)
+        if obj.exists():
+            os.unlink(tmp_name)
+        else:
+            obj.parent.mkdir(exist_ok=True)
+            os.chmod(tmp_name, OBJECT_MODE)
+            os.replace(tmp_name, obj)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
+
+    return obj, sha256
+
+
+def link_object(obj: Path, out: Path):
+    """
+    Point out at obj, replacing whatever is there. Falls back to a copy
+    (a reflink where the filesystem supports it) if hardlinks fail.
+    """
+    tmp = out.with_name(out.name + ".ragstrap-tmp")
+    if tmp.exists():
+        tmp.unlink()
+
+    try:
+        os.link(obj, tmp)
+    except OSError:
+        # copyfile uses copy_file_range/sendfile, which reflink on btrfs/xfs
+        shutil.copyfile(obj, tmp)
+
+    os.replace(tmp, out)
+
+
+def iter_objects(objects: Path):
+    if not objects.is_dir():
+        return
+    for fan_out in objects.iterdir():
+        if fan_out.name == "tmp" or not fan_out.is_dir():
+            continue
+        yield from fan_out.iterdir()
+
+
+def store_stats(objects: Path) -> dict:
+    """
+    Summarise the store. A blob linked into n references would otherwise be
+    stored n times, so it saves (n - 1) * size bytes.
+    """
+    stats = {"objects": 0, "bytes": 0, "saved_bytes": 0, "unreferenced": 0}
+    for obj in iter_objects(objects):
+        st = obj.stat()
+        references = st.st_nlink - 1
+        stats["objects"] += 1
+        stats["bytes"] += st.st_size
+        if references > 1:
+            stats["saved_bytes"] += (references - 1) * st.st_size
+        elif references < 1:
+            stats["unreferenced"] += 1
+    return stats
+
+
+def collect_garbage(objects: Path) -> dict:
+    """
+    Delete blobs no longer linked from any reference, plus stale temp files.
+    """
+    stats = {"removed": 0, "bytes": 0}
+
+    for obj in iter_objects(objects):
+        st = obj.stat()
+        if st.st_nlink <= 1:
+            obj.unlink()
+            stats["removed"] += 1
+            stats["bytes"] += st.st_size
+
+    # Leave recent temp files alone; a concurrent fetch may be writing them
+    tmp_dir = objects / "tmp"
+    cutoff = time.time() - STALE_TMP_SECONDS
+    if tmp_dir.is_dir():
+        for tmp in tmp_dir.iterdir():
+            if tmp.stat().st_mtime < cutoff:
+                tmp.unlink()
+
+    for fan_out in objects.iterdir() if objects.is_dir() else ():
+        if fan_out.is_dir() and not any(fan_out.iterdir()):
+            fan_out.rmdir()
+
+    return stats
@@ -0,0 +1,259 @@
+import hashlib
+import re
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from ragstrap.symbols.parse import PARSERS, parse_symbols
+from ragstrap.util.ignore import is_vendored
+from ragstrap.util.text import is_text_candidate, looks_binary
+
+SYMBOLS_DB = "symbols.db"
+
+# Below this many changed files, process start-up costs more than it saves
+MIN_PARALLEL_FILES = 64
+
+# name is NOCASE so case-insensitive prefix LIKE queries use its index
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS symbols (
+    id INTEGER PRIMARY KEY,
+    file_id INTEGER NOT NULL,
+    name TEXT NOT NULL COLLATE NOCASE,
+    parent TEXT,
+    kind TEXT NOT NULL,
+    signature TEXT NOT NULL,
+    line INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS symbols_name ON symbols (name);
+CREATE INDEX IF NOT EXISTS symbols_file_id ON symbols (file_id);
+"""
+
+# Qualified patterns: Client.fetch, fmt::Display
+QUALIFIER_RE = re.compile(r"::|\.")
+
+MATCH_KINDS = ("exact", "prefix", "substring", "fuzzy")
+
+
+def connect(reference_dir: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(reference_dir / SYMBOLS_DB)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def update_symbol_index(reference_dir: Path, manifest: dict, jobs: int = 1) -> dict:
+    """
+    Bring symbols.db in line with the manifest, re-parsing only files whose
+    content changed, across jobs processes. Returns counts of parsed,
+    removed and unchanged files.
+    """
+    raw = reference_dir / "raw"
+    stats = {"parsed": 0, "removed": 0, "unchanged": 0}
+
+    with connect(reference_dir) as conn:
+        known = {
+            path: (file_id, size, mtime_ns, sha256)
+            for file_id, path, size, mtime_ns, sha256 in conn.execute(
+                "SELECT id, path, size, mtime_ns, sha256 FROM files"
+            )
+        }
+
+        tasks = []
+        for entry in manifest["files"]:
+            path = entry["path"]
+            if (
+                entry["ext"] not in PARSERS
+                or not is_text_candidate(entry)
+                or is_vendored(path)
+            ):
+                continue
+
+            previous = known.pop(path, None)
+            if previous and previous[1:3] == (entry["size"], entry["mtime_ns"]):
+                stats["unchanged"] += 1
+                continue
+            tasks.append(
+                (
+                    str(raw / path),
+                    entry,
+                    previous[0] if previous else None,
+                    previous[3] if previous else None,
+                )
+            )
+
+        if jobs > 1 and len(tasks) >= MIN_PARALLEL_FILES:
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                results = pool.map(_parse_file, tasks, chunksize=16)
+                _store(conn, tasks, results, stats)
+        else:
+            _store(conn, tasks, map(_parse_file, tasks), stats)
+
+        # Whatever is left disappeared from the snapshot
+        for file_id, *_ in known.values():
+            _delete_file(conn, file_id)
+            stats["removed"] += 1
+
+    conn.close()
+    return stats
+
+
+def _store(conn: sqlite3.Connection, tasks: list[tuple], results, stats: dict):
+    for (_, entry, file_id, _), (sha256, symbols) in zip(tasks, results):
+        if symbols is None:
+            conn.execute(
+                "UPDATE files SET mtime_ns = ? WHERE id = ?",
+                (entry["mtime_ns"], file_id),
+            )
+            stats["unchanged"] += 1
+            continue
+
+        if file_id is not None:
+            _delete_file(conn, file_id)
+        cur = conn.execute(
+            "INSERT INTO files (path, size, mtime_ns, sha256) VALUES (?, ?, ?, ?)",
+            (entry["path"], entry["size"], entry["mtime_ns"], sha256),
+        )
+        conn.executemany(
+            "INSERT INTO symbols (file_id, name, parent, kind, signature, line) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [(cur.lastrowid, *symbol) for symbol in symbols],
+        )
+        stats["parsed"] += 1
+
+
+def _parse_file(task: tuple) -> tuple[str, list[tuple] | None]:
+    """
+    Return (sha256, symbols); symbols is None when the content hash matches
+    the previous parse.
+    """
+    path, entry, _, previous_sha = task
+    data = Path(path).read_bytes()
+    sha256 = hashlib.sha256(data).hexdigest()
+    if sha256 == previous_sha:
+        return sha256, None
+    # Binary files keep their row so they aren't re-read next time
+    if looks_binary(data):
+        return sha256, []
+    text = data.decode("utf-8", errors="ignore").replace("\r\n", "\n")
+    return sha256, parse_symbols(entry["ext"], text)
+
+
+def _delete_file(conn: sqlite3.Connection, file_id: int):
+    conn.execute("DELETE FROM symbols WHERE file_id = ?", (file_id,))
+    conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+
+
+def find_symbols(
+    reference_dir: Path,
+    pattern: str,
+    kind: str | None = None,
+    limit: int = 20,
+    conn: sqlite3.Connection | None = None,
+) -> list[dict]:
+    """
+    Look up symbols by name, case-insensitively: exact matches first, then
+    prefix, substring and fuzzy (in-order subsequence) matches, shorter
+    names first within each. A qualified pattern such as Client.fetch or
+    fmt::Display also requires the parent to match. Long-lived callers can
+    pass an open connection to symbols.db.
+    """
+    *qualifiers, name = QUALIFIER_RE.split(pattern.strip())
+    parent = ".".join(q for q in qualifiers if q).lower() or None
+    name = name.lower()
+
+    owns_conn = conn is None
+    if owns_conn:
+        conn = sqlite3.connect(reference_dir / SYMBOLS_DB)
+    try:
+        names = _ranked_names(conn, name, limit if not (kind or parent) else None)
+        hits = []
+        for rank, candidate in names:
+            rows = conn.execute(
+                "SELECT symbols.name, parent, kind, signature, files.path, line "
+                "FROM symbols JOIN files ON files.id = symbols.file_id "
+                "WHERE symbols.name = ? ORDER BY files.path, line",
+                (candidate,),
+            ).fetchall()
+            for symbol, symbol_parent, symbol_kind, signature, path, line in rows:
+                if kind and symbol_kind != kind:
+                    continue
+                if parent and not _parent_matches(symbol_parent, parent):
+                    continue
+                hits.append(
+                    {
+                        "name": _qualified(symbol, symbol_parent, path),
+                        "kind": symbol_kind,
+                        "signature": signature,
+                        "path": path,
+                        "line": line,
+                        "match": MATCH_KINDS[rank],
+                    }
+                )
+                if len(hits) >= limit:
+                    return hits
+        return hits
+    finally:
+        if owns_conn:
+            conn.close()
+
+
+def _ranked_names(
+    conn: sqlite3.Connection, name: str, enough: int | None
+) -> list[tuple[int, str]]:
+    """
+    Distinct symbol names matching name as (rank, name), best first. The
+    full scan for substring and fuzzy matches is skipped when the indexed
+    prefix lookup already found enough names.
+    """
+    escaped = name.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    prefixed = [
+        row[0]
+        for row in conn.execute(
+            "SELECT DISTINCT name FROM symbols WHERE name LIKE ? ESCAPE '\\'",
+            (escaped + "%",),
+        )
+    ]
+    if enough is not None and len(prefixed) >= enough:
+        candidates = prefixed
+    else:
+        fuzzy = re.compile(".*?".join(map(re.escape, name)), re.IGNORECASE)
+        candidates = [
+            row[0]
+            for row in conn.execute("SELECT DISTINCT name FROM symbols")
+            if fuzzy.search(row[0])
+        ]
+
+    ranked = []
+    for candidate in candidates:
+        lowered = candidate.lower()
+        if lowered == name:
+            rank = 0
+        elif lowered.startswith(name):
+            rank = 1
+        elif name in lowered:
+            rank = 2
+        else:
+            rank = 3
+        ranked.append((rank, candidate))
+    ranked.sort(key=lambda item: (item[0], len(item[1]), item[1]))
+    return ranked
+
+
+def _parent_matches(parent: str | None, wanted: str) -> bool:
+    if not parent:
+        return False
+    parent = parent.replace("::", ".").lower()
+    return parent == wanted or parent.endswith("." + wanted)
+
+
+def _qualified(name: str, parent: str | None, path: str) -> str:
+    if not parent:
+        return name
+    separator = "::" if path.endswith(".rs") else "."
+    return f"{parent}{separator}{name}"
@@ -0,0 +1,390 @@
+import ast
+import re
+import warnings
+
+from ragstrap.index.language import EXTENSIONS
+
+# Symbols are (name, parent, kind, signature, line); parent is the enclosing
+# class, impl, trait or namespace, or None at the top level
+
+# Longer signatures are cut; the full text is a file read away
+MAX_SIGNATURE = 240
+
+# Lines a declaration may span before its body opens
+MAX_SIGNATURE_LINES = 12
+
+BLANK_RE = re.compile(r"[^\n]")
+BRACE_RE = re.compile(r"[{};\[\]]")
+
+# A declaration line ending or followed by these runs on to the next line
+CONTINUED_ENDINGS = (",", "(", "=", ":", "|", "&", "+", "->", "=>", "where")
+CONTINUED_STARTS = ("where", "->", ":", "|", "&", ".", "extends", "implements")
+
+RUST_TOKENS = re.compile(
+    r"(?P<comment>//[^\n]*|/\*[\s\S]*?\*/)"
+    r"|(?P<string>\bb?r(#*)\"[\s\S]*?\"\3"
+    r"|b?\"(?:\\[\s\S]|[^\"\\])*\""
+    r"|b?'(?:\\.|[^\\'\n])')"
+)
+GO_TOKENS = re.compile(
+    r"(?P<comment>//[^\n]*|/\*[\s\S]*?\*/)"
+    r"|(?P<string>`[^`]*`|\"(?:\\.|[^\"\\\n])*\"|'(?:\\.|[^'\\\n])*')"
+)
+TS_TOKENS = re.compile(
+    r"(?P<comment>//[^\n]*|/\*[\s\S]*?\*/)"
+    r"|(?P<string>`(?:\\[\s\S]|[^`\\])*`"
+    r"|\"(?:\\.|[^\"\\\n])*\"|'(?:\\.|[^'\\\n])*')"
+)
+
+RUST_VIS = r"^\s*(?:pub(?:\s*\([^)]*\))?\s+)?"
+RUST_FN = re.compile(
+    RUST_VIS + r"(?:default\s+)?(?:const\s+)?(?:async\s+)?(?:unsafe\s+)?"
+    r"(?:extern\s+)?fn\s+(?P<name>\w+)"
+)
+RUST_ITEM = re.compile(
+    RUST_VIS + r"(?:unsafe\s+)?(?:auto\s+)?"
+    r"(?P<kind>struct|enum|union|trait|type|const|static|mod)\s+"
+    r"(?:mut\s+)?(?P<name>\w+)"
+)
+RUST_MACRO = re.compile(r"^\s*macro_rules!\s*(?P<name>\w+)")
+RUST_IMPL = re.compile(r"^\s*(?:unsafe\s+)?impl\b")
+RUST_KINDS = {"const": "constant", "mod": "module"}
+
+GO_METHOD = re.compile(
+    r"^func\s*\(\s*(?:\w+\s+)?\*?\s*(?P<parent>\w+)(?:\[[^\]]*\])?\s*\)"
+    r"\s*(?P<name>\w+)"
+)
+GO_FUNC = re.compile(r"^func\s+(?P<name>\w+)")
+GO_TYPE = re.compile(r"^type\s+(?P<name>\w+)(?:\[[^\]]*\])?\s*(?P<rest>\w*)")
+GO_VALUE = re.compile(r"^(?P<kind>const|var)\s+(?P<name>\w+)")
+GO_GROUP = re.compile(r"^(?P<kind>type|const|var)\s*\(\s*$")
+GO_MEMBER = re.compile(r"^\s+(?P<name>\w+)(?:\[[^\]]*\])?\s*(?P<rest>\w*)")
+GO_KINDS = {"const": "constant", "var": "variable"}
+
+TS_PREFIX = r"^\s*(?:export\s+)?(?:default\s+)?(?:declare\s+)?"
+TS_FUNCTION = re.compile(
+    TS_PREFIX + r"(?:async\s+)?function\s*\*?\s*(?P<name>[\w$]+)"
+)
+TS_CLASS = re.compile(TS_PREFIX + r"(?:abstract\s+)?class\s+(?P<name>[\w$]+)")
+TS_INTERFACE = re.compile(TS_PREFIX + r"interface\s+(?P<name>[\w$]+)")
+TS_ENUM = re.compile(TS_PREFIX + r"(?:const\s+)?enum\s+(?P<name>[\w$]+)")
+TS_TYPE = re.compile(TS_PREFIX + r"type\s+(?P<name>[\w$]+)\s*(?:<[^=]*>)?\s*=")
+# `declare module "name" {` has no identifier once strings are blanked
+TS_NAMESPACE = re.compile(
+    TS_PREFIX + r"(?:namespace|module)(?:\s+(?P<name>[\w$.]+))?\s*(?:\{|$)"
+)
+TS_VARIABLE = re.compile(TS_PREFIX + r"(?:const|let|var)\s+(?P<name>[\w$]+)")
+TS_MEMBER = re.compile(
+    r"^\s*(?:(?:public|private|protected|static|abstract|readonly|override"
+    r"|async|declare|get|set)\s+)*\*?\s*(?P<name>#?[\w$]+)\s*\??\s*"
+    r"(?:<[^>]*>)?\s*\("
+)
+TS_ARROW = re.compile(
+    r"=\s*(?:async\s+)?(?:function\b|(?:\([^)]*\)|[\w$]+)\s*(?::[^=]+)?=>)"
+)
+TS_NOT_MEMBERS = {"if", "for", "while", "switch", "catch", "return", "function"}
+
+
+def python_symbols(text: str) -> list[tuple]:
+    try:
+        with warnings.catch_warnings():
+            # Invalid escapes in old code warn on every parse
+            warnings.simplefilter("ignore")
+            tree = ast.parse(text)
+    except (SyntaxError, ValueError, RecursionError):
+        return []
+    symbols: list[tuple] = []
+    _python_body(tree.body, None, symbols)
+    return symbols
+
+
+def _python_body(body: list, parent: str | None, symbols: list[tuple]):
+    for node in body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+            signature = f"{prefix} {node.name}({ast.unparse(node.args)})"
+            if node.returns:
+                signature += f" -> {ast.unparse(node.returns)}"
+            kind = "method" if parent else "function"
+            symbols.append((node.name, parent, kind, signature, node.lineno))
+        elif isinstance(node, ast.ClassDef):
+            bases = [ast.unparse(base) for base in (*node.bases, *node.keywords)]
+            signature = f"class {node.name}"
+            if bases:
+                signature += f"({', '.join(bases)})"
+            symbols.append((node.name, parent, "class", signature, node.lineno))
+            qualified = f"{parent}.{node.name}" if parent else node.name
+            _python_body(node.body, qualified, symbols)
+        elif isinstance(node, (ast.If, ast.Try)):
+            # Definitions under `if TYPE_CHECKING:` or `try: ... except ImportError:`
+            for handler in getattr(node, "handlers", []):
+                _python_body(handler.body, parent, symbols)
+            _python_body(node.body, parent, symbols)
+            _python_body(node.orelse, parent, symbols)
+            _python_body(getattr(node, "finalbody", []), parent, symbols)
+
+
+def rust_symbols(text: str) -> list[tuple]:
+    def match(line: str, scope: str | None):
+        m = RUST_FN.match(line)
+        if m:
+            kind = "method" if scope in ("impl", "trait") else "function"
+            return m["name"], kind, None
+        m = RUST_ITEM.match(line)
+        if m and m["name"] != "_":
+            kind = RUST_KINDS.get(m["kind"], m["kind"])
+            return m["name"], kind, kind if kind in ("trait", "module") else None
+        m = RUST_MACRO.match(line)
+        if m:
+            return m["name"], "macro", None
+        if RUST_IMPL.match(line):
+            return None, "impl", "impl"
+        return None
+
+    return _scan(text, RUST_TOKENS, match, "::")
+
+
+def go_symbols(text: str) -> list[tuple]:
+    # Kind of the `const (`, `var (` or `type (` group being read, if any
+    group = None
+
+    def match(line: str, scope: str | None):
+        nonlocal group
+        if group:
+            if line.lstrip().startswith(")"):
+                group = None
+                return None
+            m = GO_MEMBER.match(line)
+            if not m:
+                return None
+            if group == "type":
+                return m["name"], _go_type_kind(m["rest"]), None
+            return m["name"], GO_KINDS[group], None
+
+        m = GO_GROUP.match(line)
+        if m:
+            group = m["kind"]
+            return None
+        m = GO_METHOD.match(line)
+        if m:
+            return m["name"], "method", None, m["parent"]
+        m = GO_FUNC.match(line)
+        if m:
+            return m["name"], "function", None
+        m = GO_TYPE.match(line)
+        if m:
+            return m["name"], _go_type_kind(m["rest"]), None
+        m = GO_VALUE.match(line)
+        if m:
+            return m["name"], GO_KINDS[m["kind"]], None
+        return None
+
+    return _scan(text, GO_TOKENS, match, ".")
+
+
+def _go_type_kind(rest: str) -> str:
+    return rest if rest in ("struct", "interface") else "type"
+
+
+def typescript_symbols(text: str) -> list[tuple]:
+    def match(line: str, scope: str | None):
+        if scope in ("class", "interface"):
+            m = TS_MEMBER.match(line)
+            if m and m["name"] not in TS_NOT_MEMBERS:
+                return m["name"], "method", None
+            return None
+
+        for pattern, kind in (
+            (TS_FUNCTION, "function"),
+            (TS_CLASS, "class"),
+            (TS_INTERFACE, "interface"),
+            (TS_ENUM, "enum"),
+            (TS_TYPE, "type"),
+        ):
+            m = pattern.match(line)
+            if m:
+                opens = kind if kind in ("class", "interface") else None
+                return m["name"], kind, opens
+        m = TS_NAMESPACE.match(line)
+        if m:
+            return m["name"], "namespace", "namespace"
+        m = TS_VARIABLE.match(line)
+        if m:
+            return m["name"], "variable", None
+        return None
+
+    symbols = _scan(text, TS_TOKENS, match, ".")
+    # `const handler = async (req) => {...}` is a function in all but syntax
+    return [
+        (name, parent, "function", signature, line)
+        if kind == "variable" and TS_ARROW.search(signature)
+        else (name, parent, kind, signature, line)
+        for name, parent, kind, signature, line in symbols
+    ]
+
+
+LANGUAGE_PARSERS = {
+    "python": python_symbols,
+    "rust": rust_symbols,
+    "go": go_symbols,
+    "typescript": typescript_symbols,
+    "javascript": typescript_symbols,
+}
+
+PARSERS = {
+    ext: LANGUAGE_PARSERS[language]
+    for ext, language in EXTENSIONS.items()
+    if language in LANGUAGE_PARSERS and ext != ".pyx"
+}
+
+
+def parse_symbols(ext: str, text: str) -> list[tuple]:
+    parser = PARSERS.get(ext)
+    return parser(text) if parser else []
+
+
+def _strip(text: str, tokens: re.Pattern) -> tuple[str, str]:
+    """
+    Return (code, clean): code has comments and string literals blanked so
+    braces can be counted, clean only comments, for signatures. Both keep
+    every newline, so line numbers and offsets match the original.
+    """
+    code: list[str] = []
+    clean: list[str] = []
+    pos = 0
+    for m in tokens.finditer(text):
+        start, end = m.span()
+        blank = BLANK_RE.sub(" ", m.group())
+        code.append(text[pos:start])
+        code.append(blank)
+        clean.append(text[pos:start])
+        clean.append(blank if m.group("comment") is not None else m.group())
+        pos = end
+    code.append(text[pos:])
+    clean.append(text[pos:])
+    return "".join(code), "".join(clean)
+
+
+def _scan(text: str, tokens: re.Pattern, match, separator: str) -> list[tuple]:
+    """
+    Walk a brace-delimited source line by line, tracking nesting, and ask
+    match(line, scope) about every line at the top level or directly inside
+    a container (impl, trait, class, namespace). match returns None or
+    (name, kind, opens[, parent]), where opens is the kind of container the
+    declaration's body starts.
+    """
+    code, clean = _strip(text, tokens)
+    code_lines = code.split("\n")
+    clean_lines = clean.split("\n")
+
+    symbols: list[tuple] = []
+    # (qualified name, kind, depth of the body)
+    scopes: list[tuple] = []
+    pending = None
+    depth = 0
+    brackets = 0
+
+    for i, line in enumerate(code_lines):
+        scope = scopes[-1] if scopes else None
+        if depth == (scope[2] if scope else 0) and line.strip():
+            found = match(line, scope[1] if scope else None)
+            if found:
+                name, kind, opens = found[:3]
+                parent = found[3] if len(found) > 3 else scope and scope[0]
+                signature = _signature(code_lines, clean_lines, i)
+                if kind == "impl":
+                    # An impl block isn't a symbol; its methods belong to the type
+                    name = _impl_target(signature)
+                elif name:
+                    symbols.append((name, parent or None, kind, signature, i + 1))
+                if opens:
+                    qualified = f"{parent}{separator}{name}" if parent else name
+                    pending = (qualified if name else parent, opens, depth + 1, i)
+
+        if pending and i - pending[3] > MAX_SIGNATURE_LINES:
+            pending = None
+        if "{" not in line and "}" not in line and not pending:
+            continue
+        for m in BRACE_RE.finditer(line):
+            char = m.group()
+            if char == "[":
+                brackets += 1
+            elif char == "]":
+                brackets = max(brackets - 1, 0)
+            elif char == "{":
+                depth += 1
+                if pending and depth == pending[2]:
+                    scopes.append(pending[:3])
+                    pending = None
+            elif char == "}":
+                depth = max(depth - 1, 0)
+                while scopes and scopes[-1][2] > depth:
+                    scopes.pop()
+            elif pending and not brackets and depth == pending[2] - 1:
+                # `mod name;` declares a container without a body
+                pending = None
+
+    return symbols
+
+
+def _signature(code_lines: list[str], clean_lines: list[str], start: int) -> str:
+    """
+    The declaration starting at line start, up to where its body opens. It
+    runs on to the next line only while brackets are open or the line
+    plainly continues, since Go and much TypeScript have no semicolons.
+    """
+    parts = []
+    balance = 0
+    for i in range(start, min(start + MAX_SIGNATURE_LINES, len(code_lines))):
+        code = code_lines[i]
+        for pos, char in enumerate(code):
+            if char in "([":
+                balance += 1
+            elif char in ")]":
+                balance -= 1
+            elif char in "{;" and balance <= 0:
+                parts.append(clean_lines[i][:pos])
+                return _collapse(parts)
+        parts.append(clean_lines[i])
+        following = code_lines[i + 1].lstrip() if i + 1 < len(code_lines) else ""
+        if (
+            balance <= 0
+            and not code.rstrip().endswith(CONTINUED_ENDINGS)
+            and not following.startswith(CONTINUED_STARTS)
+        ):
+            break
+    return _collapse(parts)
+
+
+def _collapse(parts: list[str]) -> str:
+    signature = " ".join(" ".join(parts).split())
+    if len(signature) > MAX_SIGNATURE:
+        signature = signature[: MAX_SIGNATURE - 3] + "..."
+    return signature
+
+
+def _impl_target(signature: str) -> str | None:
+    """
+    The type an impl block is for: `impl<T> fmt::Display for Wrapper<T>`
+    gives Wrapper.
+    """
+    header = re.sub(r"^\s*(?:unsafe\s+)?impl\s*", "", signature)
+    header = re.split(r"\bwhere\b", header)[0]
+    header = re.split(r"\bfor\b", _strip_generics(header))[-1]
+    # Drop lifetimes and modifiers so `&'a mut dyn Trait` gives Trait
+    header = re.sub(r"'\w+|\b(?:dyn|mut|const)\b", "", header)
+    path = re.search(r"\w+(?:\s*::\s*\w+)*", header)
+    return re.split(r"\s*::\s*", path.group())[-1] if path else None
+
+
+def _strip_generics(text: str) -> str:
+    out = []
+    depth = 0
+    for char in text:
+        if char == "<":
+            depth += 1
+        elif char == ">" and depth:
+            depth -= 1
+        elif not depth:
+            out.append(char)
+    return "".join(out)
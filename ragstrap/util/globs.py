@@ -0,0 +1,40 @@
+import re
+from typing import Callable, Iterable
+
+
+def glob_to_regex(pattern: str) -> str:
+    """
+    Translate a path glob into a regex. "*" and "?" stay within one path
+    segment; "**" spans any number of segments.
+    """
+    out = []
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif c == "*":
+            out.append("[^/]*")
+            i += 1
+        elif c == "?":
+            out.append("[^/]")
+            i += 1
+        else:
+            out.append(re.escape(c))
+            i += 1
+    return "".join(out)
+
+
+def compile_globs(patterns: Iterable[str]) -> Callable[[str], bool]:
+    """
+    Return a predicate that is true for paths matching any of patterns.
+    """
+    regexes = [glob_to_regex(p.strip("/")) for p in patterns if p.strip("/")]
+    if not regexes:
+        return lambda path: False
+    combined = re.compile("(?:" + "|".join(regexes) + r")\Z")
+    return lambda path: combined.match(path) is not None
@@ -0,0 +1,243 @@
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+GITHUB_API = os.getenv("GITHUB_API_URL", "https://api.github.com").rstrip("/")
+
+# Client-side pacing; GitHub asks integrators not to burst concurrent requests
+MAX_REQUESTS_PER_SECOND = float(os.getenv("RAGSTRAP_MAX_RPS", "10"))
+BURST = 10
+
+# How long a request may block waiting for an exhausted budget to reset
+# before giving up with RateLimitError
+MAX_RATE_LIMIT_WAIT = float(os.getenv("RAGSTRAP_RATE_LIMIT_WAIT", "900"))
+
+RETRIES = 5
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 60.0
+RETRY_STATUSES = {500, 502, 503, 504}
+
+# GitHub asks clients to wait at least a minute after a secondary rate limit
+# response that doesn't say how long to wait
+SECONDARY_LIMIT_WAIT = 60.0
+
+
+class RateLimitError(Exception):
+    """
+    The GitHub rate limit is exhausted and won't reset soon enough to wait.
+    """
+
+    def __init__(self, message: str, reset_at: float | None = None):
+        super().__init__(message)
+        self.reset_at = reset_at
+
+
+class RateLimiter:
+    """
+    Token bucket that paces requests and tracks the X-RateLimit-* budget
+    reported by GitHub. A rate of None only tracks the budget. Safe to share
+    between threads.
+    """
+
+    def __init__(
+        self,
+        rate: float | None = MAX_REQUESTS_PER_SECOND,
+        burst: int = BURST,
+        max_wait: float = MAX_RATE_LIMIT_WAIT,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.max_wait = max_wait
+        self.limit: int | None = None
+        self.remaining: int | None = None
+        self.reset_at: float | None = None
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Block until a request may be sent.
+        """
+        while True:
+            with self._lock:
+                wait = self._exhausted_wait()
+                if wait <= 0 and self.rate is None:
+                    return
+                if wait <= 0:
+                    now = time.monotonic()
+                    self._tokens = min(
+                        self.burst, self._tokens + (now - self._last) * self.rate
+                    )
+                    self._last = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def update(self, resp: requests.Response):
+        headers = resp.headers
+        remaining = headers.get("X-RateLimit-Remaining")
+        if remaining is None:
+            return
+        with self._lock:
+            try:
+                self.remaining = int(remaining)
+                self.limit = int(headers.get("X-RateLimit-Limit", self.limit or 0))
+                reset = headers.get("X-RateLimit-Reset")
+                self.reset_at = float(reset) if reset else None
+            except ValueError:
+                return
+
+    def budget(self) -> dict:
+        """
+        Last observed budget: {"limit", "remaining", "reset_at"} (epoch
+        seconds). Values are None until a response has reported them.
+        """
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "remaining": self.remaining,
+                "reset_at": self.reset_at,
+            }
+
+    def _exhausted_wait(self) -> float:
+        if self.remaining is None or self.remaining > 0 or self.reset_at is None:
+            return 0
+        wait = self.reset_at - time.time()
+        if wait <= 0:
+            # The window has rolled over; the next response refreshes the budget
+            self.remaining = None
+            return 0
+        if wait > self.max_wait:
+            raise RateLimitError(
+                f"GitHub API rate limit exhausted until "
+                f"{time.strftime('%H:%M:%S', time.localtime(self.reset_at))} "
+                "(set GITHUB_TOKEN for a higher limit)",
+                reset_at=self.reset_at,
+            )
+        return wait
+
+
+_default_limiter = RateLimiter()
+
+# Raw file downloads don't count against the API budget, so sparse fetches
+# aren't paced; they still get the retries and backoff of request()
+_raw_limiter = RateLimiter(rate=None)
+
+
+def default_limiter() -> RateLimiter:
+    return _default_limiter
+
+
+def raw_limiter() -> RateLimiter:
+    return _raw_limiter
+
+
+def github_headers() -> dict:
+    headers = {}
+    token = os.getenv("GITHUB_TOKEN")
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    return headers
+
+
+def create_session(pool_size: int = 10) -> requests.Session:
+    """
+    Create a session whose connection pool can serve pool_size workers.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def request(
+    method: str,
+    url: str,
+    session: requests.Session | None = None,
+    limiter: RateLimiter | None = None,
+    retries: int = RETRIES,
+    **kwargs,
+) -> requests.Response:
+    """
+    Send a request through the shared rate limiter.
+
+    Transient 5xx responses, connection errors and secondary rate limits are
+    retried with jittered exponential backoff, honouring Retry-After. An
+    exhausted primary rate limit waits for the reset, or raises
+    RateLimitError if that is further away than the limiter allows.
+    """
+    http = session or requests
+    limiter = limiter or _default_limiter
+
+    for attempt in range(retries + 1):
+        limiter.acquire()
+        try:
+            resp = http.request(method, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == retries:
+                raise
+            time.sleep(_backoff(attempt))
+            continue
+
+        limiter.update(resp)
+
+        if resp.status_code in (403, 429):
+            retry_after = _retry_after(resp)
+            if resp.headers.get("X-RateLimit-Remaining") == "0":
+                resp.close()
+                if "X-RateLimit-Reset" not in resp.headers:
+                    time.sleep(retry_after or _backoff(attempt))
+                # Otherwise acquire() waits for the reset or raises
+                continue
+            if retry_after is not None or _is_secondary_limit(resp):
+                if attempt == retries:
+                    return resp
+                resp.close()
+                if retry_after is None:
+                    retry_after = max(SECONDARY_LIMIT_WAIT, _backoff(attempt))
+                time.sleep(retry_after)
+                continue
+
+        if resp.status_code in RETRY_STATUSES and attempt < retries:
+            delay = _retry_after(resp)
+            resp.close()
+            time.sleep(delay if delay is not None else _backoff(attempt))
+            continue
+
+        return resp
+
+    raise RateLimitError(
+        f"GitHub API rate limit still exhausted after {retries} retries"
+    )
+
+
+def _backoff(attempt: int) -> float:
+    # "Full jitter": spread retries from many workers over the whole window
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2**attempt))
+
+
+def _retry_after(resp: requests.Response) -> float | None:
+    value = resp.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _is_secondary_limit(resp: requests.Response) -> bool:
+    return "rate limit" in resp.text.lower()
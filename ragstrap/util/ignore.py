@@ -5,7 +5,38 @@ DEFAULT_IGNORES = {
     ".github",
 }
 
+# Kept on disk, but not the project's own code
+VENDORED_DIRS = {
+    "vendor",
+    "third_party",
+    "third-party",
+    "bower_components",
+    "site-packages",
+    "dist",
+    "__pycache__",
+}
+
+GENERATED_SUFFIXES = (
+    ".min.js",
+    ".min.css",
+    ".pb.go",
+    "_pb2.py",
+    "_pb2_grpc.py",
+    ".g.dart",
+    ".designer.cs",
+)
+
 
 def should_ignore(path: str) -> bool:
     parts = path.split("/")
     return any(p in DEFAULT_IGNORES for p in parts)
+
+
+def is_vendored(path: str) -> bool:
+    """
+    True for vendored dependencies and generated files.
+    """
+    parts = path.split("/")
+    if any(p in VENDORED_DIRS for p in parts[:-1]):
+        return True
+    return parts[-1].lower().endswith(GENERATED_SUFFIXES)
@@ -0,0 +1,17 @@
+import sys
+
+
+def peak_rss_bytes() -> int | None:
+    """
+    Return the peak resident set size of this process, or None if unknown.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    if sys.platform == "darwin":
+        return peak
+    return peak * 1024
@@ -0,0 +1,75 @@
+BINARY_EXTENSIONS = {
+    ".png",
+    ".jpg",
+    ".jpeg",
+    ".gif",
+    ".bmp",
+    ".ico",
+    ".webp",
+    ".pdf",
+    ".zip",
+    ".gz",
+    ".tgz",
+    ".bz2",
+    ".xz",
+    ".7z",
+    ".jar",
+    ".woff",
+    ".woff2",
+    ".ttf",
+    ".otf",
+    ".eot",
+    ".mp3",
+    ".mp4",
+    ".mov",
+    ".wav",
+    ".so",
+    ".dylib",
+    ".dll",
+    ".exe",
+    ".o",
+    ".a",
+    ".class",
+    ".pyc",
+    ".wasm",
+    ".bin",
+}
+
+# How much of a file is inspected when deciding whether it is binary
+SNIFF_SIZE = 8192
+
+# Signatures of common binary formats that may lack NUL bytes early on
+BINARY_MAGIC = (
+    b"\x89PNG",
+    b"GIF8",
+    b"\xff\xd8\xff",
+    b"%PDF-",
+    b"PK\x03\x04",
+    b"\x1f\x8b",
+    b"\x7fELF",
+    b"\xca\xfe\xba\xbe",
+    b"\x00asm",
+    b"wOFF",
+    b"wOF2",
+)
+
+# Larger files are rarely useful for search or chunking
+MAX_TEXT_FILE_SIZE = 1024 * 1024
+
+
+def looks_binary(head: bytes) -> bool:
+    """
+    Guess whether content is binary from its first bytes: a known file
+    signature or a NUL byte.
+    """
+    return head.startswith(BINARY_MAGIC) or b"\0" in head[:SNIFF_SIZE]
+
+
+def is_text_candidate(entry: dict) -> bool:
+    """
+    Whether a manifest entry is worth reading as text.
+    """
+    return (
+        entry["ext"] not in BINARY_EXTENSIONS
+        and 0 < entry["size"] <= MAX_TEXT_FILE_SIZE
+    )
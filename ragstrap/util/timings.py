@@ -0,0 +1,112 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from ragstrap.util.memory import peak_rss_bytes
+
+# Counters a stage may set on its record besides the measured ones
+COUNTERS = ("transferred_bytes", "files_written")
+
+
+class Timings:
+    """
+    Records wall time, CPU time, peak memory growth and counters per pipeline
+    stage.
+
+    CPU time is process-wide and includes child processes once they exit, so
+    stages that overlap in time (fetch-many) share each other's CPU. Peak
+    memory growth is how far the stage raised the process's peak RSS, zero
+    when an earlier stage already peaked higher; overlapping stages share it
+    the same way.
+    """
+
+    def __init__(self, label: str | None = None):
+        self.label = label
+        self.stages: list[dict] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Time the enclosed block. Yields the stage record so the caller can
+        set counters such as transferred_bytes or files_written.
+        """
+        record: dict = {"name": name}
+        started = time.perf_counter()
+        cpu = _cpu_seconds()
+        rss = peak_rss_bytes()
+        try:
+            yield record
+        finally:
+            record["started"] = started
+            record["seconds"] = time.perf_counter() - started
+            record["cpu_seconds"] = _cpu_seconds() - cpu
+            peak = peak_rss_bytes()
+            if peak is not None and rss is not None:
+                record["peak_rss_growth_bytes"] = peak - rss
+            with self._lock:
+                self.stages.append(record)
+
+    def summary(self) -> dict:
+        """
+        Per-stage stats in the form stored in meta.json under "stats".
+        """
+        stages = {}
+        for record in self.stages:
+            stages[record["name"]] = {
+                key: value
+                for key, value in record.items()
+                if key not in ("name", "started")
+            }
+        return {
+            "seconds": sum(record["seconds"] for record in self.stages),
+            "stages": stages,
+        }
+
+
+def write_trace(path: Path, timings: list[Timings]):
+    """
+    Write the stages of one or more runs as a Chrome trace (chrome://tracing,
+    Perfetto). Each run gets its own track, labelled with its label.
+    """
+    pid = os.getpid()
+    origin = min(
+        (record["started"] for t in timings for record in t.stages), default=0.0
+    )
+    events = []
+    for tid, run in enumerate(timings, start=1):
+        events.append(
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": pid,
+                "tid": tid,
+                "args": {"name": run.label or f"run {tid}"},
+            }
+        )
+        for record in run.stages:
+            events.append(
+                {
+                    "name": record["name"],
+                    "cat": "ragstrap",
+                    "ph": "X",
+                    "ts": (record["started"] - origin) * 1e6,
+                    "dur": record["seconds"] * 1e6,
+                    "pid": pid,
+                    "tid": tid,
+                    "args": {
+                        key: record[key]
+                        for key in ("cpu_seconds", "peak_rss_growth_bytes", *COUNTERS)
+                        if record.get(key) is not None
+                    },
+                }
+            )
+    path.write_text(json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}))
+
+
+def _cpu_seconds() -> float:
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
@@ -0,0 +1,78 @@
+import importlib
+import re
+import zlib
+from typing import Protocol, Sequence
+
+import numpy as np
+
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class Embedder(Protocol):
+    """
+    Anything that turns texts into an (n, dim) float32 matrix of unit vectors.
+    """
+
+    name: str
+    dim: int
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray: ...
+
+
+class HashingEmbedder:
+    """
+    Offline embedder using the hashing trick over words and word bigrams.
+    Needs no model, network or GPU, and is deterministic across runs.
+    """
+
+    name = "hashing"
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+
+        for row, text in enumerate(texts):
+            words = [w.lower() for w in WORD_RE.findall(text)]
+            features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+            if not features:
+                continue
+
+            hashes = np.fromiter(
+                (zlib.crc32(f.encode("utf-8")) for f in features),
+                dtype=np.uint32,
+                count=len(features),
+            )
+            buckets = (hashes % self.dim).astype(np.intp)
+            # The top bit picks a sign so collisions tend to cancel out
+            signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+            np.add.at(out[row], buckets, signs)
+
+        # Sublinear term frequency, then L2-normalise for cosine scoring
+        np.copyto(out, np.sign(out) * np.log1p(np.abs(out)))
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        np.divide(out, norms, out=out, where=norms > 0)
+        return out
+
+
+EMBEDDERS = {
+    HashingEmbedder.name: HashingEmbedder,
+}
+
+
+def get_embedder(name: str) -> Embedder:
+    """
+    Return a built-in embedder by name, or load one from "module:attribute",
+    where the attribute is a class or factory taking no arguments.
+    """
+    if name in EMBEDDERS:
+        return EMBEDDERS[name]()
+
+    module_name, sep, attr = name.partition(":")
+    if not sep:
+        known = ", ".join(sorted(EMBEDDERS))
+        raise ValueError(f"Unknown embedder '{name}' (built-in: {known})")
+
+    factory = getattr(importlib.import_module(module_name), attr)
+    return factory()
@@ -0,0 +1,231 @@
+import json
+import shutil
+from pathlib import Path
+
+import numpy as np
+
+from ragstrap.chunk.export import CHUNKS_FILE
+from ragstrap.vector.embed import Embedder
+
+VECTOR_DIR = "vectors"
+
+# Partition into IVF lists once a reference has more chunks than this
+IVF_THRESHOLD = 50_000
+
+EMBED_BATCH_SIZE = 256
+SCORE_BATCH_SIZE = 65_536
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE_SIZE = 20_000
+
+
+def vector_index_is_current(reference_dir: Path, embedder: Embedder) -> bool:
+    meta = _load_meta(reference_dir / VECTOR_DIR)
+    return (
+        meta.get("embedder") == embedder.name
+        and meta.get("dim") == embedder.dim
+        and meta.get("chunks") == _chunks_signature(reference_dir)
+    )
+
+
+def build_vector_index(
+    reference_dir: Path,
+    embedder: Embedder,
+    ivf_threshold: int = IVF_THRESHOLD,
+) -> dict:
+    """
+    Embed every chunk in chunks.jsonl into a float32 .npy matrix, written in
+    batches through a memory map. Row i is the i-th line of chunks.jsonl.
+    """
+    chunks_path = reference_dir / CHUNKS_FILE
+    tmp_dir = reference_dir / (VECTOR_DIR + ".tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir()
+
+    offsets = _line_offsets(chunks_path)
+    count = len(offsets)
+
+    np.save(tmp_dir / "offsets.npy", np.asarray(offsets, dtype=np.int64))
+    matrix = np.lib.format.open_memmap(
+        tmp_dir / "embeddings.npy",
+        mode="w+",
+        dtype=np.float32,
+        shape=(count, embedder.dim),
+    )
+
+    row = 0
+    for texts in _iter_text_batches(chunks_path, EMBED_BATCH_SIZE):
+        matrix[row : row + len(texts)] = embedder.embed(texts)
+        row += len(texts)
+    matrix.flush()
+
+    meta = {
+        "embedder": embedder.name,
+        "dim": embedder.dim,
+        "count": count,
+        "chunks": _chunks_signature(reference_dir),
+        "ivf": None,
+    }
+
+    if count > ivf_threshold:
+        meta["ivf"] = _build_ivf(matrix, tmp_dir)
+
+    del matrix
+
+    (tmp_dir / "meta.json").write_text(json.dumps(meta, indent=2))
+
+    out_dir = reference_dir / VECTOR_DIR
+    shutil.rmtree(out_dir, ignore_errors=True)
+    tmp_dir.rename(out_dir)
+    return meta
+
+
+def query_vector_index(
+    reference_dir: Path,
+    embedder: Embedder,
+    text: str,
+    k: int = 10,
+    nprobe: int = 8,
+) -> list[dict]:
+    """
+    Return the k chunks most similar to text, best first.
+    """
+    vector_dir = reference_dir / VECTOR_DIR
+    meta = _load_meta(vector_dir)
+    if meta["count"] == 0:
+        return []
+
+    matrix = np.load(vector_dir / "embeddings.npy", mmap_mode="r")
+    query = embedder.embed([text])[0]
+
+    if meta["ivf"]:
+        rows = _probe_ivf(vector_dir, query, nprobe)
+        scores = np.asarray(matrix[rows] @ query)
+        best = _top_k(scores, k)
+        best_rows, best_scores = rows[best], scores[best]
+    else:
+        best_rows, best_scores = _scan(matrix, query, k)
+
+    offsets = np.load(vector_dir / "offsets.npy", mmap_mode="r")
+    hits = []
+    with (reference_dir / CHUNKS_FILE).open("rb") as fh:
+        for row, score in zip(best_rows, best_scores):
+            fh.seek(int(offsets[row]))
+            record = json.loads(fh.readline())
+            record["score"] = float(score)
+            hits.append(record)
+    return hits
+
+
+def _scan(matrix: np.ndarray, query: np.ndarray, k: int):
+    """
+    Score every row in fixed-size batches, keeping a running top-k.
+    """
+    best_rows = np.empty(0, dtype=np.int64)
+    best_scores = np.empty(0, dtype=np.float32)
+
+    for start in range(0, matrix.shape[0], SCORE_BATCH_SIZE):
+        scores = np.asarray(matrix[start : start + SCORE_BATCH_SIZE] @ query)
+        top = _top_k(scores, k)
+        best_rows = np.concatenate([best_rows, top + start])
+        best_scores = np.concatenate([best_scores, scores[top]])
+        keep = _top_k(best_scores, k)
+        best_rows, best_scores = best_rows[keep], best_scores[keep]
+
+    return best_rows, best_scores
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indexes of the k highest scores, highest first.
+    """
+    if len(scores) > k:
+        idx = np.argpartition(-scores, k - 1)[:k]
+    else:
+        idx = np.arange(len(scores))
+    return idx[np.argsort(-scores[idx], kind="stable")]
+
+
+def _build_ivf(matrix: np.ndarray, out_dir: Path) -> dict:
+    """
+    Partition rows into sqrt(n) lists with a few rounds of spherical k-means
+    on a sample, then store rows grouped by list.
+    """
+    count = matrix.shape[0]
+    nlist = max(1, int(np.sqrt(count)))
+    rng = np.random.default_rng(0)
+
+    sample_size = min(count, KMEANS_SAMPLE_SIZE)
+    sample = np.asarray(matrix[np.sort(rng.choice(count, sample_size, replace=False))])
+    seeds = rng.choice(sample_size, min(nlist, sample_size), replace=False)
+    centroids = sample[seeds]
+
+    for _ in range(KMEANS_ITERATIONS):
+        assign = np.argmax(sample @ centroids.T, axis=1)
+        for c in range(len(centroids)):
+            members = sample[assign == c]
+            if len(members):
+                centroid = members.sum(axis=0)
+                norm = np.linalg.norm(centroid)
+                if norm > 0:
+                    centroids[c] = centroid / norm
+
+    assignments = np.empty(count, dtype=np.int32)
+    for start in range(0, count, SCORE_BATCH_SIZE):
+        block = np.asarray(matrix[start : start + SCORE_BATCH_SIZE])
+        block_assign = np.argmax(block @ centroids.T, axis=1)
+        assignments[start : start + len(block)] = block_assign
+
+    order = np.argsort(assignments, kind="stable").astype(np.int64)
+    bounds = np.searchsorted(assignments[order], np.arange(len(centroids) + 1))
+
+    np.save(out_dir / "centroids.npy", centroids.astype(np.float32))
+    np.save(out_dir / "ivf_rows.npy", order)
+    np.save(out_dir / "ivf_bounds.npy", bounds.astype(np.int64))
+    return {"lists": int(len(centroids))}
+
+
+def _probe_ivf(vector_dir: Path, query: np.ndarray, nprobe: int) -> np.ndarray:
+    centroids = np.load(vector_dir / "centroids.npy")
+    rows = np.load(vector_dir / "ivf_rows.npy", mmap_mode="r")
+    bounds = np.load(vector_dir / "ivf_bounds.npy")
+
+    lists = _top_k(centroids @ query, nprobe)
+    parts = [np.asarray(rows[bounds[c] : bounds[c + 1]]) for c in lists]
+    return np.sort(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int64)
+
+
+def _line_offsets(path: Path) -> list[int]:
+    offsets = []
+    offset = 0
+    with path.open("rb") as fh:
+        for line in fh:
+            offsets.append(offset)
+            offset += len(line)
+    return offsets
+
+
+def _iter_text_batches(path: Path, size: int):
+    batch = []
+    with path.open("rb") as fh:
+        for line in fh:
+            batch.append(json.loads(line)["text"])
+            if len(batch) == size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def _chunks_signature(reference_dir: Path) -> list[int]:
+    st = (reference_dir / CHUNKS_FILE).stat()
+    return [st.st_size, st.st_mtime_ns]
+
+
+def _load_meta(vector_dir: Path) -> dict:
+    path = vector_dir / "meta.json"
+    if not path.exists():
+        return {}
+    try:
+        return json.loads(path.read_text())
+    except json.JSONDecodeError:
+        return {}